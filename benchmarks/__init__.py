@@ -0,0 +1 @@
+"""Benchmark pynamical with asv."""
@@ -0,0 +1,51 @@
+"""Benchmark drawing and saving each plot."""
+
+import shutil
+import tempfile
+
+import matplotlib.pyplot as plt
+
+from pynamical import bifurcation_plot
+from pynamical import cobweb_plot
+from pynamical import logistic_map
+from pynamical import phase_diagram
+from pynamical import phase_diagram_3d
+from pynamical import simulate
+
+
+class Plots:
+    """Time and measure drawing each plot and saving it to disk."""
+
+    params = [10, 100]
+    param_names = ["num_rates"]
+
+    def setup(self, num_rates):
+        """Simulate the populations to plot and make a folder for the images."""
+        self.pops = simulate(model=logistic_map, num_gens=100, rate_min=3.5, num_rates=num_rates)
+        self.folder = tempfile.mkdtemp()
+        self.kwargs = dict(save=True, show=False, folder=self.folder, dpi=100)
+
+    def teardown(self, num_rates):
+        """Close the figures and delete the images."""
+        plt.close("all")
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def time_bifurcation_plot(self, num_rates):
+        """Time drawing and saving a bifurcation diagram."""
+        bifurcation_plot(self.pops, **self.kwargs)
+
+    def time_phase_diagram(self, num_rates):
+        """Time drawing and saving a 2-D phase diagram."""
+        phase_diagram(self.pops, **self.kwargs)
+
+    def time_phase_diagram_3d(self, num_rates):
+        """Time drawing and saving a 3-D phase diagram."""
+        phase_diagram_3d(self.pops, **self.kwargs)
+
+    def time_cobweb_plot(self, num_rates):
+        """Time drawing and saving a cobweb plot."""
+        cobweb_plot(model=logistic_map, r=3.9, cobweb_n=num_rates, filename="cobweb", **self.kwargs)
+
+    def peakmem_bifurcation_plot(self, num_rates):
+        """Measure peak memory of drawing and saving a bifurcation diagram."""
+        bifurcation_plot(self.pops, **self.kwargs)
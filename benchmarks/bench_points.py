@@ -0,0 +1,56 @@
+"""Benchmark converting simulations into plot points."""
+
+from pynamical import get_bifurcation_plot_points
+from pynamical import get_cobweb_points
+from pynamical import get_phase_diagram_points
+from pynamical import logistic_map
+from pynamical import simulate
+
+
+class BifurcationPoints:
+    """Time and measure converting simulations into bifurcation points."""
+
+    params = [10, 100, 1000]
+    param_names = ["num_rates"]
+
+    def setup(self, num_rates):
+        """Simulate the populations to convert."""
+        self.pops = simulate(model=logistic_map, num_gens=100, num_rates=num_rates)
+
+    def time_get_bifurcation_plot_points(self, num_rates):
+        """Time converting the populations into xy points."""
+        get_bifurcation_plot_points(self.pops)
+
+    def peakmem_get_bifurcation_plot_points(self, num_rates):
+        """Measure peak memory of converting the populations into xy points."""
+        get_bifurcation_plot_points(self.pops)
+
+
+class PhaseDiagramPoints:
+    """Time converting simulations into phase diagram points."""
+
+    params = ([10, 100, 1000], [2, 3])
+    param_names = ["num_rates", "dimensions"]
+
+    def setup(self, num_rates, dimensions):
+        """Simulate the populations to convert."""
+        self.pops = simulate(model=logistic_map, num_gens=100, num_rates=num_rates)
+
+    def time_get_phase_diagram_points(self, num_rates, dimensions):
+        """Time converting the populations into xy(z) points."""
+        get_phase_diagram_points(self.pops, dimensions=dimensions)
+
+
+class CobwebPoints:
+    """Time computing cobweb plot vertices."""
+
+    params = ([100, 10000, 1000000], [True, False])
+    param_names = ["n", "jit"]
+
+    def setup(self, n, jit):
+        """Compile the cobweb function outside of the timed runs."""
+        get_cobweb_points(logistic_map, 3.9, 0.5, 10, jit=jit)
+
+    def time_get_cobweb_points(self, n, jit):
+        """Time computing n cobweb steps."""
+        get_cobweb_points(logistic_map, 3.9, 0.5, n, jit=jit)
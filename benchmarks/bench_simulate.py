@@ -0,0 +1,81 @@
+"""Benchmark the simulation engines."""
+
+from numba import jit
+
+from pynamical import logistic_map
+from pynamical import simulate
+from pynamical import simulate_double_double
+
+
+class Simulate:
+    """Time steady-state simulations, after the jitted simulator compiled."""
+
+    params = ([10, 100, 1000], [True, False])
+    param_names = ["num_rates", "jit"]
+
+    def setup(self, num_rates, jit):
+        """Compile the simulator outside of the timed runs."""
+        simulate(model=logistic_map, num_gens=10, num_rates=num_rates, jit=jit)
+
+    def time_simulate(self, num_rates, jit):
+        """Time simulating 100 generations per rate."""
+        simulate(model=logistic_map, num_gens=100, num_rates=num_rates, num_discard=100, jit=jit)
+
+    def peakmem_simulate(self, num_rates, jit):
+        """Measure peak memory of simulating 100 generations per rate."""
+        simulate(model=logistic_map, num_gens=100, num_rates=num_rates, num_discard=100, jit=jit)
+
+
+class SimulatePrecision:
+    """Time steady-state simulations at each precision."""
+
+    params = ["float64", "float32", "fast"]
+    param_names = ["precision"]
+
+    def setup(self, precision):
+        """Compile the simulator outside of the timed runs."""
+        simulate(num_gens=10, num_rates=10, precision=precision)
+
+    def time_simulate(self, precision):
+        """Time simulating 1000 generations for each of 1000 rates."""
+        simulate(num_gens=1000, num_rates=1000, num_discard=100, precision=precision)
+
+    def peakmem_simulate(self, precision):
+        """Measure peak memory of simulating 1000 generations for each of 1000 rates."""
+        simulate(num_gens=1000, num_rates=1000, num_discard=100, precision=precision)
+
+
+class SimulateDoubleDouble:
+    """Time steady-state simulations in double-double precision."""
+
+    def setup(self):
+        """Compile the simulator outside of the timed runs."""
+        simulate_double_double(num_gens=10, num_rates=10)
+
+    def time_simulate(self):
+        """Time simulating 1000 generations for each of 1000 rates."""
+        simulate_double_double(num_gens=1000, num_rates=1000, num_discard=100)
+
+
+class Compile:
+    """Time compiling models and simulators."""
+
+    # time one call per setup, so every sample compiles a fresh model
+    number = 1
+    repeat = 10
+
+    def setup(self):
+        """Create a new model for each run, so nothing is compiled yet."""
+
+        def model(pop, rate):
+            return rate * pop * (1 - pop)
+
+        self.model = jit(nopython=True)(model)
+
+    def time_compile_and_simulate(self):
+        """Time compiling a new model and its simulator, then simulating."""
+        simulate(model=self.model, num_gens=10, num_rates=10)
+
+    def timeraw_import_and_simulate(self):
+        """Time importing pynamical and the first simulation in a fresh process."""
+        return "from pynamical import simulate\nsimulate(num_gens=10, num_rates=10)"
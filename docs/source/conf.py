@@ -34,6 +34,7 @@ autodoc_mock_imports = [
     "matplotlib.font_manager",
     "matplotlib.cm",
     "mpl_toolkits.mplot3d",
+    "PIL",
 ]
 
 # -- General configuration ------------------------------------------------
@@ -1,5 +1,23 @@
 """Expose the pynamical API."""
 
+from .accuracy import *
+from .animation import *
+from .asynchronous import *
+from .basins import *
+from .cli import *
+from .continuation import *
+from .expressions import *
+from .extended import *
+from .interactive import *
+from .lattice import *
+from .profiling import *
 from .pynamical import *
+from .quantization import *
+from .recurrence import *
+from .reducers import *
+from .sensitivity import *
+from .stochastic import *
+from .storage import *
+from .symbolic import *
 
 __version__ = "0.3.3"
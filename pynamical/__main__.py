@@ -0,0 +1,7 @@
+"""Run the pynamical command line interface with python -m pynamical."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
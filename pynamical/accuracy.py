@@ -0,0 +1,89 @@
+"""Measure how far reduced precision simulations drift from float64."""
+
+import numpy as np
+import pandas as pd
+
+from .pynamical import logistic_map
+from .pynamical import simulate_rates
+
+__all__ = [
+    "precision_report",
+]
+
+
+def precision_report(
+    model=logistic_map,
+    num_gens=500,
+    rate_min=0.5,
+    rate_max=4,
+    num_rates=100,
+    num_discard=500,
+    initial_pop=0.5,
+    precision="fast",
+    tol=1e-3,
+):
+    """
+    Compare a reduced precision simulation to the float64 reference per rate.
+
+    Both simulations keep every generation, including the num_discard
+    transient ones. Pointwise errors show how long the orbits agree, but
+    chaotic orbits soon separate at any precision, so the attractor is
+    judged by its statistics instead: the difference of the means and
+    standard deviations, and the mean distance between the sorted values,
+    which is the Wasserstein distance between the two empirical invariant
+    densities. A rate is safe if that distance is within tol.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of generations after the transient to compare statistics over
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of transient generations before the attractor
+    initial_pop: float
+        starting population when you run the model
+    precision: string
+        precision to check against float64, "float32" or "fast"
+    tol: float
+        largest error considered negligible
+
+    Returns
+    -------
+    DataFrame
+        one row per growth rate, with the first generation whose error
+        exceeds tol (NaN if none does), the largest transient and attractor
+        errors, the errors of the attractor's mean and standard deviation,
+        its distribution distance, and whether it is safe
+    """
+    args = (model, num_discard + num_gens, rate_min, rate_max, num_rates, 0, initial_pop)
+    reference = simulate_rates(*args).to_numpy()
+    candidate = simulate_rates(*args, precision=precision).to_numpy().astype(np.float64)
+    errors = np.abs(candidate - reference)
+
+    diverged = errors > tol
+    divergence_gen = np.where(diverged.any(axis=0), diverged.argmax(axis=0), np.nan)
+    transient, attractor = errors[:num_discard], errors[num_discard:]
+    transient_error = transient.max(axis=0) if num_discard else np.full(num_rates, np.nan)
+
+    reference, candidate = reference[num_discard:], candidate[num_discard:]
+    distance = np.abs(np.sort(candidate, axis=0) - np.sort(reference, axis=0)).mean(axis=0)
+    df = pd.DataFrame(
+        {
+            "divergence_gen": divergence_gen,
+            "transient_error": transient_error,
+            "attractor_error": attractor.max(axis=0),
+            "mean_error": np.abs(candidate.mean(axis=0) - reference.mean(axis=0)),
+            "std_error": np.abs(candidate.std(axis=0) - reference.std(axis=0)),
+            "distribution_error": distance,
+            "safe": distance <= tol,
+        },
+        index=pd.Index(np.linspace(rate_min, rate_max, num_rates), name="rate"),
+    )
+    return df
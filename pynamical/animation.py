@@ -0,0 +1,584 @@
+"""Render parameter sweeps into animation frames."""
+
+import functools
+import io
+import itertools
+import multiprocessing
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .pynamical import get_cobweb_points
+from .pynamical import get_default_style
+from .pynamical import get_function_points
+from .pynamical import get_phase_colors
+from .pynamical import get_phase_diagram_points
+from .pynamical import logistic_map
+
+__all__ = [
+    "get_canvas_frame",
+    "render_frames",
+    "cobweb_frames",
+    "phase_diagram_3d_frames",
+    "get_gif_bytes",
+    "save_animation",
+]
+
+
+def get_canvas_frame(canvas):
+    """
+    Draw a figure's canvas and copy its pixels into an RGB frame.
+
+    Arguments
+    ---------
+    canvas: matplotlib.backends.backend_agg.FigureCanvasAgg
+        the canvas of the figure to draw
+
+    Returns
+    -------
+    numpy.ndarray
+        array of shape (height, width, 3) with dtype uint8
+    """
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+
+def _collect_frames(render_chunk, frame_params):
+    # worker processes can't send back a generator, so they send a list
+    return list(render_chunk(frame_params))
+
+
+def render_frames(render_chunk, frame_params, processes=1, chunk_size=16):
+    """
+    Render frames by splitting their parameters into chunks.
+
+    Each chunk is rendered by one call to render_chunk, which reuses a single
+    figure for all the frames in its chunk. If processes > 1, the chunks are
+    spread over a pool of spawned processes, with at most two chunks per
+    process in flight at once. Frames are yielded one at a time, in the same
+    order as frame_params either way, so they can be streamed to a writer.
+
+    Arguments
+    ---------
+    render_chunk: function
+        picklable function that takes a list of frame parameters and yields
+        one frame per parameter
+    frame_params: list
+        one parameter value per frame
+    processes: int
+        number of worker processes to render the frames with
+    chunk_size: int
+        number of frames each worker process renders per figure
+
+    Yields
+    ------
+    numpy.ndarray
+        RGB frame of shape (height, width, 3) with dtype uint8
+    """
+    frame_params = list(frame_params)
+    if processes <= 1 or len(frame_params) <= 1:
+        yield from render_chunk(frame_params)
+        return
+
+    # use spawned processes because forking after numba has started its
+    # threads can leave the parent process unable to exit
+    chunks = [frame_params[i : i + chunk_size] for i in range(0, len(frame_params), chunk_size)]
+    collect = functools.partial(_collect_frames, render_chunk)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        chunks = iter(chunks)
+        futures = [pool.submit(collect, chunk) for chunk in itertools.islice(chunks, 2 * processes)]
+        while futures:
+            frames = futures.pop(0).result()
+            for chunk in itertools.islice(chunks, 1):
+                futures.append(pool.submit(collect, chunk))
+            yield from frames
+
+
+def _render_cobweb_chunk(
+    rates,
+    model,
+    function_n,
+    cobweb_n,
+    cobweb_x,
+    num_discard,
+    title,
+    start,
+    end,
+    figsize,
+    diagonal_linewidth,
+    cobweb_linewidth,
+    function_linewidth,
+    title_font,
+    style,
+    dpi,
+):
+    # create one figure for the whole chunk, then only update its artists'
+    # data for each rate, yielding each frame as soon as it is drawn
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    # diagonal line, function line, and cobweb line
+    _ = ax.plot((0, 1), (0, 1), color=style.diagonal_color, linewidth=diagonal_linewidth)
+    function_line = ax.scatter(
+        [], [], color=style.function_color, edgecolor="None", s=function_linewidth
+    )
+    (cobweb_line,) = ax.plot([], [], color=style.cobweb_color, linewidth=cobweb_linewidth)
+
+    ax.set_ylim((0, 1))
+    ax.set_xlim((0, 1))
+    title_text = ax.set_title("", fontproperties=title_font)
+
+    for r in rates:
+        func_x_vals, func_y_vals = get_function_points(
+            model=model, r=r, n=function_n, start=start, end=end
+        )
+        cobweb_x_vals, cobweb_y_vals = get_cobweb_points(
+            model=model, r=r, x=cobweb_x, n=cobweb_n, num_discard=num_discard
+        )
+        function_line.set_offsets(np.column_stack([func_x_vals, func_y_vals]))
+        cobweb_line.set_data(cobweb_x_vals, cobweb_y_vals)
+        title_text.set_text(title.format(r))
+        yield get_canvas_frame(canvas)
+
+
+def cobweb_frames(
+    model=logistic_map,
+    rates=np.linspace(2.9, 4, 12),
+    function_n=1000,
+    cobweb_n=100,
+    cobweb_x=0.5,
+    num_discard=0,
+    title="Cobweb Plot, r={:.3f}",
+    start=0,
+    end=1,
+    figsize=(6, 6),
+    diagonal_linewidth=1.35,
+    cobweb_linewidth=1,
+    function_linewidth=1.5,
+    title_font=None,
+    style=None,
+    dpi=100,
+    processes=1,
+    chunk_size=16,
+):
+    """
+    Render a cobweb plot for each growth rate in a sweep.
+
+    Unlike calling cobweb_plot once per rate, the figure is created once and
+    only its artists' data is updated from frame to frame, and the frames
+    are yielded one at a time instead of being saved as image files.
+
+    Arguments
+    ---------
+    model: function
+        defining an iterated map to simulate
+    rates: list
+        growth rate parameter values, one per frame
+    function_n: int
+        number of iterations of the function to run
+    cobweb_n: int
+        number of iterations of the cobweb line to run
+    cobweb_x: float
+        starting population value of the cobweb line
+    num_discard: int
+        how many initial vertices of the cobweb line to throw away
+    title: string
+        title of each frame, formatted with the frame's growth rate
+    start: float
+        lower limit of the function range
+    end: float
+        upper limit of the function range
+    figsize: tuple
+        (width, height) of figure
+    diagonal_linewidth: float
+        width of y=x line
+    cobweb_linewidth: float
+        width of cobweb line
+    function_linewidth: float
+        width of function line
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    dpi: int
+        resolution at which to render the frames
+    processes: int
+        number of worker processes to render the frames with
+    chunk_size: int
+        number of frames each worker process renders per figure
+
+    Returns
+    -------
+    generator
+        yields RGB frames as numpy arrays, one per frame
+    """
+    if style is None:
+        style = get_default_style()
+    title_font, _ = style.get_fonts(title_font)
+
+    render_chunk = functools.partial(
+        _render_cobweb_chunk,
+        model=model,
+        function_n=function_n,
+        cobweb_n=cobweb_n,
+        cobweb_x=cobweb_x,
+        num_discard=num_discard,
+        title=title,
+        start=start,
+        end=end,
+        figsize=figsize,
+        diagonal_linewidth=diagonal_linewidth,
+        cobweb_linewidth=cobweb_linewidth,
+        function_linewidth=function_linewidth,
+        title_font=title_font,
+        style=style,
+        dpi=dpi,
+    )
+    return render_frames(
+        render_chunk, [float(r) for r in rates], processes=processes, chunk_size=chunk_size
+    )
+
+
+def _render_phase_diagram_3d_chunk(
+    views,
+    points,
+    figsize,
+    xmin,
+    xmax,
+    ymin,
+    ymax,
+    zmin,
+    zmax,
+    remove_ticks,
+    title,
+    dist,
+    marker,
+    size,
+    alpha,
+    color,
+    color_reverse,
+    title_font,
+    dpi,
+):
+    # create one figure for the whole chunk and draw the points once, then
+    # only change the viewing perspective for each frame, yielding each frame
+    # as soon as it is drawn
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(projection="3d")
+    ax.xaxis.set_pane_color((1, 1, 1, 1))
+    ax.yaxis.set_pane_color((1, 1, 1, 1))
+    ax.zaxis.set_pane_color((1, 1, 1, 1))
+    ax.dist = dist
+
+    ax.set_title(title, fontproperties=title_font)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_zlim(zmin, zmax)
+
+    # remove all ticks if argument is True
+    if remove_ticks:
+        ax.tick_params(
+            reset=True,
+            axis="both",
+            which="both",
+            pad=0,
+            width=0,
+            length=0,
+            bottom=False,
+            top=False,
+            left=False,
+            right=False,
+            labelbottom=False,
+            labeltop=False,
+            labelleft=False,
+            labelright=False,
+        )
+
+    index = points.index.get_level_values("name")
+    names = np.unique(index)
+    color_list = get_phase_colors(color, len(names), color_reverse)
+    for n in range(len(names)):
+        xyz = points.iloc[index == names[n]]
+        ax.scatter(
+            xyz["x"],
+            xyz["y"],
+            xyz["z"],
+            marker=marker,
+            c=[color_list[n]],
+            edgecolor=[color_list[n]],
+            s=size,
+            alpha=alpha,
+        )
+
+    for elev, azim in views:
+        ax.view_init(elev=elev, azim=azim)
+        yield get_canvas_frame(canvas)
+
+
+def phase_diagram_3d_frames(
+    pops,
+    azims=np.arange(0, 360, 30),
+    elevs=25,
+    discard_gens=0,
+    figsize=(10, 8),
+    xmin=0,
+    xmax=1,
+    ymin=0,
+    ymax=1,
+    zmin=0,
+    zmax=1,
+    remove_ticks=True,
+    title="",
+    dist=10,
+    marker=".",
+    size=5,
+    alpha=0.7,
+    color="#003399",
+    color_reverse=False,
+    title_font=None,
+    style=None,
+    dpi=100,
+    processes=1,
+    chunk_size=16,
+):
+    """
+    Render a 3D phase diagram from each viewing perspective in a sweep.
+
+    The xyz points are computed and drawn once, then each frame only changes
+    the viewing perspective, and the frames are yielded one at a time instead
+    of being saved as image files.
+
+    Arguments
+    ---------
+    pops: DataFrame
+        population data output from the model
+    azims: list
+        the azimuth of the viewing perspective, one per frame
+    elevs: float or list
+        the elevation of the viewing perspective, either the same for every
+        frame or one per frame
+    discard_gens: int
+        number of rows to discard before keeping points to plot
+    figsize: tuple
+        (width, height) of figure
+    xmin: float
+        minimum value on the x axis
+    xmax: float
+        maximum value on the x axis
+    ymin: float
+        minimum value on the y axis
+    ymax: float
+        maximum value on the y axis
+    zmin: float
+        minimum value on the z axis
+    zmax: float
+        maximum value on the z axis
+    remove_ticks: bool
+        remove axis ticks or not
+    title: string
+        title of the plot
+    dist: float
+        the distance of the viewing perspective
+    marker: string
+        the type of point to use in the plot
+    size: float
+        the size of the marker
+    alpha: float
+        the opacity of the marker
+    color: string
+        color of the points in the scatter plot
+    color_reverse: bool
+        reverse the returned list of colors if True
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    dpi: int
+        resolution at which to render the frames
+    processes: int
+        number of worker processes to render the frames with
+    chunk_size: int
+        number of frames each worker process renders per figure
+
+    Returns
+    -------
+    generator
+        yields RGB frames as numpy arrays, one per frame
+    """
+    if style is None:
+        style = get_default_style()
+    title_font, _ = style.get_fonts(title_font)
+
+    points = get_phase_diagram_points(pops, discard_gens, dimensions=3)
+    elevs, azims = np.broadcast_arrays(elevs, azims)
+    views = [(float(elev), float(azim)) for elev, azim in zip(elevs, azims)]
+
+    render_chunk = functools.partial(
+        _render_phase_diagram_3d_chunk,
+        points=points,
+        figsize=figsize,
+        xmin=xmin,
+        xmax=xmax,
+        ymin=ymin,
+        ymax=ymax,
+        zmin=zmin,
+        zmax=zmax,
+        remove_ticks=remove_ticks,
+        title=title,
+        dist=dist,
+        marker=marker,
+        size=size,
+        alpha=alpha,
+        color=color,
+        color_reverse=color_reverse,
+        title_font=title_font,
+        dpi=dpi,
+    )
+    return render_frames(render_chunk, views, processes=processes, chunk_size=chunk_size)
+
+
+def _get_first_frame(frames):
+    # split off the first frame, which sets the size of the animation
+    frames = iter(frames)
+    first_frame = next(frames, None)
+    if first_frame is None:
+        raise ValueError("frames must contain at least one frame")
+    return first_frame, frames
+
+
+def _write_gif(file, frames, fps, loop):
+    # convert each frame to a palette image as it arrives, so frames that are
+    # waiting to be encoded take a third of the memory of the RGB frames.
+    # Pillow is imported here so that pynamical imports without it
+    from PIL import Image
+
+    first_frame, frames = _get_first_frame(frames)
+    images = (Image.fromarray(frame).convert("P", palette=Image.ADAPTIVE) for frame in frames)
+    Image.fromarray(first_frame).convert("P", palette=Image.ADAPTIVE).save(
+        file,
+        format="GIF",
+        save_all=True,
+        append_images=images,
+        duration=int(round(1000 / fps)),
+        loop=loop,
+    )
+
+
+def get_gif_bytes(frames, fps=10, loop=0):
+    """
+    Encode frames as an animated GIF in memory.
+
+    Arguments
+    ---------
+    frames: iterable
+        RGB frames as numpy arrays, such as the generator returned by
+        cobweb_frames or phase_diagram_3d_frames
+    fps: float
+        frames per second
+    loop: int
+        number of times the GIF repeats, 0 means forever
+
+    Returns
+    -------
+    bytes
+    """
+    buffer = io.BytesIO()
+    _write_gif(buffer, frames, fps=fps, loop=loop)
+    return buffer.getvalue()
+
+
+def save_animation(frames, filename="animation", folder="images", file_format="gif", fps=10):
+    """
+    Save frames to disk as an animated GIF or an MP4 video.
+
+    Frames are consumed one at a time as they are rendered. MP4 videos are
+    streamed frame by frame to ffmpeg, which must be installed. GIFs are
+    encoded with Pillow, which keeps a palette copy of each frame until the
+    file is written. No intermediate image files are written either way.
+
+    Arguments
+    ---------
+    frames: iterable
+        RGB frames as numpy arrays, such as the generator returned by
+        cobweb_frames or phase_diagram_3d_frames
+    filename: string
+        filename of animation file to be saved, without extension
+    folder: string
+        folder in which to save the animation file
+    file_format: string
+        {"gif", "mp4"}, the format of the animation file
+    fps: float
+        frames per second
+
+    Returns
+    -------
+    None
+    """
+    if file_format not in {"gif", "mp4"}:
+        raise ValueError('file_format must be "gif" or "mp4"')
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    filepath = "{}/{}.{}".format(folder, filename, file_format)
+
+    if file_format == "gif":
+        with open(filepath, "wb") as f:
+            _write_gif(f, frames, fps=fps, loop=0)
+
+    else:
+        first_frame, frames = _get_first_frame(frames)
+        height, width, _ = first_frame.shape
+        command = [
+            mpl.rcParams["animation.ffmpeg_path"],
+            "-y",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            "{}x{}".format(width, height),
+            "-r",
+            str(fps),
+            "-i",
+            "-",
+            "-vf",
+            "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-pix_fmt",
+            "yuv420p",
+            filepath,
+        ]
+        # ffmpeg's messages go to a file rather than a pipe, which could fill
+        # up and block ffmpeg while frames are still being written to it
+        with tempfile.TemporaryFile() as log:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=log)
+            try:
+                try:
+                    for frame in itertools.chain([first_frame], frames):
+                        process.stdin.write(np.ascontiguousarray(frame).tobytes())
+                except BrokenPipeError:
+                    # ffmpeg exited early, and its messages say why
+                    pass
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                returncode = process.wait()
+            finally:
+                # don't leave ffmpeg running if rendering a frame failed
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            if returncode != 0:
+                log.seek(0)
+                message = log.read().decode(errors="replace").strip()
+                raise RuntimeError("ffmpeg failed to write {}: {}".format(filepath, message))
@@ -0,0 +1,355 @@
+"""Run simulations and render diagrams from asyncio code without blocking."""
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .pynamical import get_default_style
+from .pynamical import logistic_map
+from .pynamical import make_jit_rate_simulator
+
+__all__ = [
+    "AsyncRunner",
+    "get_default_runner",
+    "asimulate",
+    "arender_bifurcation",
+]
+
+
+def _simulate_nogil(model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop):
+    # runs in a worker thread, and the compiled simulator releases the GIL
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    jit_rate_simulator = make_jit_rate_simulator(model)
+    pops = jit_rate_simulator(rates, num_gens, num_discard, float(initial_pop))
+    return pd.DataFrame(pops, columns=rates)
+
+
+def _render_bifurcation_png(
+    rates, pops, xmin, xmax, ymin, ymax, figsize, title, xlabel, ylabel, color, style, dpi
+):
+    # runs in a worker process, and draws with the object-oriented api on its
+    # own Agg canvas, so it never touches pyplot's global state
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts()
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    x = np.repeat(rates, pops.shape[0])
+    y = pops.T.ravel()
+    _ = ax.scatter(x, y, c=color, edgecolor="None", alpha=1, s=1)
+
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_title(title, fontproperties=title_font)
+    ax.set_xlabel(xlabel, fontproperties=label_font)
+    ax.set_ylabel(ylabel, fontproperties=label_font)
+
+    buffer = io.BytesIO()
+    canvas.print_png(buffer)
+    return buffer.getvalue()
+
+
+class AsyncRunner:
+    """
+    Run simulations in a thread pool and render diagrams in a process pool.
+
+    Simulations run compiled kernels that release the GIL, so they don't
+    block the event loop and several can run at once. Renders run in a pool
+    of spawned processes, so slow drawing never holds the event loop's GIL.
+    Identical requests made while one is still running share its result
+    instead of running again, so callers shouldn't modify what they get back.
+
+    Arguments
+    ---------
+    max_threads: int
+        number of threads to simulate with, or None for python's default
+    max_processes: int
+        number of processes to render with, which bounds how many renders
+        run at once
+    """
+
+    def __init__(self, max_threads=None, max_processes=2):
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self._thread_pool = None
+        self._process_pool = None
+        self._in_flight = {}
+
+    def _get_thread_pool(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_threads)
+        return self._thread_pool
+
+    def _get_process_pool(self):
+        # use spawned processes because forking after numba has started its
+        # threads can leave the parent process unable to exit
+        if self._process_pool is None:
+            context = multiprocessing.get_context("spawn")
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_processes, mp_context=context
+            )
+        return self._process_pool
+
+    async def _deduplicate(self, key, make_coroutine):
+        # share one task among identical requests, and shield it so that one
+        # cancelled caller doesn't cancel the others
+        try:
+            hash(key)
+        except TypeError:
+            return await make_coroutine()
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_coroutine())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def simulate(
+        self,
+        model=logistic_map,
+        num_gens=50,
+        rate_min=0.5,
+        rate_max=4,
+        num_rates=8,
+        num_discard=0,
+        initial_pop=0.5,
+    ):
+        """
+        Simulate the model in a worker thread.
+
+        Arguments
+        ---------
+        model: function
+            the function defining an iterated map to simulate
+        num_gens: int
+            number of iterations to run the model
+        rate_min: float
+            the first growth rate for the model
+        rate_max: float
+            the last growth rate for the model
+        num_rates: int
+            how many growth rates between min and max to run the model on
+        num_discard: int
+            number of generations to discard before keeping population values
+        initial_pop: float
+            starting population when you run the model
+
+        Returns
+        -------
+        DataFrame
+            one column for each growth rate and one row for each generation,
+            like simulate's output
+        """
+        args = (model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop)
+
+        def make_coroutine():
+            loop = asyncio.get_running_loop()
+            return loop.run_in_executor(self._get_thread_pool(), _simulate_nogil, *args)
+
+        return await self._deduplicate(("simulate",) + args, make_coroutine)
+
+    async def render_bifurcation(
+        self,
+        model=logistic_map,
+        num_gens=100,
+        rate_min=0,
+        rate_max=4,
+        num_rates=1000,
+        num_discard=100,
+        initial_pop=0.5,
+        xmin=0,
+        xmax=4,
+        ymin=0,
+        ymax=1,
+        figsize=(10, 6),
+        title="Bifurcation Diagram",
+        xlabel="Growth Rate",
+        ylabel="Population",
+        color="#003399",
+        style=None,
+        dpi=100,
+    ):
+        """
+        Simulate the model and render its bifurcation diagram as a PNG.
+
+        Arguments
+        ---------
+        model: function
+            the function defining an iterated map to simulate
+        num_gens: int
+            number of iterations to run the model
+        rate_min: float
+            the first growth rate for the model
+        rate_max: float
+            the last growth rate for the model
+        num_rates: int
+            how many growth rates between min and max to run the model on
+        num_discard: int
+            number of generations to discard before keeping population values
+        initial_pop: float
+            starting population when you run the model
+        xmin: float
+            minimum value on the x axis
+        xmax: float
+            maximum value on the x axis
+        ymin: float
+            minimum value on the y axis
+        ymax: float
+            maximum value on the y axis
+        figsize: tuple
+            (width, height) of figure
+        title: string
+            title of the plot
+        xlabel: string
+            label of the x axis
+        ylabel: string
+            label of the y axis
+        color: string
+            color of the points in the scatter plot
+        style: PlotStyle
+            fonts to use, or None for get_default_style() in the worker
+        dpi: int
+            resolution of the image
+
+        Returns
+        -------
+        bytes
+            the PNG image
+        """
+        sim_args = (model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop)
+        plot_args = (xmin, xmax, ymin, ymax, figsize, title, xlabel, ylabel, color, style, dpi)
+
+        async def make_coroutine():
+            pops = await self.simulate(*sim_args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_process_pool(),
+                _render_bifurcation_png,
+                pops.columns.to_numpy(),
+                pops.to_numpy(),
+                *plot_args,
+            )
+
+        return await self._deduplicate(
+            ("render_bifurcation",) + sim_args + plot_args, make_coroutine
+        )
+
+    def close(self):
+        """
+        Shut down the runner's thread and process pools.
+
+        Returns
+        -------
+        None
+        """
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown()
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+
+    async def __aenter__(self):
+        """Return the runner."""
+        return self
+
+    async def __aexit__(self, *exc):
+        """Shut down the runner's pools."""
+        self.close()
+        return False
+
+
+_default_runner = None
+
+
+def get_default_runner():
+    """
+    Return the runner that asimulate and arender_bifurcation use.
+
+    The runner is created on the first call, then reused by later calls.
+
+    Returns
+    -------
+    AsyncRunner
+    """
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = AsyncRunner()
+    return _default_runner
+
+
+async def asimulate(
+    model=logistic_map,
+    num_gens=50,
+    rate_min=0.5,
+    rate_max=4,
+    num_rates=8,
+    num_discard=0,
+    initial_pop=0.5,
+):
+    """
+    Simulate the model without blocking the event loop.
+
+    This runs AsyncRunner.simulate on the default runner.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model
+
+    Returns
+    -------
+    DataFrame
+    """
+    return await get_default_runner().simulate(
+        model=model,
+        num_gens=num_gens,
+        rate_min=rate_min,
+        rate_max=rate_max,
+        num_rates=num_rates,
+        num_discard=num_discard,
+        initial_pop=initial_pop,
+    )
+
+
+async def arender_bifurcation(model=logistic_map, **kwargs):
+    """
+    Render a bifurcation diagram as a PNG without blocking the event loop.
+
+    This runs AsyncRunner.render_bifurcation on the default runner.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    kwargs: dict
+        simulation and plot arguments of AsyncRunner.render_bifurcation
+
+    Returns
+    -------
+    bytes
+        the PNG image
+    """
+    return await get_default_runner().render_bifurcation(model=model, **kwargs)
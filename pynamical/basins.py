@@ -0,0 +1,380 @@
+"""Map escape times and basins of attraction over rate and initial value grids."""
+
+import functools
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from numba import jit
+from numba import prange
+
+from .pynamical import cubic_map
+from .pynamical import get_default_style
+from .pynamical import get_jit_model
+from .pynamical import logistic_map
+from .pynamical import save_and_show
+
+__all__ = [
+    "make_jit_escape_time",
+    "escape_time",
+    "make_jit_attractor_finder",
+    "attractor_basins",
+    "basin_plot",
+]
+
+
+def _get_grid_dtype(max_value):
+    # smallest signed integer type holding every value from -1 to max_value
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_escape_time(model):
+    """
+    Create a jitted, parallel escape time function for a model.
+
+    The escape time function iterates the model from every initial population
+    at every growth rate, in parallel across rates, and writes the generation
+    at which each orbit first leaves [escape_min, escape_max] into an integer
+    grid, or -1 if it stays inside for num_gens generations. Each orbit stops
+    as soon as it escapes. Functions are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_escape_time(rates, initial_pops, num_gens, escape_min, escape_max, out):
+        for rate_num in prange(len(rates)):
+            rate = rates[rate_num]
+            for pop_num in range(len(initial_pops)):
+                pop = initial_pops[pop_num]
+                out[rate_num, pop_num] = -1
+                for gen_num in range(num_gens):
+                    if not escape_min <= pop <= escape_max:
+                        out[rate_num, pop_num] = gen_num
+                        break
+                    pop = model(pop, rate)
+        return out
+
+    return jit_escape_time
+
+
+def escape_time(
+    model=logistic_map,
+    num_gens=100,
+    rate_min=3.5,
+    rate_max=4.5,
+    num_rates=100,
+    initial_pop_min=0,
+    initial_pop_max=1,
+    num_pops=100,
+    escape_min=0,
+    escape_max=1,
+):
+    """
+    Calculate how many generations each orbit takes to escape an interval.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        maximum number of iterations to run the model from each initial value
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    initial_pop_min: float
+        the first initial population
+    initial_pop_max: float
+        the last initial population
+    num_pops: int
+        how many initial populations between min and max to run the model from
+    escape_min: float
+        lower edge of the interval the orbits escape from
+    escape_max: float
+        upper edge of the interval the orbits escape from
+
+    Returns
+    -------
+    DataFrame
+        one row for each growth rate and one column for each initial
+        population, with the first generation outside the interval, or -1 if
+        the orbit never left it, in the smallest integer type that fits
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    initial_pops = np.linspace(initial_pop_min, initial_pop_max, num_pops)
+    out = np.empty((num_rates, num_pops), dtype=_get_grid_dtype(num_gens))
+    jit_escape_time = make_jit_escape_time(model)
+    jit_escape_time(rates, initial_pops, num_gens, float(escape_min), float(escape_max), out)
+    return pd.DataFrame(
+        out, index=pd.Index(rates, name="rate"), columns=pd.Index(initial_pops, name="initial_pop")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_attractor_finder(model):
+    """
+    Create a jitted, parallel function that finds the attractor of each orbit.
+
+    The finder iterates the model from every initial population at every
+    growth rate, in parallel across rates. Each orbit stops as soon as it
+    escapes, or as soon as it comes back within tol of a reference value,
+    which is reset at generations that are powers of 2 as in Brent's cycle
+    detection, so detecting a period takes constant work per generation. It
+    writes each orbit's period into one grid, -1 if it escaped or 0 if it
+    didn't settle onto an orbit of period up to max_period within num_gens
+    generations, and the smallest value on its periodic orbit into another,
+    which identifies the orbit. Functions are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_find_attractors(
+        rates, initial_pops, num_gens, escape_min, escape_max, max_period, tol, periods, points
+    ):
+        for rate_num in prange(len(rates)):
+            rate = rates[rate_num]
+            for pop_num in range(len(initial_pops)):
+                pop = initial_pops[pop_num]
+                periods[rate_num, pop_num] = 0
+                points[rate_num, pop_num] = np.nan
+                reference = pop
+                reference_gen = 0
+                for gen_num in range(1, num_gens + 1):
+                    pop = model(pop, rate)
+                    if not escape_min <= pop <= escape_max:
+                        periods[rate_num, pop_num] = -1
+                        break
+
+                    period = gen_num - reference_gen
+                    if abs(pop - reference) <= tol and period <= max_period:
+                        # walk once around the orbit to find its smallest value
+                        point = pop
+                        for _ in range(period - 1):
+                            pop = model(pop, rate)
+                            point = min(point, pop)
+                        periods[rate_num, pop_num] = period
+                        points[rate_num, pop_num] = point
+                        break
+
+                    if gen_num & (gen_num - 1) == 0:
+                        reference = pop
+                        reference_gen = gen_num
+        return periods, points
+
+    return jit_find_attractors
+
+
+def _label_attractors(periods, points, tol):
+    # number the distinct periodic orbits found at each rate from 1, in order
+    # of period then smallest value. orbits stop about tol / (1 - multiplier)
+    # from their attractor, so points within sqrt(tol) count as the same one
+    labels = np.where(periods < 0, -1, 0).astype(_get_grid_dtype(periods.shape[1]))
+    for rate_num in range(len(periods)):
+        found = np.flatnonzero(periods[rate_num] > 0)
+        if len(found) == 0:
+            continue
+        order = found[np.lexsort((points[rate_num, found], periods[rate_num, found]))]
+        rate_periods = periods[rate_num, order]
+        rate_points = points[rate_num, order]
+        new = np.ones(len(order), dtype=bool)
+        new[1:] = (np.diff(rate_periods) != 0) | (np.diff(rate_points) > np.sqrt(tol))
+        labels[rate_num, order] = np.cumsum(new)
+    return labels
+
+
+def attractor_basins(
+    model=cubic_map,
+    num_gens=1000,
+    rate_min=1,
+    rate_max=4,
+    num_rates=100,
+    initial_pop_min=-1,
+    initial_pop_max=1,
+    num_pops=100,
+    escape_min=-1,
+    escape_max=1,
+    max_period=64,
+    tol=1e-9,
+):
+    """
+    Identify which attractor the orbit from each initial population lands on.
+
+    Within each growth rate's row, the distinct periodic orbits found are
+    numbered from 1, in order of their period and then their smallest value,
+    so cells with the same number share a basin of attraction.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        maximum number of iterations to run the model from each initial value
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    initial_pop_min: float
+        the first initial population
+    initial_pop_max: float
+        the last initial population
+    num_pops: int
+        how many initial populations between min and max to run the model from
+    escape_min: float
+        lower edge of the interval the orbits escape from
+    escape_max: float
+        upper edge of the interval the orbits escape from
+    max_period: int
+        longest period of orbit to detect
+    tol: float
+        how close an orbit must return to a previous value to count as periodic
+
+    Returns
+    -------
+    DataFrame
+        one row for each growth rate and one column for each initial
+        population, with the number of the attractor reached, -1 if the
+        orbit escaped, or 0 if it didn't settle onto a periodic orbit
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    initial_pops = np.linspace(initial_pop_min, initial_pop_max, num_pops)
+    periods = np.empty((num_rates, num_pops), dtype=_get_grid_dtype(max_period))
+    points = np.empty((num_rates, num_pops))
+    jit_find_attractors = make_jit_attractor_finder(model)
+    jit_find_attractors(
+        rates,
+        initial_pops,
+        num_gens,
+        float(escape_min),
+        float(escape_max),
+        max_period,
+        tol,
+        periods,
+        points,
+    )
+    return pd.DataFrame(
+        _label_attractors(periods, points, tol),
+        index=pd.Index(rates, name="rate"),
+        columns=pd.Index(initial_pops, name="initial_pop"),
+    )
+
+
+def basin_plot(
+    basins,
+    figsize=(10, 6),
+    title="Basins of Attraction",
+    xlabel="Growth Rate",
+    ylabel="Initial Population",
+    cmap="viridis",
+    filename="image",
+    save=True,
+    show=True,
+    title_font=None,
+    label_font=None,
+    style=None,
+    folder="images",
+    dpi=300,
+    bbox_inches="tight",
+    pad=0.1,
+):
+    """
+    Plot an escape time or attractor grid as an image.
+
+    Arguments
+    ---------
+    basins: DataFrame
+        output of escape_time or attractor_basins
+    figsize: tuple
+        (width, height) of figure
+    title: string
+        title of the plot
+    xlabel: string
+        label of the x axis
+    ylabel: string
+        label of the y axis
+    cmap: string
+        name of the matplotlib colormap for the grid values
+    filename: string
+        name of image file to be saved, if applicable
+    save: bool
+        whether to save the image to disk or not
+    show: bool
+        whether to display the image on screen or not
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    label_font: matplotlib.font_manager.FontProperties
+        font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    folder: string
+        folder in which to save the image file
+    dpi: int
+        resolution at which to save the image
+    bbox_inches: string
+        tell matplotlib to figure out the tight bbox of the figure
+    pad: float
+        inches to pad around the figure
+
+    Returns
+    -------
+    tuple
+        (fig, ax) if show=False, otherwise returns None
+    """
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts(title_font, label_font)
+
+    # rates run along the x axis and initial populations up the y axis
+    rates = basins.index.values
+    initial_pops = basins.columns.values
+    extent = (rates[0], rates[-1], initial_pops[0], initial_pops[-1])
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.imshow(
+        basins.values.T,
+        origin="lower",
+        extent=extent,
+        aspect="auto",
+        interpolation="nearest",
+        cmap=cmap,
+    )
+
+    ax.set_title(title, fontproperties=title_font)
+    ax.set_xlabel(xlabel, fontproperties=label_font)
+    ax.set_ylabel(ylabel, fontproperties=label_font)
+
+    return save_and_show(
+        fig=fig,
+        ax=ax,
+        save=save,
+        show=show,
+        filename=filename,
+        folder=folder,
+        dpi=dpi,
+        bbox_inches=bbox_inches,
+        pad=pad,
+    )
@@ -0,0 +1,287 @@
+"""Run batches of simulation and rendering jobs described by a job spec file."""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from . import pynamical
+from .expressions import model_from_expression
+from .pynamical import _simulate_defaults
+from .pynamical import bifurcation_plot
+from .pynamical import phase_diagram
+from .pynamical import phase_diagram_3d
+from .pynamical import simulate_many
+from .storage import write_pops
+
+__all__ = [
+    "load_job_spec",
+    "run_jobs",
+]
+
+# plot types a job can request, and the functions that draw them
+_plot_functions = {
+    "bifurcation": bifurcation_plot,
+    "phase": phase_diagram,
+    "phase_3d": phase_diagram_3d,
+}
+
+# data formats a job can request, and their file extensions
+_data_extensions = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather", "npz": ".npz"}
+
+# keys a job can have besides simulate's arguments
+_job_keys = {"name", "data", "plots"}
+
+
+def load_job_spec(path):
+    """
+    Load a job spec from a JSON, TOML, or YAML file.
+
+    The spec is a mapping with a "jobs" list, an optional "defaults" mapping
+    merged into every job, and an optional "output" folder. Each job has a
+    "name", any of simulate's arguments except jit, a "data" list of formats
+    to write the populations in (csv, parquet, feather, npz), and a "plots"
+    list of plot types to render (bifurcation, phase, phase_3d), each either
+    a string or a mapping with a "type" and keyword arguments for the plot
+    function. The model is the name of a bundled map, a "module:function"
+    path to any other, or an expression for model_from_expression, either
+    as a string or as a mapping with an "expression" and its "params".
+
+    Reading TOML on python < 3.11 needs tomli, and reading YAML needs PyYAML.
+
+    Arguments
+    ---------
+    path: string
+        path of the job spec file, with a .json, .toml, .yaml, or .yml
+        extension
+
+    Returns
+    -------
+    dict
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path) as f:
+            return json.load(f)
+
+    if extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("tomli is required to read TOML job specs on python < 3.11")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+
+    if extension in {".yaml", ".yml"}:
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required to read YAML job specs")
+        with open(path) as f:
+            return yaml.safe_load(f)
+
+    raise ValueError("job spec must be a .json, .toml, .yaml, or .yml file")
+
+
+def _get_model(model):
+    # resolve a bundled map's name, a "module:function" path, or an expression
+    if isinstance(model, dict):
+        return model_from_expression(model["expression"], model.get("params"))
+    if model in {"logistic_map", "cubic_map", "singer_map"}:
+        return getattr(pynamical, model)
+    if ":" in model:
+        module_name, function_name = model.split(":", 1)
+        return getattr(importlib.import_module(module_name), function_name)
+    return model_from_expression(model)
+
+
+def _parse_jobs(spec):
+    # merge the defaults into each job and check everything before running
+    if not isinstance(spec, dict) or not isinstance(spec.get("jobs"), list):
+        raise ValueError("job spec must be a mapping with a list of jobs")
+    unknown = set(spec) - {"jobs", "defaults", "output"}
+    if unknown:
+        raise ValueError(f"unknown job spec keys: {sorted(unknown)}")
+
+    jobs = []
+    names = set()
+    for job_num, job in enumerate(spec["jobs"]):
+        job = {**spec.get("defaults", {}), **job}
+        name = str(job.pop("name", f"job_{job_num}"))
+        if name in names:
+            raise ValueError(f"job name {name!r} is used more than once")
+        names.add(name)
+
+        data = job.pop("data", [])
+        for data_format in data:
+            if data_format not in _data_extensions:
+                raise ValueError(f"data format must be one of {sorted(_data_extensions)}")
+
+        plots = []
+        for plot in job.pop("plots", []):
+            plot = {"type": plot} if isinstance(plot, str) else dict(plot)
+            if plot.get("type") not in _plot_functions:
+                raise ValueError(f"plot type must be one of {sorted(_plot_functions)}")
+            plots.append(plot)
+
+        unknown = set(job) - (set(_simulate_defaults) - {"jit"}) - _job_keys
+        if unknown:
+            raise ValueError(f"unknown keys in job {name!r}: {sorted(unknown)}")
+        model = job.get("model", "logistic_map")
+        job["model"] = _get_model(model) if isinstance(model, (str, dict)) else model
+        jobs.append((name, job, data, plots))
+    return jobs
+
+
+def _render_plot(plot_type, pops, filename, folder, kwargs):
+    # runs in a worker process with its own pyplot state, and closes its
+    # figure so long batches don't pile figures up
+    start_time = time.perf_counter()
+    fig, _ = _plot_functions[plot_type](
+        pops, filename=filename, folder=folder, save=True, show=False, **kwargs
+    )
+    plt.close(fig)
+    return time.perf_counter() - start_time
+
+
+def run_jobs(spec, output=None, processes=1, max_threads=None):
+    """
+    Run every job in a job spec, writing its data files and images.
+
+    Simulations run first, together over a pool of threads, and jobs with
+    identical simulation settings share one simulation. Compiled simulators
+    are reused across jobs for the same model. Plots render in a pool of
+    spawned processes while the data files are written, and everything is
+    written to the output folder along with a timings.csv summary.
+
+    Arguments
+    ---------
+    spec: dict or string
+        the job spec, or the path of a file to load it from with
+        load_job_spec
+    output: string
+        folder to write files to, or None for the spec's output folder or
+        "output" if it has none
+    processes: int
+        number of worker processes to render plots with, rendering in this
+        process if 1
+    max_threads: int
+        number of threads to simulate with, or None for python's default
+
+    Returns
+    -------
+    DataFrame
+        one row per stage run, with the job's name, the stage, and the
+        seconds it took
+    """
+    if isinstance(spec, (str, os.PathLike)):
+        spec = load_job_spec(spec)
+    jobs = _parse_jobs(spec)
+    if output is None:
+        output = spec.get("output", "output")
+    os.makedirs(output, exist_ok=True)
+    timings = []
+
+    # simulate each distinct configuration once, filling in simulate's
+    # defaults so that jobs that only spell them out differently match
+    configs = []
+    config_nums = []
+    keys = {}
+    for _, job, _, _ in jobs:
+        config = {name: job.get(name, default) for name, default in _simulate_defaults.items()}
+        key = tuple(config.values())
+        if key not in keys:
+            keys[key] = len(configs)
+            configs.append(config)
+        config_nums.append(keys[key])
+    start_time = time.perf_counter()
+    results = simulate_many(configs, max_workers=max_threads)
+    timings.append(("", "simulate", time.perf_counter() - start_time))
+    job_pops = [results[config_num] for config_num in config_nums]
+
+    # submit the plots first so they render while the data files are written
+    pool = None
+    plot_tasks = []
+    if processes > 1 and any(plots for _, _, _, plots in jobs):
+        context = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+    try:
+        for (name, _, _, plots), pops in zip(jobs, job_pops):
+            for plot in plots:
+                kwargs = dict(plot)
+                plot_type = kwargs.pop("type")
+                args = (plot_type, pops, f"{name}_{plot_type}", output, kwargs)
+                if pool is None:
+                    plot_tasks.append((name, plot_type, _render_plot(*args)))
+                else:
+                    plot_tasks.append((name, plot_type, pool.submit(_render_plot, *args)))
+
+        for (name, _, data, _), pops in zip(jobs, job_pops):
+            for data_format in data:
+                start_time = time.perf_counter()
+                path = os.path.join(output, name + _data_extensions[data_format])
+                if data_format == "csv":
+                    pops.to_csv(path)
+                else:
+                    write_pops(pops, path, format=data_format)
+                timings.append((name, f"data:{data_format}", time.perf_counter() - start_time))
+
+        for name, plot_type, task in plot_tasks:
+            seconds = task if pool is None else task.result()
+            timings.append((name, f"plot:{plot_type}", seconds))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    timings = pd.DataFrame(timings, columns=["job", "stage", "seconds"])
+    timings.to_csv(os.path.join(output, "timings.csv"), index=False)
+    return timings
+
+
+def main(argv=None):
+    """
+    Run the pynamical command line interface.
+
+    Arguments
+    ---------
+    argv: list
+        command line arguments, or None for sys.argv[1:]
+
+    Returns
+    -------
+    int
+        exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="pynamical", description="Run the simulation and rendering jobs in a job spec file."
+    )
+    parser.add_argument("spec", help="path of a .json, .toml, .yaml, or .yml job spec")
+    parser.add_argument("-o", "--output", help="folder to write files to")
+    parser.add_argument(
+        "-p", "--processes", type=int, default=1, help="worker processes to render plots with"
+    )
+    parser.add_argument("-t", "--threads", type=int, help="worker threads to simulate with")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print the timings")
+    args = parser.parse_args(argv)
+
+    try:
+        timings = run_jobs(
+            args.spec, output=args.output, processes=args.processes, max_threads=args.threads
+        )
+    except (ImportError, OSError, ValueError) as e:
+        print(f"pynamical: error: {e}", file=sys.stderr)
+        return 1
+
+    if not args.quiet:
+        print(timings.to_string(index=False))
+    return 0
@@ -0,0 +1,547 @@
+"""Continue fixed points and periodic orbits across growth rates."""
+
+import functools
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from numba import jit
+
+from .pynamical import get_default_style
+from .pynamical import get_jit_model
+from .pynamical import get_model_derivative
+from .pynamical import logistic_map
+from .pynamical import save_and_show
+
+__all__ = [
+    "make_jit_continuation",
+    "continue_orbit",
+    "find_period_doublings",
+    "bifurcation_branches",
+    "make_jit_doubling_locator",
+    "locate_period_doublings",
+    "branch_plot",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _make_jit_orbit_multiplier(model):
+    # jitted function iterating the orbit once, returning f^p(x) and the
+    # slope of f^p at x, the product of the derivative along the orbit
+    derivative = get_model_derivative(model)
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def jit_orbit_multiplier(x, rate, period):
+        multiplier = 1.0
+        for _ in range(period):
+            multiplier *= derivative(x, rate)
+            x = model(x, rate)
+        return x, multiplier
+
+    return jit_orbit_multiplier
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_continuation(model):
+    """
+    Create jitted periodic orbit solver and continuation functions.
+
+    It receives the jitted model and derivative functions through the closure
+    local scope, like make_jit_simulator. The solver uses Newton iterations to
+    solve f^p(x) = x, where f^p is the model applied p times, and its slope is
+    the product of the model's derivative along the orbit. The continuation
+    function solves for the orbit at each rate in turn, starting Newton from
+    the previous rate's solution. Functions are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+
+    Returns
+    -------
+    tuple
+        jit_solve_orbit, jit_continue_orbit
+    """
+    jit_orbit_multiplier = _make_jit_orbit_multiplier(model)
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def jit_solve_orbit(x, rate, period, tol, max_iter):
+        converged = False
+        for _ in range(max_iter):
+            y, multiplier = jit_orbit_multiplier(x, rate, period)
+            slope = multiplier - 1
+            if slope == 0 or not np.isfinite(y):
+                break
+            step = (y - x) / slope
+            x -= step
+            if abs(step) <= tol * (1 + abs(x)):
+                converged = True
+                break
+        _, multiplier = jit_orbit_multiplier(x, rate, period)
+        return x, multiplier, converged and np.isfinite(x)
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def jit_continue_orbit(rates, period, x, tol, max_iter):
+        orbits = np.full((len(rates), period), np.nan)
+        multipliers = np.full(len(rates), np.nan)
+        converged = np.zeros(len(rates), dtype=np.bool_)
+
+        for rate_num in range(len(rates)):
+            rate = rates[rate_num]
+            x_new, multiplier, ok = jit_solve_orbit(x, rate, period, tol, max_iter)
+            if not ok:
+                continue
+
+            # keep the solution as the next rate's starting point, and lay out
+            # the whole orbit starting from it
+            x = x_new
+            multipliers[rate_num] = multiplier
+            converged[rate_num] = True
+            y = x
+            for point_num in range(period):
+                orbits[rate_num, point_num] = y
+                y = model(y, rate)
+
+        return orbits, multipliers, converged
+
+    return jit_solve_orbit, jit_continue_orbit
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_doubling_locator(model):
+    """
+    Create jitted functions that seed and bisect period doublings.
+
+    The seed function finds the orbit of period 2p that branches off an orbit
+    of period p past its doubling, with Newton iterations on f^2p(x) = x
+    deflated by the old orbit point, so they can't converge back onto it. The
+    bisection function halves a bracket of rates, where the orbit is stable at
+    the low end and not at the high end, until it is narrower than rate_tol.
+    Functions are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+
+    Returns
+    -------
+    tuple
+        jit_seed_orbit, jit_bisect_doubling
+    """
+    jit_orbit_multiplier = _make_jit_orbit_multiplier(model)
+    jit_solve_orbit, _ = make_jit_continuation(model)
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def jit_deflated_newton(x_old, x, rate, period, tol, max_iter):
+        # newton on (f^p(x) - x) / (x - x_old), which has no root at x_old
+        for _ in range(max_iter):
+            y, multiplier = jit_orbit_multiplier(x, rate, period)
+            distance = x - x_old
+            denominator = (multiplier - 1) * distance - (y - x)
+            if denominator == 0 or not np.isfinite(y):
+                break
+            step = (y - x) * distance / denominator
+            x -= step
+            if abs(step) <= tol * (1 + abs(x)):
+                break
+        return jit_solve_orbit(x, rate, period, tol, max_iter)
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def jit_seed_orbit(x_old, rate, period, offset, tol, max_iter):
+        # the new orbit is born stable, so shrink the starting offset from the
+        # old orbit point until newton lands on a stable orbit
+        for _ in range(8):
+            for sign in (1, -1):
+                x, multiplier, converged = jit_deflated_newton(
+                    x_old, x_old + sign * offset, rate, period, tol, max_iter
+                )
+                if converged and abs(multiplier) < 1:
+                    return x, multiplier, converged
+            offset /= 4
+        return x_old, np.nan, False
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def jit_bisect_doubling(rate_lo, x_lo, rate_hi, period, tol, max_iter, rate_tol):
+        while rate_hi - rate_lo > rate_tol * (1 + abs(rate_lo)):
+            rate = (rate_lo + rate_hi) / 2
+            if rate <= rate_lo or rate >= rate_hi:
+                break
+            x, multiplier, converged = jit_solve_orbit(x_lo, rate, period, tol, max_iter)
+            if converged and multiplier > -1:
+                rate_lo = rate
+                x_lo = x
+            else:
+                rate_hi = rate
+        return (rate_lo + rate_hi) / 2, x_lo
+
+    return jit_seed_orbit, jit_bisect_doubling
+
+
+def _branch_frame(rates, orbits, multipliers, converged):
+    # one column per orbit point, plus the multiplier and stability
+    df = pd.DataFrame(orbits, index=pd.Index(rates, name="rate"))
+    df["multiplier"] = multipliers
+    df["stable"] = converged & (np.abs(multipliers) < 1)
+    df["converged"] = converged
+    return df
+
+
+def continue_orbit(
+    model=logistic_map,
+    period=1,
+    rate_min=0.5,
+    rate_max=4,
+    num_rates=1000,
+    initial_pop=0.5,
+    tol=1e-12,
+    max_iter=50,
+):
+    """
+    Track a periodic orbit of the model across a grid of growth rates.
+
+    Newton's method solves f^p(x) = x at the first rate starting from
+    initial_pop, then at each later rate starting from the previous rate's
+    solution, so the same branch is followed whether it is stable or not.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+    period: int
+        period of the orbit, 1 for a fixed point
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to track the orbit at
+    initial_pop: float
+        starting guess for a point on the orbit at the first rate
+    tol: float
+        relative size of the last Newton step at which the solution converged
+    max_iter: int
+        maximum number of Newton iterations per rate
+
+    Returns
+    -------
+    DataFrame
+        one row per rate, with one column per orbit point, then the orbit's
+        stability multiplier, whether it is stable, and whether Newton's
+        method converged
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    _, jit_continue_orbit = make_jit_continuation(model)
+    orbits, multipliers, converged = jit_continue_orbit(
+        rates, period, float(initial_pop), tol, max_iter
+    )
+    return _branch_frame(rates, orbits, multipliers, converged)
+
+
+def find_period_doublings(branch):
+    """
+    Find where a branch's multiplier crosses -1, where its period doubles.
+
+    Arguments
+    ---------
+    branch: DataFrame
+        output of continue_orbit or one value of bifurcation_branches
+
+    Returns
+    -------
+    list
+        growth rates of the period doublings, linearly interpolated between
+        the neighboring rates of the grid
+    """
+    rates = branch.index.values
+    margin = branch["multiplier"].values + 1
+    crossings = np.flatnonzero((margin[:-1] > 0) & (margin[1:] <= 0))
+    return [
+        rates[i] + (rates[i + 1] - rates[i]) * margin[i] / (margin[i] - margin[i + 1])
+        for i in crossings
+    ]
+
+
+def bifurcation_branches(
+    model=logistic_map,
+    rate_min=2.5,
+    rate_max=3.6,
+    num_rates=2000,
+    max_period=16,
+    initial_pop=0.5,
+    num_seed=10000,
+    tol=1e-12,
+    max_iter=50,
+):
+    """
+    Follow the period-doubling cascade of the model across growth rates.
+
+    The fixed point is continued across the whole rate grid. Wherever a
+    branch of period p doubles, its stable orbit of period 2p is found just
+    past the doubling by iterating the model num_seed times from the branch,
+    then continued from there to rate_max. This gives exact stable and
+    unstable branches without simulating thousands of generations per rate.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to track the orbits at
+    max_period: int
+        largest period to follow
+    initial_pop: float
+        starting guess for the fixed point at the first rate
+    num_seed: int
+        number of times to iterate the model to settle onto each new orbit
+    tol: float
+        relative size of the last Newton step at which the solution converged
+    max_iter: int
+        maximum number of Newton iterations per rate
+
+    Returns
+    -------
+    dict
+        keys are periods and values are DataFrames like continue_orbit's,
+        covering the rates past the period doubling that created them
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    _, jit_continue_orbit = make_jit_continuation(model)
+    scalar_model = get_jit_model(model)
+
+    branches = {}
+    period = 1
+    start = 0
+    x = float(initial_pop)
+    while period <= max_period and start < num_rates:
+        orbits, multipliers, converged = jit_continue_orbit(rates[start:], period, x, tol, max_iter)
+        branch = _branch_frame(rates[start:], orbits, multipliers, converged)
+        branches[period] = branch
+
+        doublings = np.flatnonzero(
+            (multipliers[:-1] + 1 > 0) & (multipliers[1:] + 1 <= 0) & converged[1:]
+        )
+        if len(doublings) == 0:
+            break
+
+        # settle onto the new stable orbit just past the period doubling
+        start += doublings[0] + 1
+        rate = rates[start]
+        x = orbits[doublings[0] + 1, 0] + 1e-3
+        for _ in range(num_seed):
+            x = scalar_model(x, rate)
+        period *= 2
+
+    return branches
+
+
+def locate_period_doublings(
+    model=logistic_map,
+    num_doublings=10,
+    rate_min=2.5,
+    rate_max=4,
+    num_scan=200,
+    initial_pop=0.5,
+    tol=1e-13,
+    max_iter=100,
+    rate_tol=1e-15,
+):
+    """
+    Locate the successive period doublings of the model to high precision.
+
+    The fixed point is continued across a coarse grid of num_scan rates to
+    bracket the rate where its multiplier crosses -1, then the bracket is
+    bisected to within rate_tol. Each new orbit of twice the period is then
+    seeded just past the doubling and scanned the same way, over a range as
+    wide as the previous gap between doublings, since the gaps shrink. The
+    ratios of successive gaps converge to Feigenbaum's delta for maps with a
+    quadratic maximum.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+    num_doublings: int
+        maximum number of period doublings to locate
+    rate_min: float
+        the first growth rate to scan for the first doubling
+    rate_max: float
+        the last growth rate to scan for the first and second doublings
+    num_scan: int
+        how many growth rates to scan to bracket each doubling
+    initial_pop: float
+        starting guess for the fixed point at rate_min
+    tol: float
+        relative size of the last Newton step at which an orbit converged
+    max_iter: int
+        maximum number of Newton iterations per rate
+    rate_tol: float
+        relative width of the bracket at which bisection stops
+
+    Returns
+    -------
+    DataFrame
+        one row per doubling with the period of the orbit losing stability,
+        the rate at which it does, and the ratio of the previous gap between
+        doublings to this one
+    """
+    jit_solve_orbit, jit_continue_orbit = make_jit_continuation(model)
+    jit_seed_orbit, jit_bisect_doubling = make_jit_doubling_locator(model)
+
+    period = 1
+    rates = np.linspace(rate_min, rate_max, num_scan)
+    x = float(initial_pop)
+    doublings = []
+    while len(doublings) < num_doublings:
+        orbits, multipliers, converged = jit_continue_orbit(rates, period, x, tol, max_iter)
+
+        # bracket the first rate where the stable orbit loses stability
+        stable = converged & (multipliers > -1)
+        crossings = np.flatnonzero(stable[:-1] & ~stable[1:])
+        if len(crossings) == 0:
+            break
+        i = crossings[0]
+        rate, x = jit_bisect_doubling(
+            rates[i], orbits[i, 0], rates[i + 1], period, tol, max_iter, rate_tol
+        )
+        doublings.append((period, rate))
+
+        # seed the orbit of twice the period just past the doubling, then scan
+        # ahead as far as the last gap, or to rate_max for the second doubling
+        gap = rate - doublings[-2][1] if len(doublings) > 1 else rate_max - rate
+        rates = np.linspace(rate, rate + gap, num_scan + 1)[1:]
+        x_old, _, _ = jit_solve_orbit(x, rates[0], period, tol, max_iter)
+        offset = np.sqrt(rates[0] - rate)
+        x, _, ok = jit_seed_orbit(x_old, rates[0], 2 * period, offset, tol, max_iter)
+        if not ok:
+            break
+        period *= 2
+
+    df = pd.DataFrame(doublings, columns=["period", "rate"])
+    gaps = df["rate"].diff()
+    df["ratio"] = gaps.shift(1) / gaps
+    return df
+
+
+def branch_plot(
+    branches,
+    xmin=None,
+    xmax=None,
+    ymin=0,
+    ymax=1,
+    figsize=(10, 6),
+    title="Bifurcation Branches",
+    xlabel="Growth Rate",
+    ylabel="Population",
+    color="#003399",
+    unstable_color="#cc0000",
+    linewidth=1,
+    filename="image",
+    save=True,
+    show=True,
+    title_font=None,
+    label_font=None,
+    style=None,
+    folder="images",
+    dpi=300,
+    bbox_inches="tight",
+    pad=0.1,
+):
+    """
+    Plot continued orbits, with stable branches solid and unstable dashed.
+
+    Arguments
+    ---------
+    branches: dict or DataFrame
+        output of bifurcation_branches or continue_orbit
+    xmin: float
+        minimum value on the x axis, or None for the first rate
+    xmax: float
+        maximum value on the x axis, or None for the last rate
+    ymin: float
+        minimum value on the y axis
+    ymax: float
+        maximum value on the y axis
+    figsize: tuple
+        (width, height) of figure
+    title: string
+        title of the plot
+    xlabel: string
+        label of the x axis
+    ylabel: string
+        label of the y axis
+    color: string
+        color of the stable branches
+    unstable_color: string
+        color of the unstable branches
+    linewidth: float
+        width of the branch lines
+    filename: string
+        name of image file to be saved, if applicable
+    save: bool
+        whether to save the image to disk or not
+    show: bool
+        whether to display the image on screen or not
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    label_font: matplotlib.font_manager.FontProperties
+        font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    folder: string
+        folder in which to save the image file
+    dpi: int
+        resolution at which to save the image
+    bbox_inches: string
+        tell matplotlib to figure out the tight bbox of the figure
+    pad: float
+        inches to pad around the figure
+
+    Returns
+    -------
+    tuple
+        (fig, ax) if show=False, otherwise returns None
+    """
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts(title_font, label_font)
+
+    if isinstance(branches, pd.DataFrame):
+        branches = {len(branches.columns) - 3: branches}
+
+    fig, ax = plt.subplots(figsize=figsize)
+    for period, branch in branches.items():
+        stable = branch["stable"].values
+        rates = branch.index.values
+        for point_num in range(period):
+            points = branch[point_num].values
+            ax.plot(rates, np.where(stable, points, np.nan), c=color, lw=linewidth)
+            ax.plot(
+                rates, np.where(stable, np.nan, points), c=unstable_color, lw=linewidth, ls="--"
+            )
+
+    rates = np.concatenate([branch.index.values for branch in branches.values()])
+    ax.set_xlim(rates.min() if xmin is None else xmin, rates.max() if xmax is None else xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_title(title, fontproperties=title_font)
+    ax.set_xlabel(xlabel, fontproperties=label_font)
+    ax.set_ylabel(ylabel, fontproperties=label_font)
+
+    return save_and_show(
+        fig=fig,
+        ax=ax,
+        save=save,
+        show=show,
+        filename=filename,
+        folder=folder,
+        dpi=dpi,
+        bbox_inches=bbox_inches,
+        pad=pad,
+    )
@@ -0,0 +1,282 @@
+"""Compile models from arithmetic expression strings."""
+
+import ast
+import functools
+import math
+
+from numba import jit
+from numba import vectorize
+
+from .pynamical import _model_ufuncs
+from .pynamical import _ufunc_models
+from .pynamical import _ufunc_signatures
+from .pynamical import set_model_derivative
+
+__all__ = [
+    "parse_expression",
+    "differentiate_expression",
+    "model_from_expression",
+]
+
+# names an expression can call, and the math functions they compile to
+_functions = {
+    "abs": abs,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "arctan": math.atan,
+    "min": min,
+    "max": max,
+}
+
+# names of constants an expression can use
+_constants = {"pi": math.pi, "e": math.e}
+
+_binary_operators = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_unary_operators = (ast.UAdd, ast.USub)
+
+# the expression and parameters each compiled model came from, so other
+# engines can compile their own versions of it
+_model_expressions = {}
+
+
+def _check_node(node, names):
+    # walk the tree, allowing only arithmetic on numbers and known names
+    if isinstance(node, ast.Expression):
+        _check_node(node.body, names)
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, _binary_operators):
+        _check_node(node.left, names)
+        _check_node(node.right, names)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _unary_operators):
+        _check_node(node.operand, names)
+    elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        pass
+    elif isinstance(node, ast.Name):
+        if node.id not in names:
+            raise ValueError(f"unknown name {node.id!r} in expression")
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        if node.func.id not in _functions:
+            raise ValueError(f"unknown function {node.func.id!r} in expression")
+        if node.keywords or not node.args:
+            raise ValueError(f"{node.func.id} takes positional arguments only")
+        for arg in node.args:
+            _check_node(arg, names)
+    else:
+        raise ValueError(f"{type(node).__name__} is not allowed in expressions")
+
+
+def parse_expression(expression, params=()):
+    """
+    Parse an arithmetic expression, checking that it is safe to compile.
+
+    Expressions can use numbers, +, -, *, /, and **, the names pop and rate,
+    the constants pi and e, the names of any extra parameters, and the
+    functions abs, sqrt, exp, log, sin, cos, tan, sinh, cosh, tanh, arctan,
+    min, and max. Anything else, like attribute access, is rejected.
+
+    Arguments
+    ---------
+    expression: string
+        the expression, like "rate * pop * (1 - pop)"
+    params: iterable
+        names of extra parameters the expression can use
+
+    Returns
+    -------
+    ast.Expression
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"invalid expression {expression!r}: {e.msg}")
+    _check_node(tree, {"pop", "rate"} | set(_constants) | set(params))
+    return tree
+
+
+def _is_number(source, value):
+    try:
+        return float(source) == value
+    except ValueError:
+        return False
+
+
+def _add(a, b):
+    if _is_number(a, 0):
+        return b
+    if _is_number(b, 0):
+        return a
+    return f"({a} + {b})"
+
+
+def _sub(a, b):
+    if _is_number(b, 0):
+        return a
+    if _is_number(a, 0):
+        return f"(-{b})"
+    return f"({a} - {b})"
+
+
+def _mul(a, b):
+    if _is_number(a, 0) or _is_number(b, 0):
+        return "0"
+    if _is_number(a, 1):
+        return b
+    if _is_number(b, 1):
+        return a
+    return f"({a} * {b})"
+
+
+def _div(a, b):
+    if _is_number(a, 0):
+        return "0"
+    if _is_number(b, 1):
+        return a
+    return f"({a} / {b})"
+
+
+def _derivative(node, source):
+    # return the source of the derivative of node with respect to pop, using
+    # source segments rather than ast.unparse, which needs python 3.9
+    if isinstance(node, ast.Constant):
+        return "0"
+    if isinstance(node, ast.Name):
+        return "1" if node.id == "pop" else "0"
+
+    if isinstance(node, ast.UnaryOp):
+        du = _derivative(node.operand, source)
+        return du if isinstance(node.op, ast.UAdd) else _sub("0", du)
+
+    if isinstance(node, ast.BinOp):
+        u = ast.get_source_segment(source, node.left)
+        v = ast.get_source_segment(source, node.right)
+        du, dv = _derivative(node.left, source), _derivative(node.right, source)
+        if isinstance(node.op, ast.Add):
+            return _add(du, dv)
+        if isinstance(node.op, ast.Sub):
+            return _sub(du, dv)
+        if isinstance(node.op, ast.Mult):
+            return _add(_mul(du, f"({v})"), _mul(f"({u})", dv))
+        if isinstance(node.op, ast.Div):
+            return _div(_sub(_mul(du, f"({v})"), _mul(f"({u})", dv)), f"({v}) ** 2")
+        if _is_number(dv, 0):
+            # power rule when the exponent doesn't depend on pop
+            return _mul(_mul(f"({v})", f"({u}) ** (({v}) - 1)"), du)
+        return _mul(
+            f"({u}) ** ({v})", _add(_mul(dv, f"log({u})"), _mul(f"({v})", _div(du, f"({u})")))
+        )
+
+    # the only other allowed nodes are calls of one of _functions
+    name = node.func.id
+    if len(node.args) != 1 or name in ("min", "max"):
+        raise ValueError(f"can't differentiate {name} with respect to pop")
+    u = f"({ast.get_source_segment(source, node.args[0])})"
+    du = _derivative(node.args[0], source)
+    outer = {
+        "abs": f"({u} / abs({u}))",
+        "sqrt": f"(0.5 / sqrt({u}))",
+        "exp": f"exp({u})",
+        "log": f"(1 / {u})",
+        "sin": f"cos({u})",
+        "cos": f"(-sin({u}))",
+        "tan": f"(1 / cos({u}) ** 2)",
+        "sinh": f"cosh({u})",
+        "cosh": f"sinh({u})",
+        "tanh": f"(1 - tanh({u}) ** 2)",
+        "arctan": f"(1 / (1 + {u} ** 2))",
+    }[name]
+    return _mul(outer, du)
+
+
+def differentiate_expression(expression, params=()):
+    """
+    Differentiate an arithmetic expression with respect to pop.
+
+    Arguments
+    ---------
+    expression: string
+        the expression, as accepted by parse_expression
+    params: iterable
+        names of extra parameters the expression can use
+
+    Returns
+    -------
+    string
+        an expression for the derivative, using the same names
+    """
+    expression = expression.strip()
+    tree = parse_expression(expression, params)
+    return _derivative(tree.body, expression)
+
+
+def _compile_function(tree, namespace):
+    # define a (pop, rate) function returning a checked expression's tree,
+    # compiling the tree itself so no source text is ever executed
+    module = ast.parse("def expression_model(pop, rate):\n    return 0\n")
+    module.body[0].body[0].value = tree.body
+    ast.fix_missing_locations(module)
+    namespace = dict(namespace)
+    exec(compile(module, "<expression>", "exec"), namespace)
+    return jit(nopython=True)(namespace["expression_model"])
+
+
+@functools.lru_cache(maxsize=None)
+def _make_expression_model(expression, params):
+    namespace = {**_functions, **_constants, **dict(params)}
+    tree = parse_expression(expression, dict(params))
+    model = _compile_function(tree, namespace)
+
+    @vectorize(_ufunc_signatures)  # pragma: no cover
+    def model_ufunc(pop, rate):
+        return model(pop, rate)
+
+    _model_ufuncs[model] = model_ufunc
+    _ufunc_models[model_ufunc] = model
+    _model_expressions[model] = (expression, dict(params))
+
+    # models with min or max, which have kinks, fall back to finite differences
+    try:
+        derivative = parse_expression(_derivative(tree.body, expression), dict(params))
+    except ValueError:
+        pass
+    else:
+        set_model_derivative(model, _compile_function(derivative, namespace))
+    return model
+
+
+def model_from_expression(expression, params=None):
+    """
+    Compile a model from an arithmetic expression in pop and rate.
+
+    The model is a jitted scalar function of (pop, rate), so it runs on the
+    compiled path of simulate and every other function that takes a model.
+    Its ufunc version, returned by get_model_ufunc, and its exact derivative,
+    returned by get_model_derivative, are compiled along with it. Models are
+    cached, so compiling the same expression and parameters again returns
+    the same model.
+
+    Arguments
+    ---------
+    expression: string
+        the map's next population, like "rate * pop * (1 - pop)", using the
+        names and functions accepted by parse_expression
+    params: dict
+        values of extra parameters the expression uses by name, which are
+        compiled in as constants
+
+    Returns
+    -------
+    function
+    """
+    params = {} if params is None else params
+    reserved = {"pop", "rate"} | set(_functions) | set(_constants)
+    for name in params:
+        if not name.isidentifier() or name in reserved:
+            raise ValueError(f"invalid parameter name {name!r}")
+    params = tuple(sorted((name, float(value)) for name, value in params.items()))
+    return _make_expression_model(expression.strip(), params)
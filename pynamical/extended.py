@@ -0,0 +1,326 @@
+"""Simulate deep zooms with compiled double-double arithmetic."""
+
+import ast
+import functools
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+from numba import jit
+from numba import prange
+
+from .expressions import _model_expressions
+from .expressions import parse_expression
+from .pynamical import cubic_map
+from .pynamical import get_scalar_model
+from .pynamical import logistic_map
+from .pynamical import singer_map
+
+__all__ = [
+    "to_double_double",
+    "get_double_double_model",
+    "make_jit_double_double_simulator",
+    "simulate_double_double",
+]
+
+# a double-double is a (hi, lo) tuple of floats whose unevaluated sum carries
+# about 32 significant digits. These kernels rely on exactly rounded float
+# operations, so they must never be compiled with fastmath
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _two_sum(a, b):
+    # a + b as a float and its exact rounding error
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _quick_two_sum(a, b):
+    # like _two_sum, but only if abs(a) >= abs(b)
+    s = a + b
+    return s, b - (s - a)
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _split(a):
+    # split a float into two halves of 26 bits each, so their products are
+    # exact (dekker's algorithm, since numba has no fused multiply-add)
+    t = 134217729.0 * a
+    hi = t - (t - a)
+    return hi, a - hi
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _two_prod(a, b):
+    # a * b as a float and its exact rounding error
+    p = a * b
+    a_hi, a_lo = _split(a)
+    b_hi, b_lo = _split(b)
+    return p, ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _dd_add(x, y):
+    s, e = _two_sum(x[0], y[0])
+    t, f = _two_sum(x[1], y[1])
+    s, e = _quick_two_sum(s, e + t)
+    return _quick_two_sum(s, e + f)
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _dd_neg(x):
+    return -x[0], -x[1]
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _dd_sub(x, y):
+    return _dd_add(x, (-y[0], -y[1]))
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _dd_mul(x, y):
+    p, e = _two_prod(x[0], y[0])
+    return _quick_two_sum(p, e + (x[0] * y[1] + x[1] * y[0]))
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _dd_div(x, y):
+    # long division, refining the quotient with three float divisions
+    q1 = x[0] / y[0]
+    r = _dd_sub(x, _dd_mul(y, (q1, 0.0)))
+    q2 = r[0] / y[0]
+    r = _dd_sub(r, _dd_mul(y, (q2, 0.0)))
+    q3 = r[0] / y[0]
+    return _dd_add(_quick_two_sum(q1, q2), (q3, 0.0))
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _dd_pow(x, n):
+    # x ** n for an integer n >= 0 by repeated squaring
+    result = (1.0, 0.0)
+    while n > 0:
+        if n & 1:
+            result = _dd_mul(result, x)
+        x = _dd_mul(x, x)
+        n >>= 1
+    return result
+
+
+def to_double_double(value):
+    """
+    Convert a number to the nearest double-double.
+
+    Pass decimal strings to keep digits beyond float64's 16 or so, since a
+    float argument is already rounded to float64.
+
+    Arguments
+    ---------
+    value: float, int, string, or fractions.Fraction
+        the number to convert
+
+    Returns
+    -------
+    tuple
+        (hi, lo) floats whose sum is the number to about 32 digits
+    """
+    value = Fraction(value)
+    hi = float(value)
+    return hi, float(value - Fraction(hi))
+
+
+# double-double values of the constants expressions can use
+_dd_constants = {
+    "pi": to_double_double("3.14159265358979323846264338327950288"),
+    "e": to_double_double("2.71828182845904523536028747135266250"),
+}
+
+# the bundled maps as expressions, with the exact decimal coefficients
+_bundled_expressions = {
+    logistic_map: "pop * rate * (1 - pop)",
+    cubic_map: "rate * pop ** 3 + pop * (1 - rate)",
+    singer_map: "rate * (7.86 * pop - 23.31 * pop ** 2 + 28.75 * pop ** 3 - 13.3 * pop ** 4)",
+}
+
+
+def _call(name, *args):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=list(args), keywords=[])
+
+
+def _translate(node, source):
+    # rewrite a checked expression's tree into calls of the double-double
+    # operations on (hi, lo) tuples
+    if isinstance(node, ast.Constant):
+        hi, lo = to_double_double(ast.get_source_segment(source, node))
+        return ast.Tuple(elts=[ast.Constant(hi), ast.Constant(lo)], ctx=ast.Load())
+    if isinstance(node, ast.Name):
+        return ast.Name(id=node.id, ctx=ast.Load())
+    if isinstance(node, ast.UnaryOp):
+        operand = _translate(node.operand, source)
+        return operand if isinstance(node.op, ast.UAdd) else _call("_dd_neg", operand)
+    if isinstance(node, ast.BinOp):
+        left = _translate(node.left, source)
+        if isinstance(node.op, ast.Pow):
+            exponent = node.right
+            if not (isinstance(exponent, ast.Constant) and type(exponent.value) is int):
+                raise ValueError("double-double powers need a non-negative integer exponent")
+            if exponent.value < 0:
+                raise ValueError("double-double powers need a non-negative integer exponent")
+            return _call("_dd_pow", left, ast.Constant(exponent.value))
+        operation = {ast.Add: "_dd_add", ast.Sub: "_dd_sub", ast.Mult: "_dd_mul"}
+        name = operation.get(type(node.op), "_dd_div")
+        return _call(name, left, _translate(node.right, source))
+    raise ValueError(f"{node.func.id} can't be evaluated in double-double precision")
+
+
+@functools.lru_cache(maxsize=None)
+def get_double_double_model(model):
+    """
+    Return a double-double version of a model, compiling it if needed.
+
+    Double-double versions exist for the bundled maps and for models created
+    by model_from_expression from arithmetic with integer powers, but not
+    for other functions, like sin, which would need their own double-double
+    implementations. The model takes and returns (hi, lo) tuples.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map, or its ufunc version
+
+    Returns
+    -------
+    function
+    """
+    model = get_scalar_model(model)
+    if model in _bundled_expressions:
+        expression, params = _bundled_expressions[model], {}
+    elif model in _model_expressions:
+        expression, params = _model_expressions[model]
+    else:
+        raise ValueError("only bundled maps and model_from_expression models have double-doubles")
+
+    tree = parse_expression(expression, params)
+    module = ast.parse("def double_double_model(pop, rate):\n    return 0\n")
+    module.body[0].body[0].value = _translate(tree.body, expression)
+    ast.fix_missing_locations(module)
+    namespace = {
+        "_dd_add": _dd_add,
+        "_dd_sub": _dd_sub,
+        "_dd_mul": _dd_mul,
+        "_dd_div": _dd_div,
+        "_dd_neg": _dd_neg,
+        "_dd_pow": _dd_pow,
+        **_dd_constants,
+        **{name: (float(value), 0.0) for name, value in params.items()},
+    }
+    exec(compile(module, "<double-double model>", "exec"), namespace)
+    return jit(nopython=True)(namespace["double_double_model"])
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_double_double_simulator(model):
+    """
+    Create a jitted, parallel simulator that iterates in double-double.
+
+    Each rate is rate_min + rate_num * rate_step, computed in double-double,
+    so even windows far narrower than float64's spacing get distinct rates,
+    and each orbit is iterated in double-double too. Rates are simulated in
+    parallel. Simulators are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    dd_model = get_double_double_model(model)
+
+    @jit(nopython=True, nogil=True, parallel=True)  # pragma: no cover
+    def jit_double_double_simulator(
+        rate_min, rate_step, num_discard, initial_pop, pops, rate_offsets
+    ):
+        num_gens, num_rates = pops.shape
+        for rate_num in prange(num_rates):
+            offset = _dd_mul(rate_step, (float(rate_num), 0.0))
+            rate = _dd_add(rate_min, offset)
+            rate_offsets[rate_num] = offset[0] + offset[1]
+            pop = initial_pop
+
+            # first run it num_discard times and ignore the results
+            for _ in range(num_discard):
+                pop = dd_model(pop, rate)
+
+            # now that those gens are discarded, run it num_gens times
+            for gen_num in range(num_gens):
+                pops[gen_num, rate_num] = pop[0] + pop[1]
+                pop = dd_model(pop, rate)
+        return pops
+
+    return jit_double_double_simulator
+
+
+def simulate_double_double(
+    model=logistic_map,
+    num_gens=50,
+    rate_min=0.5,
+    rate_max=4,
+    num_rates=8,
+    num_discard=0,
+    initial_pop=0.5,
+    relative_rates=False,
+):
+    """
+    Simulate the model in double-double precision, for deep zooms.
+
+    float64 rates only have about 16 significant digits, so a window of
+    rates 1e-12 wide holds only a few thousand distinct ones, and orbits
+    lose the differences between them. This carries about 32 digits through
+    the rates and orbits instead, then rounds the populations to float64.
+
+    Arguments
+    ---------
+    model: function
+        a bundled map or a model created by model_from_expression
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float or string
+        the first growth rate for the model, as a decimal string to give it
+        more digits than a float holds
+    rate_max: float or string
+        the last growth rate for the model, likewise
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float or string
+        starting population when you run the model
+    relative_rates: bool
+        if True, label the columns with each rate minus rate_min, which
+        float64 holds exactly enough to tell deep zoom rates apart
+
+    Returns
+    -------
+    DataFrame
+        one column for each growth rate and one row for each generation,
+        like simulate's output
+    """
+    rate_min = Fraction(rate_min)
+    rate_step = (Fraction(rate_max) - rate_min) / max(num_rates - 1, 1)
+    pops = np.empty((num_gens, num_rates))
+    rate_offsets = np.empty(num_rates)
+    jit_double_double_simulator = make_jit_double_double_simulator(model)
+    jit_double_double_simulator(
+        to_double_double(rate_min),
+        to_double_double(rate_step),
+        num_discard,
+        to_double_double(initial_pop),
+        pops,
+        rate_offsets,
+    )
+    rates = rate_offsets if relative_rates else float(rate_min) + rate_offsets
+    return pd.DataFrame(pops, columns=rates)
@@ -0,0 +1,475 @@
+"""Plot objects that update their artists in place for interactive use."""
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .pynamical import get_cobweb_points
+from .pynamical import get_default_style
+from .pynamical import get_function_points
+from .pynamical import get_phase_colors
+from .pynamical import logistic_map
+from .pynamical import save_fig
+
+__all__ = ["LivePlot", "BifurcationPlot", "PhaseDiagramPlot", "CobwebPlot"]
+
+
+class LivePlot:
+    """
+    Base class for plots that keep their figure and artists between updates.
+
+    Subclasses create their artists once, then each call to update swaps the
+    artists' data and redraws only the artists that changed. If the canvas is
+    interactive and supports blitting, the static background is cached and
+    restored instead of redrawing the whole figure. Static canvases, such as
+    the inline backend in Jupyter, redraw the whole figure.
+
+    Arguments
+    ---------
+    fig: matplotlib figure
+    ax: matplotlib axis
+    blit: bool
+        whether to blit only the changed artists when the canvas supports it
+    """
+
+    def __init__(self, fig, ax, blit=True):
+        self.fig = fig
+        self.ax = ax
+        self._artists = []
+
+        # a plain Agg canvas only renders static images, and animated artists
+        # would be left out of them
+        canvas = fig.canvas
+        self.blit = blit and canvas.supports_blit and type(canvas) is not FigureCanvasAgg
+        self._background = None
+        fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # a full draw happened, so cache the new background without the
+        # animated artists for the next blit
+        if self.blit:
+            self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def redraw(self, artists):
+        """
+        Redraw only the given artists if possible, otherwise the whole figure.
+
+        Arguments
+        ---------
+        artists: list
+            the matplotlib artists whose data changed
+
+        Returns
+        -------
+        None
+        """
+        canvas = self.fig.canvas
+        if self.blit and self._background is not None:
+            canvas.restore_region(self._background)
+            for artist in artists:
+                self.ax.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+            canvas.flush_events()
+        else:
+            canvas.draw_idle()
+
+    def _animate(self, artists):
+        # artists drawn by blitting must be left out of the full draw so they
+        # don't end up in the cached background
+        self._artists = [artist for artist in self._artists if artist.axes is not None]
+        self._artists.extend(artists)
+        for artist in artists:
+            artist.set_animated(self.blit)
+
+    def save(self, filename="image", folder="images", dpi=300, bbox_inches="tight", pad=0.1):
+        """
+        Save the figure, including its blitted artists, as a file to disk.
+
+        Arguments
+        ---------
+        filename: string
+            filename of image file to be saved
+        folder: string
+            folder in which to save the image file
+        dpi: int
+            resolution at which to save the image
+        bbox_inches: string
+            tell matplotlib to figure out the tight bbox of the figure
+        pad: float
+            inches to pad around the figure
+
+        Returns
+        -------
+        None
+        """
+        for artist in self._artists:
+            artist.set_animated(False)
+        try:
+            save_fig(
+                filename=filename,
+                folder=folder,
+                dpi=dpi,
+                bbox_inches=bbox_inches,
+                pad=pad,
+                fig=self.fig,
+            )
+        finally:
+            for artist in self._artists:
+                artist.set_animated(self.blit)
+
+
+def _get_bifurcation_offsets(pops):
+    # one (rate, pop) point per value, laid out column by column
+    values = np.asarray(pops.values, dtype=np.float64)
+    x = np.repeat(np.asarray(pops.columns, dtype=np.float64), values.shape[0])
+    return np.column_stack([x, values.T.ravel()])
+
+
+class BifurcationPlot(LivePlot):
+    """
+    Bifurcation diagram that can be updated with new model output.
+
+    Arguments
+    ---------
+    pops: DataFrame
+        population data output from the model
+    xmin: float
+        minimum value on the x axis
+    xmax: float
+        maximum value on the x axis
+    ymin: float
+        minimum value on the y axis
+    ymax: float
+        maximum value on the y axis
+    figsize: tuple
+        (width, height) of figure
+    title: string
+        title of the plot
+    xlabel: string
+        label of the x axis
+    ylabel: string
+        label of the y axis
+    color: string
+        color of the points in the scatter plot
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    label_font: matplotlib.font_manager.FontProperties
+        font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    blit: bool
+        whether to blit only the changed artists when the canvas supports it
+    """
+
+    def __init__(
+        self,
+        pops,
+        xmin=0,
+        xmax=4,
+        ymin=0,
+        ymax=1,
+        figsize=(10, 6),
+        title="Bifurcation Diagram",
+        xlabel="Growth Rate",
+        ylabel="Population",
+        color="#003399",
+        title_font=None,
+        label_font=None,
+        style=None,
+        blit=True,
+    ):
+        if style is None:
+            style = get_default_style()
+        title_font, label_font = style.get_fonts(title_font, label_font)
+
+        fig, ax = plt.subplots(figsize=figsize)
+        super().__init__(fig, ax, blit=blit)
+
+        self.points = ax.scatter(
+            *_get_bifurcation_offsets(pops).T, c=color, edgecolor="None", alpha=1, s=1
+        )
+        self._animate([self.points])
+
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        ax.set_title(title, fontproperties=title_font)
+        ax.set_xlabel(xlabel, fontproperties=label_font)
+        ax.set_ylabel(ylabel, fontproperties=label_font)
+
+    def update(self, pops):
+        """
+        Replace the plotted points with new model output.
+
+        Arguments
+        ---------
+        pops: DataFrame
+            population data output from the model
+
+        Returns
+        -------
+        None
+        """
+        self.points.set_offsets(_get_bifurcation_offsets(pops))
+        self.redraw([self.points])
+
+
+class PhaseDiagramPlot(LivePlot):
+    """
+    2D phase diagram that can be updated with new model output.
+
+    Plot the value at time t on the x-axis and the value at t+1 on the y-axis,
+    with one set of points per column of the model output.
+
+    Arguments
+    ---------
+    pops: DataFrame
+        population data output from the model
+    discard_gens: int
+        number of rows to discard before keeping points to plot
+    figsize: tuple
+        (width, height) of figure
+    xmin: float
+        minimum value on the x axis
+    xmax: float
+        maximum value on the x axis
+    ymin: float
+        minimum value on the y axis
+    ymax: float
+        maximum value on the y axis
+    title: string
+        title of the plot
+    xlabel: string
+        label of the x axis
+    ylabel: string
+        label of the y axis
+    marker: string
+        the type of point to use in the plot
+    size: float
+        the size of the marker
+    alpha: float
+        the opacity of the marker
+    color: string
+        color of the points in the scatter plot
+    color_reverse: bool
+        reverse the returned list of colors if True
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    label_font: matplotlib.font_manager.FontProperties
+        font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    blit: bool
+        whether to blit only the changed artists when the canvas supports it
+    """
+
+    def __init__(
+        self,
+        pops,
+        discard_gens=0,
+        figsize=(6, 6),
+        xmin=0,
+        xmax=1,
+        ymin=0,
+        ymax=1,
+        title="",
+        xlabel="Population (t)",
+        ylabel="Population (t + 1)",
+        marker=".",
+        size=5,
+        alpha=0.7,
+        color="#003399",
+        color_reverse=False,
+        title_font=None,
+        label_font=None,
+        style=None,
+        blit=True,
+    ):
+        if style is None:
+            style = get_default_style()
+        title_font, label_font = style.get_fonts(title_font, label_font)
+
+        fig, ax = plt.subplots(figsize=figsize)
+        super().__init__(fig, ax, blit=blit)
+        self.discard_gens = discard_gens
+        self.marker = marker
+        self.size = size
+        self.alpha = alpha
+        self.color = color
+        self.color_reverse = color_reverse
+        self.points = []
+
+        ax.set_title(title, fontproperties=title_font)
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        ax.set_xlabel(xlabel, fontproperties=label_font)
+        ax.set_ylabel(ylabel, fontproperties=label_font)
+
+        self._set_points(pops)
+
+    def _set_points(self, pops):
+        values = np.asarray(pops.values, dtype=np.float64)[self.discard_gens :]
+
+        # only create new scatter artists if the number of model runs changed
+        if len(self.points) != values.shape[1]:
+            for points in self.points:
+                points.remove()
+            color_list = get_phase_colors(self.color, values.shape[1], self.color_reverse)
+            self.points = [
+                self.ax.scatter(
+                    [],
+                    [],
+                    marker=self.marker,
+                    c=[color],
+                    edgecolor="none",
+                    s=self.size,
+                    alpha=self.alpha,
+                )
+                for color in color_list
+            ]
+            self._animate(self.points)
+
+            # the cached background is stale, so the next redraw draws it all
+            self._background = None
+
+        # each point is the value at time t and the value at time t+1
+        for points, column in zip(self.points, values.T):
+            points.set_offsets(np.column_stack([column[:-1], column[1:]]))
+
+    def update(self, pops):
+        """
+        Replace the plotted points with new model output.
+
+        Arguments
+        ---------
+        pops: DataFrame
+            population data output from the model
+
+        Returns
+        -------
+        None
+        """
+        self._set_points(pops)
+        self.redraw(self.points)
+
+
+class CobwebPlot(LivePlot):
+    """
+    Cobweb plot that can be updated with a new growth rate.
+
+    Arguments
+    ---------
+    model: function
+        defining an iterated map to simulate
+    r: float
+        growth rate parameter value to pass to the map
+    function_n: int
+        number of iterations of the function to run
+    cobweb_n: int
+        number of iterations of the cobweb line to run
+    cobweb_x: float
+        starting population value of the cobweb line
+    num_discard: int
+        how many initial vertices of the cobweb line to throw away
+    title: string
+        title of the plot, formatted with the growth rate
+    start: float
+        lower limit of the function range
+    end: float
+        upper limit of the function range
+    figsize: tuple
+        (width, height) of figure
+    diagonal_linewidth: float
+        width of y=x line
+    cobweb_linewidth: float
+        width of cobweb line
+    function_linewidth: float
+        width of function line
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure title
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
+    blit: bool
+        whether to blit only the changed artists when the canvas supports it
+    """
+
+    def __init__(
+        self,
+        model=logistic_map,
+        r=0,
+        function_n=1000,
+        cobweb_n=100,
+        cobweb_x=0.5,
+        num_discard=0,
+        title="Cobweb Plot, r={}",
+        start=0,
+        end=1,
+        figsize=(6, 6),
+        diagonal_linewidth=1.35,
+        cobweb_linewidth=1,
+        function_linewidth=1.5,
+        title_font=None,
+        style=None,
+        blit=True,
+    ):
+        if style is None:
+            style = get_default_style()
+        title_font, _ = style.get_fonts(title_font)
+
+        fig, ax = plt.subplots(figsize=figsize)
+        super().__init__(fig, ax, blit=blit)
+        self.model = model
+        self.function_n = function_n
+        self.cobweb_n = cobweb_n
+        self.cobweb_x = cobweb_x
+        self.num_discard = num_discard
+        self.title = title
+        self.start = start
+        self.end = end
+
+        # diagonal line, function line, and cobweb line
+        _ = ax.plot((0, 1), (0, 1), color=style.diagonal_color, linewidth=diagonal_linewidth)
+        self.function_line = ax.scatter(
+            [], [], color=style.function_color, edgecolor="None", s=function_linewidth
+        )
+        (self.cobweb_line,) = ax.plot([], [], color=style.cobweb_color, linewidth=cobweb_linewidth)
+
+        ax.set_ylim((0, 1))
+        ax.set_xlim((0, 1))
+        self.title_text = ax.set_title("", fontproperties=title_font)
+        self._animate([self.function_line, self.cobweb_line, self.title_text])
+
+        self._set_data(r)
+
+    def _set_data(self, r):
+        self.r = r
+        func_x_vals, func_y_vals = get_function_points(
+            model=self.model, r=r, n=self.function_n, start=self.start, end=self.end
+        )
+        cobweb_x_vals, cobweb_y_vals = get_cobweb_points(
+            model=self.model, r=r, x=self.cobweb_x, n=self.cobweb_n, num_discard=self.num_discard
+        )
+        self.function_line.set_offsets(np.column_stack([func_x_vals, func_y_vals]))
+        self.cobweb_line.set_data(cobweb_x_vals, cobweb_y_vals)
+        self.title_text.set_text(self.title.format(r))
+
+    def update(self, r=None, cobweb_x=None):
+        """
+        Redraw the cobweb for a new growth rate or starting population.
+
+        Arguments
+        ---------
+        r: float
+            growth rate parameter value to pass to the map, or None to keep
+            the current one
+        cobweb_x: float
+            starting population value of the cobweb line, or None to keep the
+            current one
+
+        Returns
+        -------
+        None
+        """
+        if cobweb_x is not None:
+            self.cobweb_x = cobweb_x
+        self._set_data(self.r if r is None else r)
+        self.redraw([self.function_line, self.cobweb_line, self.title_text])
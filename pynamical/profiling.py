@@ -0,0 +1,291 @@
+"""Time the stages of simulations and plots with a structured timing tree."""
+
+import contextlib
+import functools
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+from numba.core import event
+
+__all__ = [
+    "StageTiming",
+    "Profile",
+    "profile",
+    "stage",
+    "staged",
+]
+
+# the profile recording stages, or None when profiling is off, which makes
+# stage() return a shared no-op context manager
+_active_profile = None
+
+
+def _recording_profile():
+    # the active profile, if this thread started it, since the stage stack
+    # is shared and stages of worker threads would interleave on it
+    if _active_profile is None or _active_profile._thread != threading.get_ident():
+        return None
+    return _active_profile
+
+
+class StageTiming:
+    """
+    Timings of one stage of the pipeline and of the stages nested inside it.
+
+    Every measure includes the nested stages.
+
+    Attributes
+    ----------
+    name: string
+        name of the stage
+    wall_time: float
+        seconds spent in the stage
+    num_evals: int
+        number of model evaluations the stage ran
+    bytes_allocated: int
+        net bytes allocated by python during the stage, if memory was traced
+    compile_events: int
+        number of functions numba compiled during the stage
+    compile_time: float
+        seconds numba spent compiling during the stage
+    children: list
+        StageTiming of each stage nested inside this one, in order
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.num_evals = 0
+        self.bytes_allocated = 0
+        self.compile_events = 0
+        self.compile_time = 0.0
+        self.children = []
+
+    @property
+    def evals_per_second(self):
+        """Model evaluations per second of wall time, or None if it ran none."""
+        if self.num_evals and self.wall_time > 0:
+            return self.num_evals / self.wall_time
+        return None
+
+    def __repr__(self):
+        """Return the stage's name and wall time."""
+        return f"StageTiming({self.name!r}, wall_time={self.wall_time:.6f})"
+
+
+class _Stage:
+    # context manager timing one stage of the active profile
+
+    def __init__(self, profile, name, num_evals):
+        self.profile = profile
+        self.timing = StageTiming(name)
+        self.timing.num_evals = num_evals
+
+    def __enter__(self):
+        self.profile._stack[-1].children.append(self.timing)
+        self.profile._stack.append(self.timing)
+        if self.profile.trace_memory:
+            self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self.start_time = time.perf_counter()
+        return self.timing
+
+    def __exit__(self, *exc):
+        self.timing.wall_time = time.perf_counter() - self.start_time
+        if self.profile.trace_memory:
+            self.timing.bytes_allocated = tracemalloc.get_traced_memory()[0] - self.start_bytes
+        self.profile._stack.pop()
+        return False
+
+
+class _CompileListener(event.Listener):
+    # attribute each outermost numba compilation to every open stage
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.depth = 0
+
+    def on_start(self, event):
+        if self.depth == 0:
+            self.start_time = time.perf_counter()
+        self.depth += 1
+
+    def on_end(self, event):
+        self.depth -= 1
+        if self.depth == 0:
+            compile_time = time.perf_counter() - self.start_time
+            for timing in self.profile._stack[1:]:
+                timing.compile_events += 1
+                timing.compile_time += compile_time
+
+
+class Profile:
+    """
+    Timing tree recorded by the profile context manager.
+
+    Attributes
+    ----------
+    root: StageTiming
+        the whole profiled block, with the top-level stages as its children
+    trace_memory: bool
+        whether bytes allocated were traced
+    """
+
+    def __init__(self, trace_memory=False):
+        self.root = StageTiming("profile")
+        self.trace_memory = trace_memory
+        self._stack = [self.root]
+        self._thread = threading.get_ident()
+
+    def to_frame(self):
+        """
+        Flatten the timing tree into a DataFrame.
+
+        Returns
+        -------
+        DataFrame
+            one row per stage, in the order they started, with its depth in
+            the tree, its path of stage names joined by "/", and its measures
+        """
+        rows = []
+
+        def add_rows(timing, depth, path):
+            for child in timing.children:
+                child_path = f"{path}/{child.name}" if path else child.name
+                rows.append(
+                    {
+                        "depth": depth,
+                        "stage": child_path,
+                        "wall_time": child.wall_time,
+                        "num_evals": child.num_evals,
+                        "evals_per_second": child.evals_per_second,
+                        "bytes_allocated": child.bytes_allocated,
+                        "compile_events": child.compile_events,
+                        "compile_time": child.compile_time,
+                    }
+                )
+                add_rows(child, depth + 1, child_path)
+
+        add_rows(self.root, 0, "")
+        return pd.DataFrame(rows)
+
+    def __str__(self):
+        """Return the timing tree as an indented report."""
+        lines = []
+
+        def add_lines(timing, depth):
+            for child in timing.children:
+                line = f"{'  ' * depth}{child.name}: {child.wall_time * 1000:.3f} ms"
+                if child.evals_per_second is not None:
+                    line += f", {child.evals_per_second:.3g} evals/s"
+                if child.compile_events:
+                    line += f", {child.compile_events} compiles in {child.compile_time:.3f} s"
+                if self.trace_memory:
+                    line += f", {child.bytes_allocated} bytes"
+                lines.append(line)
+                add_lines(child, depth + 1)
+
+        add_lines(self.root, 0)
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profile(trace_memory=False):
+    """
+    Record a timing tree of the pipeline stages run inside the block.
+
+    simulate, the plot point builders, and save_and_show record their stages
+    while a profile is active. Profiles don't nest, and only record the
+    stages run by the thread that started them, so stages run by worker
+    threads, like those of simulate_many, are left out.
+
+    Arguments
+    ---------
+    trace_memory: bool
+        if True, also record the bytes allocated in each stage with
+        tracemalloc, which slows python code down considerably
+
+    Yields
+    ------
+    Profile
+        the timing tree, filled in as the stages run
+    """
+    global _active_profile
+    if _active_profile is not None:
+        raise RuntimeError("a profile is already active")
+
+    result = Profile(trace_memory=trace_memory)
+    listener = _CompileListener(result)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    event.register("numba:compile", listener)
+    _active_profile = result
+    start_time = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.root.wall_time = time.perf_counter() - start_time
+        _active_profile = None
+        event.unregister("numba:compile", listener)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+_null_stage = contextlib.nullcontext()
+
+
+def stage(name, num_evals=0):
+    """
+    Time a stage of the pipeline, if a profile is active.
+
+    When no profile is active, or another thread started it, this returns a
+    shared no-op context manager, so instrumented code pays one global
+    lookup and one comparison while profiling is off.
+
+    Arguments
+    ---------
+    name: string
+        name of the stage in the timing tree
+    num_evals: int
+        number of model evaluations the stage runs
+
+    Returns
+    -------
+    context manager
+    """
+    if _active_profile is None:
+        return _null_stage
+    recording = _recording_profile()
+    if recording is None:
+        return _null_stage
+    return _Stage(recording, name, num_evals)
+
+
+def staged(name):
+    """
+    Decorate a function to time each call as a stage, if a profile is active.
+
+    Arguments
+    ---------
+    name: string
+        name of the stage in the timing tree
+
+    Returns
+    -------
+    function
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recording = None if _active_profile is None else _recording_profile()
+            if recording is None:
+                return func(*args, **kwargs)
+            with _Stage(recording, name, 0):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
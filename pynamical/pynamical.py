@@ -1,18 +1,93 @@
 """pynamical core."""
 
+import functools
+import inspect
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import matplotlib.colors as mcolors
 import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from numba import jit
+from numba import typeof
+from numba import vectorize
+from numba.core.dispatcher import Dispatcher
+from numba.core.errors import NumbaError
+from numba.np.ufunc.dufunc import DUFunc
+
+from .profiling import stage
+from .profiling import staged
+
+__all__ = [
+    "get_title_font",
+    "get_label_font",
+    "PlotStyle",
+    "get_default_style",
+    "save_fig",
+    "save_and_show",
+    "logistic_map",
+    "cubic_map",
+    "singer_map",
+    "logistic_map_ufunc",
+    "cubic_map_ufunc",
+    "singer_map_ufunc",
+    "make_model_ufunc",
+    "vectorize_model",
+    "get_model_ufunc",
+    "get_scalar_model",
+    "get_jit_model",
+    "logistic_map_derivative",
+    "cubic_map_derivative",
+    "singer_map_derivative",
+    "set_model_derivative",
+    "make_numeric_derivative",
+    "get_model_derivative",
+    "simulate",
+    "simulate_no_compile",
+    "simulate_jit",
+    "make_jit_simulator",
+    "make_jit_rate_simulator",
+    "simulate_rates",
+    "simulate_many",
+    "get_bifurcation_plot_points",
+    "bifurcation_plot",
+    "get_phase_colors",
+    "get_phase_diagram_points",
+    "phase_diagram",
+    "phase_diagram_3d",
+    "make_cobweb",
+    "make_jit_cobweb",
+    "get_cobweb_points",
+    "get_function_points",
+    "cobweb_plot",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _find_font_file(family, style, weight, stretch):
+    # findfont searches the whole font list, and warns about each missing
+    # family in the fallback list, so only do it once per font
+    fp = fm.FontProperties(family=list(family), style=style, weight=weight, stretch=stretch)
+    return fm.findfont(fp)
+
+
+def _get_font(family, style, size, weight, stretch):
+    if family == "Helvetica":
+        family = ["Helvetica", "Arial", "sans-serif"]
+    family = (family,) if isinstance(family, str) else tuple(family)
+    fname = _find_font_file(family, style, weight, stretch)
+    return fm.FontProperties(fname=fname, size=size)
 
 
 def get_title_font(family="Helvetica", style="normal", size=20, weight="normal", stretch="normal"):
     """
     Define fonts to use for image titles.
 
+    The font file is resolved once per family, style, weight, and stretch,
+    then reused by later calls.
+
     Arguments
     ---------
     family : string
@@ -25,16 +100,16 @@ def get_title_font(family="Helvetica", style="normal", size=20, weight="normal",
     -------
     matplotlib.font_manager.FontProperties
     """
-    if family == "Helvetica":
-        family = ["Helvetica", "Arial", "sans-serif"]
-    fp = fm.FontProperties(family=family, style=style, size=size, weight=weight, stretch=stretch)
-    return fp
+    return _get_font(family=family, style=style, size=size, weight=weight, stretch=stretch)
 
 
 def get_label_font(family="Helvetica", style="normal", size=16, weight="normal", stretch="normal"):
     """
     Define fonts to use for image axis labels.
 
+    The font file is resolved once per family, style, weight, and stretch,
+    then reused by later calls.
+
     Arguments
     ---------
     family : string
@@ -47,15 +122,85 @@ def get_label_font(family="Helvetica", style="normal", size=16, weight="normal",
     -------
     matplotlib.font_manager.FontProperties
     """
-    if family == "Helvetica":
-        family = ["Helvetica", "Arial", "sans-serif"]
-    fp = fm.FontProperties(family=family, style=style, size=size, weight=weight, stretch=stretch)
-    return fp
+    return _get_font(family=family, style=style, size=size, weight=weight, stretch=stretch)
 
 
-def save_fig(filename="image", folder="images", dpi=300, bbox_inches="tight", pad=0.1):
+class PlotStyle:
     """
-    Save the current figure as a file to disk.
+    Fonts and colors shared by the plotting functions.
+
+    Fonts are resolved to font files and colors to RGBA tuples once, when the
+    style is created, so plotting functions don't look them up again on each
+    call. Styles can be pickled, so they can be sent to worker processes that
+    render frames without resolving fonts again.
+
+    Arguments
+    ---------
+    title_font: matplotlib.font_manager.FontProperties
+        font properties for figure titles, or None for get_title_font()
+    label_font: matplotlib.font_manager.FontProperties
+        font properties for axis labels, or None for get_label_font()
+    cobweb_color: string
+        color of the cobweb line in cobweb plots
+    function_color: string
+        color of the function line in cobweb plots
+    diagonal_color: string
+        color of the y=x line in cobweb plots
+    """
+
+    def __init__(
+        self,
+        title_font=None,
+        label_font=None,
+        cobweb_color="#003399",
+        function_color="#cc0000",
+        diagonal_color="gray",
+    ):
+        self.title_font = get_title_font() if title_font is None else title_font
+        self.label_font = get_label_font() if label_font is None else label_font
+        self.cobweb_color = mcolors.to_rgba(cobweb_color)
+        self.function_color = mcolors.to_rgba(function_color)
+        self.diagonal_color = mcolors.to_rgba(diagonal_color)
+
+    def get_fonts(self, title_font=None, label_font=None):
+        """
+        Return the title and label fonts, unless others are passed in.
+
+        Arguments
+        ---------
+        title_font: matplotlib.font_manager.FontProperties
+            font properties for figure title, or None for the style's font
+        label_font: matplotlib.font_manager.FontProperties
+            font properties for axis labels, or None for the style's font
+
+        Returns
+        -------
+        tuple
+            title_font, label_font
+        """
+        title_font = self.title_font if title_font is None else title_font
+        label_font = self.label_font if label_font is None else label_font
+        return title_font, label_font
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_style():
+    """
+    Return the style the plotting functions use by default.
+
+    The style is created on the first call, then reused by later calls.
+
+    Returns
+    -------
+    PlotStyle
+    """
+    return PlotStyle()
+
+
+@staged("save_fig")
+def save_fig(filename="image", folder="images", dpi=300, bbox_inches="tight", pad=0.1, fig=None):
+    """
+    Save a figure, by default the current figure, as a file to disk.
 
     Arguments
     ---------
@@ -69,18 +214,23 @@ def save_fig(filename="image", folder="images", dpi=300, bbox_inches="tight", pa
         tell matplotlib to figure out the tight bbox of the figure
     pad: float
         inches to pad around the figure
+    fig: matplotlib figure
+        the figure to save, or None to save the current figure
 
     Returns
     -------
     None
     """
+    if fig is None:
+        fig = plt.gcf()
     if not os.path.exists(folder):
         os.makedirs(folder)
-    plt.savefig(
+    fig.savefig(
         "{}/{}.png".format(folder, filename), dpi=dpi, bbox_inches=bbox_inches, pad_inches=pad
     )
 
 
+@staged("save_and_show")
 def save_and_show(
     fig, ax, save, show, filename="image", folder="images", dpi=300, bbox_inches="tight", pad=0.1
 ):
@@ -182,6 +332,334 @@ def singer_map(pop, rate):
     return rate * (7.86 * pop - 23.31 * pop**2 + 28.75 * pop**3 - 13.3 * pop**4)
 
 
+# signature of the ufunc versions of the models: (pop, rate) -> pop
+_ufunc_signatures = ["float64(float64, float64)"]
+
+
+@vectorize(_ufunc_signatures, cache=True)  # pragma: no cover
+def logistic_map_ufunc(pop, rate):
+    """
+    Define the logistic map as a ufunc that evaluates whole arrays.
+
+    Arguments
+    ---------
+    pop: float or array
+        current population values at time t
+    rate: float or array
+        growth rate parameter values
+
+    Returns
+    -------
+    float or array
+        result of logistic map at time t+1
+    """
+    return logistic_map(pop, rate)
+
+
+@vectorize(_ufunc_signatures, cache=True)  # pragma: no cover
+def cubic_map_ufunc(pop, rate):
+    """
+    Define the cubic map as a ufunc that evaluates whole arrays.
+
+    Arguments
+    ---------
+    pop: float or array
+        current population values at time t
+    rate: float or array
+        growth rate parameter values
+
+    Returns
+    -------
+    float or array
+        result of cubic map at time t+1
+    """
+    return cubic_map(pop, rate)
+
+
+@vectorize(_ufunc_signatures, cache=True)  # pragma: no cover
+def singer_map_ufunc(pop, rate):
+    """
+    Define the singer map as a ufunc that evaluates whole arrays.
+
+    Arguments
+    ---------
+    pop: float or array
+        current population values at time t
+    rate: float or array
+        growth rate parameter values
+
+    Returns
+    -------
+    float or array
+        result of singer map at time t+1
+    """
+    return singer_map(pop, rate)
+
+
+# the ufunc versions of the bundled models, so they are not compiled again
+_model_ufuncs = {
+    logistic_map: logistic_map_ufunc,
+    cubic_map: cubic_map_ufunc,
+    singer_map: singer_map_ufunc,
+}
+
+# the jitted scalar model behind each ufunc, for use inside jitted functions
+_ufunc_models = {model_ufunc: model for model, model_ufunc in _model_ufuncs.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def make_model_ufunc(model, parallel=False):
+    """
+    Create a ufunc version of a model that evaluates whole arrays.
+
+    The model is wrapped in a closure, like in make_jit_simulator, so the
+    ufunc calls the jitted model function for each element at native speed.
+    If the model is a plain Python function, it gets jit compiled first. The
+    ufuncs are cached per model, so repeated calls reuse them.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to vectorize
+    parallel: bool
+        if True, evaluate array elements in parallel across threads
+
+    Returns
+    -------
+    numba.np.ufunc.dufunc.DUFunc
+    """
+    if not parallel and model in _model_ufuncs:
+        return _model_ufuncs[model]
+
+    if not isinstance(model, Dispatcher):
+        model = jit(nopython=True)(model)
+
+    @vectorize(_ufunc_signatures, target="parallel" if parallel else "cpu")  # pragma: no cover
+    def model_ufunc(pop, rate):
+        return model(pop, rate)
+
+    _ufunc_models[model_ufunc] = model
+    return model_ufunc
+
+
+def vectorize_model(model=None, parallel=False):
+    """
+    Decorate a model function to turn it into a ufunc.
+
+    The decorated model evaluates whole arrays of population and rate values
+    at native speed, and it can still be passed to simulate, cobweb_plot, and
+    the other functions that accept a model. Use it as @vectorize_model or as
+    @vectorize_model(parallel=True).
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to vectorize
+    parallel: bool
+        if True, evaluate array elements in parallel across threads
+
+    Returns
+    -------
+    numba.np.ufunc.dufunc.DUFunc
+    """
+    if model is None:
+        return functools.partial(vectorize_model, parallel=parallel)
+    return make_model_ufunc(model, parallel=parallel)
+
+
+def get_model_ufunc(model):
+    """
+    Return the ufunc version of a model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map, or its ufunc version
+
+    Returns
+    -------
+    numba.np.ufunc.dufunc.DUFunc
+    """
+    if isinstance(model, (DUFunc, np.ufunc)):
+        return model
+    return make_model_ufunc(model)
+
+
+def get_scalar_model(model):
+    """
+    Return the jitted scalar version of a model.
+
+    Jitted functions call this scalar version for each value, even if the
+    model was passed in as a ufunc created by vectorize_model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map, or its ufunc version
+
+    Returns
+    -------
+    function
+    """
+    return _ufunc_models.get(model, model)
+
+
+def get_jit_model(model):
+    """
+    Return the jitted scalar version of a model, compiling it if needed.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map, its ufunc version, or a plain
+        Python function that numba can compile
+
+    Returns
+    -------
+    function
+    """
+    model = get_scalar_model(model)
+    if not isinstance(model, Dispatcher):
+        model = jit(nopython=True)(model)
+    return model
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def logistic_map_derivative(pop, rate):
+    """
+    Define the derivative of the logistic map with respect to pop.
+
+    Arguments
+    ---------
+    pop: float
+        current population value at time t
+    rate: float
+        growth rate parameter values
+
+    Returns
+    -------
+    float
+        slope of logistic map at pop
+    """
+    return rate * (1 - 2 * pop)
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def cubic_map_derivative(pop, rate):
+    """
+    Define the derivative of the cubic map with respect to pop.
+
+    Arguments
+    ---------
+    pop: float
+        current population value at time t
+    rate: float
+        growth rate parameter values
+
+    Returns
+    -------
+    float
+        slope of cubic map at pop
+    """
+    return 3 * rate * pop**2 + (1 - rate)
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def singer_map_derivative(pop, rate):
+    """
+    Define the derivative of the singer map with respect to pop.
+
+    Arguments
+    ---------
+    pop: float
+        current population value at time t
+    rate: float
+        growth rate parameter values
+
+    Returns
+    -------
+    float
+        slope of singer map at pop
+    """
+    return rate * (7.86 - 46.62 * pop + 86.25 * pop**2 - 53.2 * pop**3)
+
+
+# the derivatives of the models, for models that define one
+_model_derivatives = {
+    logistic_map: logistic_map_derivative,
+    cubic_map: cubic_map_derivative,
+    singer_map: singer_map_derivative,
+}
+
+
+def set_model_derivative(model, derivative):
+    """
+    Register the jitted derivative of a model with respect to pop.
+
+    Functions that need the slope of a model, such as orbit continuation and
+    Lyapunov exponents, use the registered derivative instead of a finite
+    difference approximation.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+    derivative: function
+        jitted function of (pop, rate) returning the slope of the model
+
+    Returns
+    -------
+    None
+    """
+    _model_derivatives[get_scalar_model(model)] = derivative
+
+
+@functools.lru_cache(maxsize=None)
+def make_numeric_derivative(model):
+    """
+    Create a jitted central finite difference derivative of a model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True)  # pragma: no cover
+    def numeric_derivative(pop, rate):
+        h = 1e-6 * max(1.0, abs(pop))
+        return (model(pop + h, rate) - model(pop - h, rate)) / (2 * h)
+
+    return numeric_derivative
+
+
+def get_model_derivative(model):
+    """
+    Return the jitted derivative of a model with respect to pop.
+
+    This is the registered derivative if the model has one, otherwise a
+    central finite difference approximation.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map, or its ufunc version
+
+    Returns
+    -------
+    function
+    """
+    model = get_scalar_model(model)
+    if model in _model_derivatives:
+        return _model_derivatives[model]
+    return make_numeric_derivative(model)
+
+
 def simulate(
     model=logistic_map,
     num_gens=50,
@@ -191,6 +669,7 @@ def simulate(
     num_discard=0,
     initial_pop=0.5,
     jit=True,
+    precision="float64",
 ):
     """
     Simulate a module.
@@ -219,23 +698,28 @@ def simulate(
     jit: bool
         if True, use jit compiled simulator function to speed up simulation,
         if False, use uncompiled simulator function
+    precision: string
+        "float64", "float32" to store float32 populations of float64 orbits,
+        or "fast" to iterate float32 orbits with fastmath, either of which
+        needs jit=True. Use precision_report to check whether they are
+        accurate enough
 
     Returns
     -------
     DataFrame
     """
+    _get_precision(precision)
     if jit:
-        return simulate_jit(
-            model=model,
-            num_gens=num_gens,
-            rate_min=rate_min,
-            rate_max=rate_max,
-            num_rates=num_rates,
-            num_discard=num_discard,
-            initial_pop=initial_pop,
-        )
+        simulator = simulate_jit
+    elif precision != "float64":
+        raise ValueError("float32 precision needs the jit compiled simulator")
     else:
-        return simulate_no_compile(
+        simulator = simulate_no_compile
+    if precision != "float64":
+        simulator = functools.partial(simulate_rates, precision=precision)
+
+    with stage("simulate", num_evals=num_rates * (num_gens + num_discard)):
+        return simulator(
             model=model,
             num_gens=num_gens,
             rate_min=rate_min,
@@ -246,6 +730,12 @@ def simulate(
         )
 
 
+# simulate's keyword arguments and their defaults, for simulate_many
+_simulate_defaults = {
+    name: param.default for name, param in inspect.signature(simulate).parameters.items()
+}
+
+
 def simulate_no_compile(model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop):
     """
     Create a DataFrame with columns for each growth rate.
@@ -278,23 +768,25 @@ def simulate_no_compile(model, num_gens, rate_min, rate_max, num_rates, num_disc
     rates = np.linspace(rate_min, rate_max, num_rates)
 
     # for each rate, run the function repeatedly, starting at the initial_pop
-    for rate in rates:
-        pop = initial_pop
+    with stage("simulator", num_evals=num_rates * (num_gens + num_discard)):
+        for rate in rates:
+            pop = initial_pop
 
-        # first run it num_discard times and ignore the results
-        for _ in range(num_discard):
-            pop = model(pop, rate)
+            # first run it num_discard times and ignore the results
+            for _ in range(num_discard):
+                pop = model(pop, rate)
 
-        # now that those gens are discarded, run it num_gens times
-        for _ in range(num_gens):
-            pops.append([rate, pop])
-            pop = model(pop, rate)
+            # now that those gens are discarded, run it num_gens times
+            for _ in range(num_gens):
+                pops.append([rate, pop])
+                pop = model(pop, rate)
 
     # return a DataFrame with one column for each growth rate and one row for
     # each timestep (aka generation)
-    df = pd.DataFrame(data=pops, columns=["rate", "pop"])
-    df.index = pd.MultiIndex.from_arrays([num_rates * list(range(num_gens)), df["rate"].values])
-    return df.drop(labels="rate", axis=1).unstack()["pop"]
+    with stage("unstack"):
+        df = pd.DataFrame(data=pops, columns=["rate", "pop"])
+        df.index = pd.MultiIndex.from_arrays([num_rates * list(range(num_gens)), df["rate"].values])
+        return df.drop(labels="rate", axis=1).unstack()["pop"]
 
 
 def simulate_jit(model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop):
@@ -343,13 +835,15 @@ def simulate_jit(model, num_gens, rate_min, rate_max, num_rates, num_discard, in
     )
 
     # run the jit_simulator to create the pops to pass to the DataFrame
-    pops = jit_simulator()
+    with stage("simulator", num_evals=num_rates * (num_gens + num_discard)):
+        pops = jit_simulator()
 
     # return a DataFrame with one column for each growth rate and one row for
     # each timestep (aka generation)
-    df = pd.DataFrame(data=pops, columns=["rate", "pop"])
-    df.index = pd.MultiIndex.from_arrays([num_rates * list(range(num_gens)), df["rate"].values])
-    return df.drop(labels="rate", axis=1).unstack()["pop"]
+    with stage("unstack"):
+        df = pd.DataFrame(data=pops, columns=["rate", "pop"])
+        df.index = pd.MultiIndex.from_arrays([num_rates * list(range(num_gens)), df["rate"].values])
+        return df.drop(labels="rate", axis=1).unstack()["pop"]
 
 
 def make_jit_simulator(model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop):
@@ -357,7 +851,8 @@ def make_jit_simulator(model, num_gens, rate_min, rate_max, num_rates, num_disca
     Create a jitted simulator function.
 
     It receives the jitted model function, without it being an argument passed
-    to the simulator function, because of the closure local scope.
+    to the simulator function, because of the closure local scope. It
+    releases the GIL, so it can run in several threads at once.
 
     Arguments
     ---------
@@ -380,8 +875,9 @@ def make_jit_simulator(model, num_gens, rate_min, rate_max, num_rates, num_disca
     -------
     function
     """
+    model = get_jit_model(model)
 
-    @jit(cache=True, nopython=True)  # pragma: no cover
+    @jit(cache=True, nopython=True, nogil=True)  # pragma: no cover
     def jit_simulator(
         num_gens=num_gens,
         rate_min=rate_min,
@@ -413,7 +909,173 @@ def make_jit_simulator(model, num_gens, rate_min, rate_max, num_rates, num_disca
     return jit_simulator
 
 
-def get_bifurcation_plot_points(pops):
+# precision policies: storage dtype of the populations, and whether kernels
+# may use fastmath, which lets LLVM reorder floating point operations, and
+# iterate the orbits in the storage dtype too
+_precisions = {
+    "float64": (np.float64, False),
+    "float32": (np.float32, False),
+    "fast": (np.float32, True),
+}
+
+
+def _get_precision(precision):
+    if precision not in _precisions:
+        raise ValueError(f"precision must be one of {list(_precisions)}")
+    return _precisions[precision]
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_rate_simulator(model, precision="float64"):
+    """
+    Create a jitted simulator function for a model that takes rates as input.
+
+    Unlike make_jit_simulator, the simulator takes the rates and other
+    settings as arguments, so one compiled function is reused for every
+    configuration and chunk of rates. It advances every rate's orbit one
+    generation at a time, so the inner loop runs across rates and can be
+    vectorized. It releases the GIL, so it can run in several threads at
+    once. Simulators are cached per model and precision.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    precision: string
+        "float64" to store float64 populations, "float32" to store float32
+        populations of float64 orbits, or "fast" to iterate float32 orbits
+        with a fastmath copy of the model, which is quicker but drifts from
+        the float64 orbits much sooner
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+    dtype, fastmath = _get_precision(precision)
+    orbit_dtype = np.float64
+    if fastmath:
+        # the model is a separate function, so it needs its own fastmath copy
+        model = jit(nopython=True, fastmath=True)(getattr(model, "py_func", model))
+        orbit_dtype = dtype
+
+    @jit(cache=True, nopython=True, nogil=True, fastmath=fastmath)  # pragma: no cover
+    def jit_rate_simulator(rates, num_gens, num_discard, initial_pop):
+        num_rates = len(rates)
+        pops = np.empty((num_gens, num_rates), dtype=dtype)
+        pop = np.full(num_rates, initial_pop, dtype=orbit_dtype)
+        rates = rates.astype(orbit_dtype)
+
+        # first run it num_discard times and ignore the results
+        for _ in range(num_discard):
+            for rate_num in range(num_rates):
+                pop[rate_num] = model(pop[rate_num], rates[rate_num])
+
+        # now that those gens are discarded, run it num_gens times
+        for gen_num in range(num_gens):
+            for rate_num in range(num_rates):
+                pops[gen_num, rate_num] = pop[rate_num]
+                pop[rate_num] = model(pop[rate_num], rates[rate_num])
+        return pops
+
+    return jit_rate_simulator
+
+
+def simulate_rates(
+    model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop, precision="float64"
+):
+    """
+    Create a DataFrame with columns for each growth rate, at any precision.
+
+    Unlike simulate_jit, this runs the simulator from make_jit_rate_simulator,
+    which is compiled once per model and precision rather than once per call.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model
+    precision: string
+        "float64", "float32", or "fast", as in make_jit_rate_simulator
+
+    Returns
+    -------
+    DataFrame
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    jit_rate_simulator = make_jit_rate_simulator(model, precision)
+    with stage("simulator", num_evals=num_rates * (num_gens + num_discard)):
+        pops = jit_rate_simulator(rates, num_gens, num_discard, float(initial_pop))
+    return pd.DataFrame(pops, columns=rates)
+
+
+def _simulate_config(config):
+    # run one of simulate_many's configurations in a worker thread
+    config = {**_simulate_defaults, **config}
+    if not config.pop("jit"):
+        return simulate(**config)
+    return simulate_rates(**config)
+
+
+def simulate_many(configs, max_workers=None):
+    """
+    Simulate many configurations at once over a pool of threads.
+
+    Each configuration is a dict of simulate's keyword arguments. Compiled
+    configurations share one simulator per model, which is compiled once
+    and releases the GIL, so even small configurations run in parallel. A
+    configuration with jit=False runs simulate as usual, holding the GIL.
+
+    Arguments
+    ---------
+    configs: iterable
+        dicts of keyword arguments to pass to simulate
+    max_workers: int
+        number of threads to simulate with, or None for python's default
+
+    Returns
+    -------
+    list
+        one DataFrame per configuration, in the same order, each like
+        simulate's output
+    """
+    configs = list(configs)
+    for config in configs:
+        unknown = set(config) - set(_simulate_defaults)
+        if unknown:
+            raise ValueError(f"unknown simulate arguments: {sorted(unknown)}")
+
+    # compile each model's simulator once up front rather than in every thread
+    for config in configs:
+        if config.get("jit", True):
+            model = config.get("model", logistic_map)
+            precision = config.get("precision", "float64")
+            make_jit_rate_simulator(model, precision)(np.empty(0), 0, 0, 0.5)
+
+    # profiles only record stages of the thread that started them, so the
+    # whole batch is one stage here rather than one per worker
+    num_evals = 0
+    for config in configs:
+        config = {**_simulate_defaults, **config}
+        num_evals += config["num_rates"] * (config["num_gens"] + config["num_discard"])
+    with stage("simulate_many", num_evals=num_evals):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(_simulate_config, configs))
+
+
+@staged("get_bifurcation_plot_points")
+def get_bifurcation_plot_points(pops, precision=None):
     """
     Convert a DataFrame of values from the model into a set of xy points.
 
@@ -421,13 +1083,23 @@ def get_bifurcation_plot_points(pops):
 
     Arguments
     ---------
-    pops: DataFrame
-        population data output from the model
+    pops: DataFrame or QuantizedPops
+        population data output from the model, or from quantize_pops
+    precision: string
+        "float64", or "float32" or "fast" to store the population (y) values
+        as float32, or None to keep the dtype of pops. Rates keep theirs
 
     Returns
     -------
     DataFrame
     """
+    # quantized output decodes straight into points
+    if not isinstance(pops, pd.DataFrame):
+        xy_points = pops.to_points()
+        if precision is not None:
+            xy_points["y"] = xy_points["y"].astype(_get_precision(precision)[0])
+        return xy_points
+
     # create a new DataFrame to contain our xy points
     xy_points = pd.DataFrame(columns=["x", "y"])
 
@@ -440,6 +1112,8 @@ def get_bifurcation_plot_points(pops):
 
     # reset the index and drop old index before returning the xy point data
     xy_points = xy_points.reset_index().drop(labels="index", axis=1)
+    if precision is not None:
+        xy_points["y"] = xy_points["y"].astype(_get_precision(precision)[0])
     return xy_points
 
 
@@ -459,18 +1133,20 @@ def bifurcation_plot(
     show=True,
     title_font=None,
     label_font=None,
+    style=None,
     folder="images",
     dpi=300,
     bbox_inches="tight",
     pad=0.1,
+    precision=None,
 ):
     """
     Plot the results of the model as a bifurcation diagram.
 
     Arguments
     ---------
-    pops: DataFrame
-        population data output from the model
+    pops: DataFrame or QuantizedPops
+        population data output from the model, or from quantize_pops
     xmin: float
         minimum value on the x axis
     xmax: float
@@ -499,6 +1175,8 @@ def bifurcation_plot(
         font properties for figure title
     label_font: matplotlib.font_manager.FontProperties
         font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
     folder: string
         folder in which to save the image file
     dpi: int
@@ -507,31 +1185,32 @@ def bifurcation_plot(
         tell matplotlib to figure out the tight bbox of the figure
     pad: float
         inches to pad around the figure
+    precision: string
+        storage precision of the plotted points, as in the point builders,
+        or None to keep the dtype of pops
 
     Returns
     -------
     tuple
         (fig, ax) if show=False, otherwise returns None
     """
-    if title_font is None:
-        title_font = get_title_font()
-
-    if label_font is None:
-        label_font = get_label_font()
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts(title_font, label_font)
 
     # create a new matplotlib figure and axis and set its size
     fig, ax = plt.subplots(figsize=figsize)
 
     # plot the xy data
-    points = get_bifurcation_plot_points(pops)
+    points = get_bifurcation_plot_points(pops, precision=precision)
     _ = ax.scatter(points["x"], points["y"], c=color, edgecolor="None", alpha=1, s=1)
 
     # set x and y limits, title, and x and y labels
     ax.set_xlim(xmin, xmax)
     ax.set_ylim(ymin, ymax)
-    ax.set_title(title, fontproperties=get_title_font())
-    ax.set_xlabel(xlabel, fontproperties=get_label_font())
-    ax.set_ylabel(ylabel, fontproperties=get_label_font())
+    ax.set_title(title, fontproperties=title_font)
+    ax.set_xlabel(xlabel, fontproperties=label_font)
+    ax.set_ylabel(ylabel, fontproperties=label_font)
 
     return save_and_show(
         fig=fig,
@@ -602,7 +1281,8 @@ def get_phase_colors(color_request, length=1, color_reverse=False, default_color
     return color_list
 
 
-def get_phase_diagram_points(pops, discard_gens=1, dimensions=2):
+@staged("get_phase_diagram_points")
+def get_phase_diagram_points(pops, discard_gens=1, dimensions=2, precision=None):
     """
     Convert a DataFrame of values from the model into a set of xy(z) points.
 
@@ -615,6 +1295,9 @@ def get_phase_diagram_points(pops, discard_gens=1, dimensions=2):
     dimensions: int
         {2, 3}, number of dimensions specifying if we want points for a 2-D or
         3-D plot: (t, t+1) vs (t, t+1, t+2)
+    precision: string
+        "float64", or "float32" or "fast" to store the points as float32, or
+        None to keep the dtype of pops
 
     Returns
     -------
@@ -658,6 +1341,8 @@ def get_phase_diagram_points(pops, discard_gens=1, dimensions=2):
     df = pd.DataFrame(points, columns=point_columns[0 : dimensions + 1])
     df.index = pd.MultiIndex.from_tuples(list(zip(df["name"], df.index)), names=["name", ""])
     df = df.drop(labels="name", axis=1)
+    if precision is not None:
+        df = df.astype(_get_precision(precision)[0])
     return df
 
 
@@ -683,10 +1368,12 @@ def phase_diagram(
     show=True,
     title_font=None,
     label_font=None,
+    style=None,
     folder="images",
     dpi=300,
     bbox_inches="tight",
     pad=0.1,
+    precision=None,
 ):
     """
     Draw a 2D phase diagram for one or more time series.
@@ -737,6 +1424,8 @@ def phase_diagram(
         font properties for figure title
     label_font: matplotlib.font_manager.FontProperties
         font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
     folder: string
         folder in which to save the image file
     dpi: int
@@ -745,20 +1434,21 @@ def phase_diagram(
         tell matplotlib to figure out the tight bbox of the figure
     pad: float
         inches to pad around the figure
+    precision: string
+        storage precision of the plotted points, as in the point builders,
+        or None to keep the dtype of pops
 
     Returns
     -------
     tuple
         (fig, ax) if show=False, otherwise returns None
     """
-    if title_font is None:
-        title_font = get_title_font()
-
-    if label_font is None:
-        label_font = get_label_font()
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts(title_font, label_font)
 
     # first get the xy points to plot
-    points = get_phase_diagram_points(pops, discard_gens, dimensions=2)
+    points = get_phase_diagram_points(pops, discard_gens, dimensions=2, precision=precision)
     plots = []
 
     # get_phase_diagram_points() returns a MultiIndexed DataFrame, each run of
@@ -770,11 +1460,11 @@ def phase_diagram(
     fig, ax = plt.subplots(figsize=figsize)
 
     # set the plot title, x- and y-axis limits, and x- and y-axis labels
-    ax.set_title(title, fontproperties=get_title_font())
+    ax.set_title(title, fontproperties=title_font)
     ax.set_xlim(xmin, xmax)
     ax.set_ylim(ymin, ymax)
-    ax.set_xlabel(xlabel, fontproperties=get_label_font())
-    ax.set_ylabel(ylabel, fontproperties=get_label_font())
+    ax.set_xlabel(xlabel, fontproperties=label_font)
+    ax.set_ylabel(ylabel, fontproperties=label_font)
 
     # make sure we have a list of colors as long as the number of model runs
     color_list = get_phase_colors(color, len(names), color_reverse)
@@ -850,10 +1540,12 @@ def phase_diagram_3d(
     show=True,
     title_font=None,
     label_font=None,
+    style=None,
     folder="images",
     dpi=300,
     bbox_inches="tight",
     pad=0.1,
+    precision=None,
 ):
     """
     Draw a 3D phase diagram for one or more time series.
@@ -921,6 +1613,8 @@ def phase_diagram_3d(
         font properties for figure title
     label_font: matplotlib.font_manager.FontProperties
         font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
     folder: string
         folder in which to save the image file
     dpi: int
@@ -929,20 +1623,21 @@ def phase_diagram_3d(
         tell matplotlib to figure out the tight bbox of the figure
     pad: float
         inches to pad around the figure
+    precision: string
+        storage precision of the plotted points, as in the point builders,
+        or None to keep the dtype of pops
 
     Returns
     -------
     tuple
     (fig, ax) if show=False, otherwise returns None
     """
-    if title_font is None:
-        title_font = get_title_font()
-
-    if label_font is None:
-        label_font = get_label_font()
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts(title_font, label_font)
 
     # first get the xyz points to plot
-    points = get_phase_diagram_points(pops, discard_gens, dimensions=3)
+    points = get_phase_diagram_points(pops, discard_gens, dimensions=3, precision=precision)
     plots = []
 
     # get_phase_diagram_points() returns a MultiIndexed DataFrame, each run of
@@ -963,13 +1658,13 @@ def phase_diagram_3d(
     ax.dist = dist
 
     # set the plot title, axis limits, and axis labels
-    ax.set_title(title, fontproperties=get_title_font())
+    ax.set_title(title, fontproperties=title_font)
     ax.set_xlim(xmin, xmax)
     ax.set_ylim(ymin, ymax)
     ax.set_zlim(zmin, zmax)
-    ax.set_xlabel(xlabel, fontproperties=get_label_font())
-    ax.set_ylabel(ylabel, fontproperties=get_label_font())
-    ax.set_zlabel(zlabel, fontproperties=get_label_font())
+    ax.set_xlabel(xlabel, fontproperties=label_font)
+    ax.set_ylabel(ylabel, fontproperties=label_font)
+    ax.set_zlabel(zlabel, fontproperties=label_font)
 
     # remove all ticks if argument is True
     if remove_ticks:
@@ -1044,7 +1739,81 @@ def phase_diagram_3d(
     )
 
 
-def get_cobweb_points(model, r, x, n):
+def make_cobweb(model):
+    """
+    Create an uncompiled cobweb function for a model.
+
+    The orbit is computed once, so the model is evaluated only n + 1 times,
+    and the cobweb vertices are written directly into preallocated x and y
+    arrays, so it's fast whether or not it's compiled. The returned function can be jit compiled as long as the model is
+    jit compiled too, see make_jit_cobweb.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+
+    def cobweb(r, x, n, num_discard):
+
+        # the cobweb has one starting vertex plus three vertices per iteration
+        x_vals = np.empty(1 + 3 * n, dtype=np.float64)
+        y_vals = np.empty(1 + 3 * n, dtype=np.float64)
+
+        # start on the x-axis at the point (x, 0)
+        x_vals[0] = x
+        y_vals[0] = 0
+
+        # y1 is the model's value at x and y2 is the model's value at y1, so
+        # y2 becomes the next iteration's y1 without evaluating the model again
+        y1 = model(x, r)
+        for i in range(n):
+            y2 = model(y1, r)
+            vertex = 1 + 3 * i
+            x_vals[vertex] = x
+            y_vals[vertex] = y1
+            x_vals[vertex + 1] = y1
+            y_vals[vertex + 1] = y1
+            x_vals[vertex + 2] = y1
+            y_vals[vertex + 2] = y2
+            x = y1
+            y1 = y2
+
+        # the first num_discard vertices are not kept
+        return x_vals[num_discard:], y_vals[num_discard:]
+
+    return cobweb
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_cobweb(model):
+    """
+    Create a jitted cobweb function for a model.
+
+    It receives the jitted model function, without it being an argument passed
+    to the cobweb function, because of the closure local scope. If the model
+    is a plain Python function, it gets jit compiled first. Compiled cobweb
+    functions are cached per model, so repeated calls reuse them.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+    return jit(cache=True, nopython=True)(make_cobweb(model))
+
+
+@staged("get_cobweb_points")
+def get_cobweb_points(model, r, x, n, num_discard=0, jit=True):
     """
     Calculate the vertices of cobweb lines for a cobweb plot.
 
@@ -1069,24 +1838,36 @@ def get_cobweb_points(model, r, x, n):
         starting population value
     n: int
         number of iterations to run
+    num_discard: int
+        how many initial vertices of the cobweb line to throw away
+    jit: bool
+        if True, use jit compiled cobweb function to speed up calculation,
+        falling back to the uncompiled one if the model can't be compiled,
+        if False, use uncompiled cobweb function
 
     Returns
     -------
     tuple
         cobweb_x_vals, cobweb_y_vals
     """
-    cobweb_points = [(x, 0)]
-    for _ in range(n):
-        y1 = model(x, r)
-        cobweb_points.append((x, y1))
-        cobweb_points.append((y1, y1))
-        y2 = model(y1, r)
-        cobweb_points.append((y1, y2))
-        x = y1
-    return zip(*cobweb_points)
+    if num_discard < 0:
+        raise ValueError("num_discard must be greater than or equal to 0")
+
+    args = (r, x, n, num_discard)
+    if jit:
+        try:
+            cobweb = make_jit_cobweb(model)
+            cobweb.compile(tuple(typeof(arg) for arg in args))
+        except (NumbaError, ValueError):
+            # the model can't be compiled, so run it uncompiled instead, but
+            # errors the compiled model raises while running still propagate
+            pass
+        else:
+            return cobweb(*args)
+    return make_cobweb(get_scalar_model(model))(*args)
 
 
-def get_function_points(model, r, n, start, end):
+def get_function_points(model, r, n, start, end, jit=True):
     """
     Calculate model results for n population values.
 
@@ -1104,6 +1885,10 @@ def get_function_points(model, r, n, start, end):
         lower limit of the function range
     end: float
         upper limit of the function range
+    jit: bool
+        if True, evaluate all the values at once with the model's ufunc
+        version, falling back to the uncompiled model if it can't be
+        compiled, if False, call the uncompiled model once per value
 
     Returns
     -------
@@ -1111,7 +1896,13 @@ def get_function_points(model, r, n, start, end):
         x_vals, y_vals
     """
     x_vals = np.linspace(start, end, n)
-    y_vals = [model(x, r) for x in x_vals]
+    if jit:
+        try:
+            return x_vals, get_model_ufunc(model)(x_vals, r)
+        except (NumbaError, ValueError):
+            # the model can't be compiled, so run it uncompiled instead
+            pass
+    y_vals = np.array([model(x, r) for x in x_vals])
     return x_vals, y_vals
 
 
@@ -1134,10 +1925,12 @@ def cobweb_plot(
     function_linewidth=1.5,
     title_font=None,
     label_font=None,
+    style=None,
     folder="images",
     dpi=300,
     bbox_inches="tight",
     pad=0.1,
+    jit=True,
 ):
     """
     Draw a cobweb plot.
@@ -1158,7 +1951,7 @@ def cobweb_plot(
     cobweb_n: int
         number of iterations of the cobweb line to run
     num_discard: int
-        how many initial iterations of the cobweb line to throw away
+        how many initial vertices of the cobweb line to throw away
     title: string
         title of the plot
     filename: string
@@ -1183,6 +1976,8 @@ def cobweb_plot(
         font properties for figure title
     label_font: matplotlib.font_manager.FontProperties
         font properties for axis labels
+    style: PlotStyle
+        fonts and colors to use, or None for get_default_style()
     folder: string
         folder in which to save the image file
     dpi: int
@@ -1191,43 +1986,44 @@ def cobweb_plot(
         tell matplotlib to figure out the tight bbox of the figure
     pad: float
         inches to pad around the figure
+    jit: bool
+        if True, use jit compiled cobweb and ufunc model functions to speed up
+        calculation, if False, use uncompiled functions
 
     Returns
     -------
     tuple
         (fig, ax) if show=False, otherwise returns None
     """
-    if title_font is None:
-        title_font = get_title_font()
-
-    if label_font is None:
-        label_font = get_label_font()
+    if style is None:
+        style = get_default_style()
+    title_font, label_font = style.get_fonts(title_font, label_font)
 
     func_x_vals, func_y_vals = get_function_points(
-        model=model, r=r, n=function_n, start=start, end=end
+        model=model, r=r, n=function_n, start=start, end=end, jit=jit
+    )
+    cobweb_x_vals, cobweb_y_vals = get_cobweb_points(
+        model=model, r=r, x=cobweb_x, n=cobweb_n, num_discard=num_discard, jit=jit
     )
-    cobweb_x_vals, cobweb_y_vals = get_cobweb_points(model=model, r=r, x=cobweb_x, n=cobweb_n)
-    cobweb_x_vals = cobweb_x_vals[num_discard:]
-    cobweb_y_vals = cobweb_y_vals[num_discard:]
 
     fig, ax = plt.subplots(figsize=figsize)
 
     # diagonal line
-    _ = ax.plot((0, 1), (0, 1), color="gray", linewidth=diagonal_linewidth)
+    _ = ax.plot((0, 1), (0, 1), color=style.diagonal_color, linewidth=diagonal_linewidth)
 
     # function line
     _ = ax.scatter(
-        func_x_vals, func_y_vals, color="#cc0000", edgecolor="None", s=function_linewidth
+        func_x_vals, func_y_vals, color=style.function_color, edgecolor="None", s=function_linewidth
     )
 
     # cobweb line
-    _ = ax.plot(cobweb_x_vals, cobweb_y_vals, color="#003399", linewidth=cobweb_linewidth)
+    _ = ax.plot(cobweb_x_vals, cobweb_y_vals, color=style.cobweb_color, linewidth=cobweb_linewidth)
 
     ax.set_ylim((0, 1))
     ax.set_xlim((0, 1))
     if title == "":
         title = "Cobweb Plot, r={}".format(r)
-    ax.set_title(title, fontproperties=get_title_font())
+    ax.set_title(title, fontproperties=title_font)
 
     if filename == "":
         filename = "cobweb-plot-r{}-x{}".format(r, cobweb_x).replace(".", "")
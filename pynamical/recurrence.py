@@ -0,0 +1,236 @@
+"""Build bit-packed recurrence matrices and stream recurrence quantification."""
+
+import numpy as np
+import pandas as pd
+from numba import jit
+from numba import prange
+
+__all__ = [
+    "embed_series",
+    "recurrence_matrix",
+    "recurrence_quantification",
+]
+
+_rqa_measures = [
+    "recurrence_rate",
+    "determinism",
+    "mean_line",
+    "max_line",
+    "laminarity",
+    "trapping_time",
+]
+
+
+def embed_series(series, dimension=1, delay=1):
+    """
+    Embed a time series in delay coordinates.
+
+    Arguments
+    ---------
+    series: array-like
+        one-dimensional time series, such as one column of simulate's output
+    dimension: int
+        number of delay coordinates of each embedded point
+    delay: int
+        number of time steps between delay coordinates
+
+    Returns
+    -------
+    numpy.ndarray
+        array of shape (len(series) - (dimension - 1) * delay, dimension)
+    """
+    series = np.asarray(series, dtype=np.float64)
+    num_points = len(series) - (dimension - 1) * delay
+    if dimension < 1 or delay < 1 or num_points < 1:
+        raise ValueError("series is too short for the embedding dimension and delay")
+    return np.column_stack([series[i * delay : i * delay + num_points] for i in range(dimension)])
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _is_recurrent(points, i, j, threshold):
+    # points recur when they are within threshold in every coordinate
+    for d in range(points.shape[1]):
+        if abs(points[i, d] - points[j, d]) > threshold:
+            return False
+    return True
+
+
+@jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+def _pack_recurrences(points, threshold, out):
+    # set the bits of each row in parallel, most significant bit first like
+    # numpy.packbits, so each thread only writes its own rows
+    for i in prange(len(points)):
+        for j in range(len(points)):
+            if _is_recurrent(points, i, j, threshold):
+                out[i, j >> 3] |= np.uint8(128 >> (j & 7))
+    return out
+
+
+@jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+def _diagonal_lines(points, threshold, theiler_window, min_line):
+    # walk each diagonal above the theiler window in parallel, keeping only
+    # running line lengths, and count its recurrences, the recurrences on
+    # lines of at least min_line, those lines, and the longest line
+    num_points = len(points)
+    num_diagonals = max(num_points - theiler_window, 0)
+    counts = np.zeros((num_diagonals, 4), dtype=np.int64)
+    for k in prange(num_diagonals):
+        offset = k + theiler_window
+        line = 0
+        for i in range(num_points - offset + 1):
+            if i < num_points - offset and _is_recurrent(points, i, i + offset, threshold):
+                counts[k, 0] += 1
+                line += 1
+            else:
+                if line >= min_line:
+                    counts[k, 1] += line
+                    counts[k, 2] += 1
+                counts[k, 3] = max(counts[k, 3], line)
+                line = 0
+    return counts
+
+
+@jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+def _vertical_lines(points, threshold, theiler_window, min_line):
+    # walk each column in parallel, treating the theiler window as not
+    # recurrent, and count the recurrences on vertical lines of at least
+    # min_line and those lines
+    num_points = len(points)
+    counts = np.zeros((num_points, 2), dtype=np.int64)
+    for j in prange(num_points):
+        line = 0
+        for i in range(num_points + 1):
+            if (
+                i < num_points
+                and abs(i - j) >= theiler_window
+                and _is_recurrent(points, i, j, threshold)
+            ):
+                line += 1
+            else:
+                if line >= min_line:
+                    counts[j, 0] += line
+                    counts[j, 1] += 1
+                line = 0
+    return counts
+
+
+def recurrence_matrix(series, threshold, dimension=1, delay=1):
+    """
+    Build a bit-packed recurrence matrix of a time series.
+
+    Entry (i, j) is set when embedded points i and j are within threshold of
+    each other in every coordinate. Rows are packed 8 entries per byte, most
+    significant bit first, so the matrix takes an eighth of the memory of a
+    boolean one. numpy.unpackbits(matrix, axis=1, count=n) unpacks it.
+
+    Arguments
+    ---------
+    series: array-like
+        one-dimensional time series, such as one column of simulate's output
+    threshold: float
+        largest distance at which two points recur
+    dimension: int
+        number of delay coordinates of each embedded point
+    delay: int
+        number of time steps between delay coordinates
+
+    Returns
+    -------
+    numpy.ndarray
+        uint8 array of shape (n, ceil(n / 8)) for n embedded points
+    """
+    points = embed_series(series, dimension=dimension, delay=delay)
+    out = np.zeros((len(points), (len(points) + 7) // 8), dtype=np.uint8)
+    return _pack_recurrences(points, float(threshold), out)
+
+
+def _quantify_series(series, threshold, dimension, delay, theiler_window, min_line, min_vertical):
+    if theiler_window < 1:
+        raise ValueError("theiler_window must be at least 1 to exclude the main diagonal")
+    points = embed_series(series, dimension=dimension, delay=delay)
+    num_points = len(points)
+    diagonals = _diagonal_lines(points, float(threshold), theiler_window, min_line)
+    verticals = _vertical_lines(points, float(threshold), theiler_window, min_vertical)
+
+    # the matrix is symmetric, so each diagonal above the theiler window
+    # stands for itself and its mirror image below it
+    recurrences = 2 * diagonals[:, 0].sum()
+    cells = (
+        num_points**2
+        - num_points * (2 * theiler_window - 1)
+        + theiler_window * (theiler_window - 1)
+    )
+    diagonal_points = 2 * diagonals[:, 1].sum()
+    diagonal_lines = 2 * diagonals[:, 2].sum()
+    vertical_points = verticals[:, 0].sum()
+    vertical_lines = verticals[:, 1].sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return [
+            np.divide(recurrences, cells) if cells > 0 else np.nan,
+            np.divide(diagonal_points, recurrences),
+            np.divide(diagonal_points, diagonal_lines),
+            diagonals[:, 3].max() if len(diagonals) > 0 else 0,
+            np.divide(vertical_points, recurrences),
+            np.divide(vertical_points, vertical_lines),
+        ]
+
+
+def recurrence_quantification(
+    series,
+    threshold=0.01,
+    dimension=1,
+    delay=1,
+    theiler_window=1,
+    min_line=2,
+    min_vertical=2,
+):
+    """
+    Calculate recurrence quantification measures of time series.
+
+    The recurrence matrix is never stored. Its diagonals and columns are
+    walked in parallel in jitted kernels that only keep running line lengths
+    and a few counts per diagonal or column, so memory use grows linearly
+    with the length of the series. Recurrences closer to the main diagonal
+    than theiler_window are excluded.
+
+    Arguments
+    ---------
+    series: array-like or DataFrame
+        one-dimensional time series, or simulate's output to quantify each
+        growth rate's column
+    threshold: float
+        largest distance at which two points recur
+    dimension: int
+        number of delay coordinates of each embedded point
+    delay: int
+        number of time steps between delay coordinates
+    theiler_window: int
+        number of diagonals around the main diagonal to exclude, 1 for just
+        the main diagonal
+    min_line: int
+        shortest diagonal line counted by determinism
+    min_vertical: int
+        shortest vertical line counted by laminarity
+
+    Returns
+    -------
+    Series or DataFrame
+        recurrence rate, determinism, mean and max diagonal line length,
+        laminarity, and trapping time, with one row per growth rate if series
+        is a DataFrame
+    """
+    kwargs = dict(
+        threshold=threshold,
+        dimension=dimension,
+        delay=delay,
+        theiler_window=theiler_window,
+        min_line=min_line,
+        min_vertical=min_vertical,
+    )
+    if isinstance(series, pd.DataFrame):
+        values = [_quantify_series(series[col], **kwargs) for col in series.columns]
+        return pd.DataFrame(
+            values, index=pd.Index(series.columns, name="rate"), columns=_rqa_measures
+        )
+    return pd.Series(_quantify_series(series, **kwargs), index=_rqa_measures)
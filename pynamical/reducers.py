@@ -0,0 +1,384 @@
+"""Fold orbits into fixed-size statistics without storing their trajectories."""
+
+import functools
+
+import numpy as np
+import pandas as pd
+from numba import jit
+from numba import prange
+
+from .pynamical import get_jit_model
+from .pynamical import logistic_map
+
+__all__ = [
+    "make_jit_reducer",
+    "reduce_orbits",
+    "make_jit_histogram",
+    "invariant_density",
+    "attractor_stats",
+    "attractor_quantiles",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_reducer(model, fold):
+    """
+    Create a jitted, parallel reducer function for a model and a fold.
+
+    The reducer iterates the model once per growth rate, in parallel across
+    rates, and passes each kept population value to fold(acc, pop), which
+    updates that rate's row of accumulators in place. Nothing else is stored,
+    so memory use doesn't depend on the number of generations. Reducers are
+    cached per model and fold, so repeated calls reuse them.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    fold: function
+        jitted function taking a 1-D accumulator array and a population value
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_reducer(rates, num_gens, num_discard, initial_pop, acc):
+        for rate_num in prange(len(rates)):
+            rate = rates[rate_num]
+            pop = initial_pop
+
+            # first run it num_discard times and ignore the results
+            for _ in range(num_discard):
+                pop = model(pop, rate)
+
+            # then fold each of the num_gens values into the accumulators
+            for _ in range(num_gens):
+                fold(acc[rate_num], pop)
+                pop = model(pop, rate)
+
+        return acc
+
+    return jit_reducer
+
+
+def reduce_orbits(
+    fold,
+    acc_init,
+    model=logistic_map,
+    num_gens=50,
+    rate_min=0.5,
+    rate_max=4,
+    num_rates=8,
+    num_discard=0,
+    initial_pop=0.5,
+):
+    """
+    Fold each rate's orbit into a row of accumulators while iterating it.
+
+    Arguments
+    ---------
+    fold: function
+        jitted function taking a 1-D accumulator array and a population value
+        and updating the accumulators in place
+    acc_init: list
+        initial values of one rate's accumulators
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model, between 0 and 4
+    rate_max: float
+        the last growth rate for the model, between 0 and 4
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model, between 0 and 1
+
+    Returns
+    -------
+    numpy.ndarray
+        array of shape (num_rates, len(acc_init)) of final accumulators
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    acc = np.tile(np.asarray(acc_init, dtype=np.float64), (num_rates, 1))
+    reducer = make_jit_reducer(model, fold)
+    return reducer(rates, num_gens, num_discard, float(initial_pop), acc)
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_histogram(model):
+    """
+    Create a jitted, parallel histogram function for a model.
+
+    The histogram function counts how many kept population values fall in
+    each of the bins evenly spaced between pop_min and pop_max, in parallel
+    across rates. Values outside the bins are not counted.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_histogram(rates, num_gens, num_discard, initial_pop, pop_min, pop_max, bins):
+        counts = np.zeros(shape=(len(rates), bins), dtype=np.int64)
+        scale = bins / (pop_max - pop_min)
+
+        for rate_num in prange(len(rates)):
+            rate = rates[rate_num]
+            pop = initial_pop
+
+            # first run it num_discard times and ignore the results
+            for _ in range(num_discard):
+                pop = model(pop, rate)
+
+            # then count each of the num_gens values in its bin
+            for _ in range(num_gens):
+                if pop_min <= pop <= pop_max:
+                    bin_num = min(int((pop - pop_min) * scale), bins - 1)
+                    counts[rate_num, bin_num] += 1
+                pop = model(pop, rate)
+
+        return counts
+
+    return jit_histogram
+
+
+def _get_histogram(
+    model, num_gens, rate_min, rate_max, num_rates, num_discard, initial_pop, bins, pop_min, pop_max
+):
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    histogram = make_jit_histogram(model)
+    counts = histogram(
+        rates, num_gens, num_discard, float(initial_pop), float(pop_min), float(pop_max), bins
+    )
+    return rates, counts
+
+
+def invariant_density(
+    model=logistic_map,
+    num_gens=100000,
+    rate_min=3.5,
+    rate_max=4,
+    num_rates=100,
+    num_discard=1000,
+    initial_pop=0.5,
+    bins=100,
+    pop_min=0,
+    pop_max=1,
+    density=True,
+):
+    """
+    Estimate the invariant density of the model's attractor at each rate.
+
+    Each orbit is binned while it is iterated, so memory use depends on the
+    number of rates and bins, but not on the number of generations.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model, between 0 and 4
+    rate_max: float
+        the last growth rate for the model, between 0 and 4
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model, between 0 and 1
+    bins: int
+        number of bins evenly spaced between pop_min and pop_max
+    pop_min: float
+        lower edge of the first bin
+    pop_max: float
+        upper edge of the last bin
+    density: bool
+        if True, normalize each rate's counts so they integrate to 1 over the
+        bins, if False, return the raw counts
+
+    Returns
+    -------
+    DataFrame
+        one row for each growth rate and one column for each bin center
+    """
+    rates, counts = _get_histogram(
+        model,
+        num_gens,
+        rate_min,
+        rate_max,
+        num_rates,
+        num_discard,
+        initial_pop,
+        bins,
+        pop_min,
+        pop_max,
+    )
+    edges = np.linspace(pop_min, pop_max, bins + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    if density:
+        totals = counts.sum(axis=1, keepdims=True)
+        values = counts / np.where(totals > 0, totals, 1) / np.diff(edges)
+    else:
+        values = counts
+
+    return pd.DataFrame(values, index=pd.Index(rates, name="rate"), columns=centers)
+
+
+@jit(cache=True, nopython=True)  # pragma: no cover
+def _fold_stats(acc, pop):
+    # accumulators are min, max, count, mean, and sum of squared differences
+    # from the mean, updated with Welford's algorithm
+    acc[0] = min(acc[0], pop)
+    acc[1] = max(acc[1], pop)
+    acc[2] += 1
+    delta = pop - acc[3]
+    acc[3] += delta / acc[2]
+    acc[4] += delta * (pop - acc[3])
+
+
+def attractor_stats(
+    model=logistic_map,
+    num_gens=100000,
+    rate_min=3.5,
+    rate_max=4,
+    num_rates=100,
+    num_discard=1000,
+    initial_pop=0.5,
+):
+    """
+    Calculate the min, max, mean, and standard deviation of each rate's orbit.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model, between 0 and 4
+    rate_max: float
+        the last growth rate for the model, between 0 and 4
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model, between 0 and 1
+
+    Returns
+    -------
+    DataFrame
+        one row for each growth rate, with columns min, max, mean, and std
+    """
+    acc = reduce_orbits(
+        fold=_fold_stats,
+        acc_init=[np.inf, -np.inf, 0, 0, 0],
+        model=model,
+        num_gens=num_gens,
+        rate_min=rate_min,
+        rate_max=rate_max,
+        num_rates=num_rates,
+        num_discard=num_discard,
+        initial_pop=initial_pop,
+    )
+    count = np.where(acc[:, 2] > 0, acc[:, 2], 1)
+    stats = {
+        "min": acc[:, 0],
+        "max": acc[:, 1],
+        "mean": acc[:, 3],
+        "std": np.sqrt(acc[:, 4] / count),
+    }
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    return pd.DataFrame(stats, index=pd.Index(rates, name="rate"))
+
+
+def attractor_quantiles(
+    model=logistic_map,
+    num_gens=100000,
+    rate_min=3.5,
+    rate_max=4,
+    num_rates=100,
+    num_discard=1000,
+    initial_pop=0.5,
+    quantiles=(0.05, 0.25, 0.5, 0.75, 0.95),
+    bins=10000,
+    pop_min=0,
+    pop_max=1,
+):
+    """
+    Estimate quantiles of each rate's orbit from a fine histogram.
+
+    Quantiles are interpolated linearly within the histogram bins, so they
+    are accurate to within one bin width, (pop_max - pop_min) / bins.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model, between 0 and 4
+    rate_max: float
+        the last growth rate for the model, between 0 and 4
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model, between 0 and 1
+    quantiles: list
+        the quantiles to estimate, between 0 and 1
+    bins: int
+        number of bins evenly spaced between pop_min and pop_max
+    pop_min: float
+        lower edge of the first bin
+    pop_max: float
+        upper edge of the last bin
+
+    Returns
+    -------
+    DataFrame
+        one row for each growth rate and one column for each quantile
+    """
+    rates, counts = _get_histogram(
+        model,
+        num_gens,
+        rate_min,
+        rate_max,
+        num_rates,
+        num_discard,
+        initial_pop,
+        bins,
+        pop_min,
+        pop_max,
+    )
+    edges = np.linspace(pop_min, pop_max, bins + 1)
+
+    # interpolate each quantile along the cumulative distribution, which is
+    # piecewise linear between the bin edges
+    values = np.full((num_rates, len(quantiles)), np.nan)
+    for rate_num, rate_counts in enumerate(counts):
+        total = rate_counts.sum()
+        if total > 0:
+            cdf = np.concatenate([[0], np.cumsum(rate_counts)]) / total
+            values[rate_num] = [edges[0] if q <= 0 else np.interp(q, cdf, edges) for q in quantiles]
+
+    return pd.DataFrame(values, index=pd.Index(rates, name="rate"), columns=list(quantiles))
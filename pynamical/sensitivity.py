@@ -0,0 +1,276 @@
+"""Measure how quickly nearby orbits diverge, in batches across growth rates."""
+
+import functools
+
+import numpy as np
+import pandas as pd
+from numba import jit
+from numba import prange
+
+from .pynamical import get_jit_model
+from .pynamical import get_model_derivative
+from .pynamical import logistic_map
+
+__all__ = [
+    "make_jit_divergence",
+    "orbit_divergence",
+    "make_jit_lyapunov_image",
+    "lyapunov_image",
+]
+
+# number of derivatives multiplied together between logarithms, small enough
+# that the product can't overflow or underflow for reasonable maps
+_log_every = 16
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_divergence(model):
+    """
+    Create a jitted, parallel function that co-iterates nearby orbit pairs.
+
+    For each growth rate, in parallel across rates, the function iterates
+    each reference orbit num_discard times to settle it onto the attractor,
+    then iterates it alongside a copy displaced by perturbation. Every
+    renorm_every generations, the copy is pulled back to the perturbation
+    distance in the same direction and the log of the stretch is banked, so
+    the separation never saturates at the size of the attractor. Functions
+    are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_divergence(
+        rates, initial_pops, num_gens, num_discard, perturbation, renorm_every, curves, exponents
+    ):
+        num_pairs = len(initial_pops)
+        for rate_num in prange(len(rates)):
+            rate = rates[rate_num]
+
+            # number of pairs whose orbits haven't collapsed onto each other,
+            # so have a finite log separation, at each generation
+            counts = np.zeros(num_gens)
+            for pair_num in range(num_pairs):
+                pop = initial_pops[pair_num]
+                for _ in range(num_discard):
+                    pop = model(pop, rate)
+                other = pop + perturbation
+
+                # total log stretch banked at renormalizations so far
+                banked = 0.0
+                log_separation = 0.0
+                for gen_num in range(num_gens):
+                    pop = model(pop, rate)
+                    other = model(other, rate)
+                    separation = abs(other - pop)
+                    log_separation = banked + np.log(separation / perturbation)
+                    if separation > 0:
+                        curves[rate_num, gen_num] += log_separation
+                        counts[gen_num] += 1
+                    if (gen_num + 1) % renorm_every == 0 and separation > 0:
+                        banked = log_separation
+                        other = pop + perturbation * np.sign(other - pop)
+                exponents[rate_num, pair_num] = log_separation / num_gens
+
+            for gen_num in range(num_gens):
+                if counts[gen_num] > 0:
+                    curves[rate_num, gen_num] /= counts[gen_num]
+                else:
+                    curves[rate_num, gen_num] = -np.inf
+        return curves, exponents
+
+    return jit_divergence
+
+
+def orbit_divergence(
+    model=logistic_map,
+    num_gens=100,
+    rate_min=3.5,
+    rate_max=4,
+    num_rates=100,
+    num_discard=1000,
+    num_pairs=10,
+    pop_min=0.1,
+    pop_max=0.9,
+    perturbation=1e-9,
+    renorm_every=10,
+):
+    """
+    Measure the divergence of nearby orbit pairs across growth rates.
+
+    Each pair starts from a reference orbit and a copy displaced by
+    perturbation, and the log of their separation over the perturbation is
+    tracked with periodic renormalization. Its slope is the finite-time
+    Lyapunov exponent: positive where nearby orbits diverge exponentially.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of generations to track each pair's separation for
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to settle each reference orbit before perturbing
+    num_pairs: int
+        how many orbit pairs to track per growth rate
+    pop_min: float
+        the first reference orbit's starting population
+    pop_max: float
+        the last reference orbit's starting population
+    perturbation: float
+        initial and renormalized distance between the orbits of each pair
+    renorm_every: int
+        number of generations between renormalizations
+
+    Returns
+    -------
+    tuple
+        (curves, exponents), where curves is an array of shape (num_rates,
+        num_gens) of the log separation after each generation averaged over
+        the pairs that haven't collapsed, -inf once they all have, and
+        exponents is an array of shape (num_rates, num_pairs)
+        of each pair's finite-time exponent, -inf if the pair collapsed
+    """
+    if renorm_every < 1:
+        raise ValueError("renorm_every must be at least 1")
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    initial_pops = np.linspace(pop_min, pop_max, num_pairs)
+    curves = np.zeros((num_rates, num_gens))
+    exponents = np.empty((num_rates, num_pairs))
+    jit_divergence = make_jit_divergence(model)
+    return jit_divergence(
+        rates,
+        initial_pops,
+        num_gens,
+        num_discard,
+        float(perturbation),
+        renorm_every,
+        curves,
+        exponents,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_lyapunov_image(model):
+    """
+    Create a jitted, parallel function that renders a Lyapunov image.
+
+    For each pixel, in parallel across rows, the function iterates the model
+    with its growth rate switching between a and b following the forcing
+    sequence, and averages the log of the absolute derivative along the
+    orbit after the warm-up generations. Derivatives are multiplied together
+    and only their product's log is taken every few generations, which saves
+    most of the logarithms. Functions are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+
+    Returns
+    -------
+    function
+    """
+    derivative = get_model_derivative(model)
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_lyapunov_image(a_rates, b_rates, sequence, num_warmup, num_gens, initial_pop, out):
+        seq_len = len(sequence)
+        for a_num in prange(len(a_rates)):
+            for b_num in range(len(b_rates)):
+                rates = (a_rates[a_num], b_rates[b_num])
+                pop = initial_pop
+                for gen_num in range(num_warmup):
+                    pop = model(pop, rates[sequence[gen_num % seq_len]])
+
+                total = 0.0
+                product = 1.0
+                for gen_num in range(num_warmup, num_warmup + num_gens):
+                    rate = rates[sequence[gen_num % seq_len]]
+                    product *= abs(derivative(pop, rate))
+                    pop = model(pop, rate)
+                    if (gen_num - num_warmup) % _log_every == _log_every - 1:
+                        total += np.log(product)
+                        product = 1.0
+                out[a_num, b_num] = (total + np.log(product)) / num_gens
+        return out
+
+    return jit_lyapunov_image
+
+
+def lyapunov_image(
+    model=logistic_map,
+    sequence="AB",
+    a_min=2,
+    a_max=4,
+    num_a=500,
+    b_min=2,
+    b_max=4,
+    num_b=500,
+    num_warmup=100,
+    num_gens=1000,
+    initial_pop=0.5,
+):
+    """
+    Calculate the Lyapunov exponent over a plane of two forced growth rates.
+
+    The growth rate of each iteration is a or b, cycling through sequence,
+    like the Markus-Lyapunov fractals of the logistic map. Negative exponents
+    mark stable orbits and positive ones chaos. Pass the result to basin_plot
+    to render it.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map
+    sequence: string
+        forcing sequence of the letters A and B, such as "AB" or "AABAB"
+    a_min: float
+        the first value of growth rate a
+    a_max: float
+        the last value of growth rate a
+    num_a: int
+        how many values of a between min and max to use
+    b_min: float
+        the first value of growth rate b
+    b_max: float
+        the last value of growth rate b
+    num_b: int
+        how many values of b between min and max to use
+    num_warmup: int
+        number of generations to discard before averaging
+    num_gens: int
+        number of generations to average the exponent over
+    initial_pop: float
+        starting population of every orbit
+
+    Returns
+    -------
+    DataFrame
+        one row for each value of a and one column for each value of b
+    """
+    sequence = sequence.upper()
+    if not sequence or set(sequence) - set("AB"):
+        raise ValueError("sequence must be a non-empty string of the letters A and B")
+    sequence = np.array([letter == "B" for letter in sequence], dtype=np.int64)
+    a_rates = np.linspace(a_min, a_max, num_a)
+    b_rates = np.linspace(b_min, b_max, num_b)
+    out = np.empty((num_a, num_b))
+    jit_lyapunov_image = make_jit_lyapunov_image(model)
+    jit_lyapunov_image(a_rates, b_rates, sequence, num_warmup, num_gens, float(initial_pop), out)
+    return pd.DataFrame(out, index=pd.Index(a_rates, name="a"), columns=pd.Index(b_rates, name="b"))
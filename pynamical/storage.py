@@ -0,0 +1,415 @@
+"""Stream simulations to columnar files and read them back by rate range."""
+
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .pynamical import logistic_map
+from .pynamical import make_jit_rate_simulator
+from .quantization import QuantizedPops
+
+__all__ = [
+    "iterate_simulation",
+    "write_pops",
+    "read_pops",
+    "write_points",
+    "read_points",
+]
+
+# file extensions of the supported formats
+_formats = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather", ".npz": "npz"}
+
+# schema metadata key holding what's needed to rebuild the written object,
+# like the columns that were index levels or the quantization settings
+_metadata_key = b"pynamical"
+
+
+def iterate_simulation(
+    model=logistic_map,
+    num_gens=50,
+    rate_min=0.5,
+    rate_max=4,
+    num_rates=8,
+    num_discard=0,
+    initial_pop=0.5,
+    chunk_rates=100,
+):
+    """
+    Simulate the model in chunks of growth rates, yielding each chunk.
+
+    Concatenating the chunks along the columns gives simulate's output, but
+    only one chunk is in memory at a time, so large sweeps can be streamed
+    to disk with write_pops.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of iterations to run the model
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before keeping population values
+    initial_pop: float
+        starting population when you run the model
+    chunk_rates: int
+        how many growth rates to simulate per chunk
+
+    Returns
+    -------
+    generator
+        yields DataFrames with one column for each growth rate in the chunk
+        and one row for each generation
+    """
+    if chunk_rates < 1:
+        raise ValueError("chunk_rates must be at least 1")
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    jit_rate_simulator = make_jit_rate_simulator(model)
+    return _simulation_chunks(
+        jit_rate_simulator, rates, num_gens, num_discard, float(initial_pop), chunk_rates
+    )
+
+
+def _simulation_chunks(jit_rate_simulator, rates, num_gens, num_discard, initial_pop, chunk_rates):
+    for start in range(0, len(rates), chunk_rates):
+        chunk = rates[start : start + chunk_rates]
+        pops = jit_rate_simulator(chunk, num_gens, num_discard, initial_pop)
+        yield pd.DataFrame(pops, columns=chunk)
+
+
+def _get_format(path, format):
+    if format is None:
+        format = _formats.get(os.path.splitext(path)[1].lower())
+    if format not in _formats.values():
+        raise ValueError(f"format must be one of {sorted(set(_formats.values()))}")
+    return format
+
+
+def _import_pyarrow():
+    # pyarrow is an optional dependency, only needed for parquet and feather
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is required to read and write parquet and feather files")
+    return pyarrow
+
+
+def _rate_rows(pops):
+    # one row per rate, holding the rate and the rate's populations, so only
+    # the transpose of each chunk is ever copied and rates keep their dtype
+    return {
+        "rate": pops.columns.to_numpy(dtype=np.float64),
+        "pops": np.ascontiguousarray(pops.to_numpy().T),
+    }
+
+
+def _long_quantized(pops, chunk_rates):
+    # one row per code, chunked by rate, in the order of pops.codes
+    for start in range(0, len(pops.rates), chunk_rates):
+        end = min(start + chunk_rates, len(pops.rates))
+        counts = np.diff(pops.offsets[start : end + 1])
+        yield {
+            "rate": np.repeat(pops.rates[start:end], counts),
+            "code": pops.codes[pops.offsets[start] : pops.offsets[end]],
+        }
+
+
+def _to_arrow(pa, columns):
+    # 2d arrays become fixed size list columns, one list per row, without
+    # copying their values
+    arrays = {}
+    for name, values in columns.items():
+        if values.ndim == 2:
+            flat = pa.array(values.ravel())
+            arrays[name] = pa.FixedSizeListArray.from_arrays(flat, values.shape[1])
+        else:
+            arrays[name] = pa.array(values)
+    return pa.table(arrays)
+
+
+def _from_arrow(pa, table):
+    # the inverse of _to_arrow
+    columns = {}
+    for field in table.schema:
+        column = table.column(field.name).combine_chunks()
+        if pa.types.is_fixed_size_list(field.type):
+            values = column.flatten().to_numpy(zero_copy_only=False)
+            columns[field.name] = values.reshape(-1, field.type.list_size)
+        else:
+            columns[field.name] = column.to_numpy(zero_copy_only=False)
+    return columns
+
+
+def _write_tables(tables, path, format, compression, metadata):
+    # write each dict of column arrays as it arrives, as a parquet row group,
+    # an arrow record batch, or a set of arrays in the npz archive
+    if format == "npz":
+        zip_compression = zipfile.ZIP_STORED if compression is None else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(path, mode="w", compression=zip_compression) as archive:
+            num_chunks = 0
+            for columns in tables:
+                for name, values in columns.items():
+                    with archive.open(f"{num_chunks}/{name}.npy", mode="w") as f:
+                        np.lib.format.write_array(f, values)
+                num_chunks += 1
+                names = list(columns)
+            if num_chunks == 0:
+                raise ValueError("there is nothing to write")
+            with archive.open("metadata.npy", mode="w") as f:
+                metadata = {**metadata, "columns": names, "chunks": num_chunks}
+                np.lib.format.write_array(f, np.array(json.dumps(metadata)))
+        return
+
+    pa = _import_pyarrow()
+    writer = None
+    try:
+        for columns in tables:
+            table = _to_arrow(pa, columns)
+            if writer is None:
+                schema = table.schema.with_metadata({_metadata_key: json.dumps(metadata).encode()})
+                if format == "parquet":
+                    writer = pa.parquet.ParquetWriter(path, schema, compression=compression)
+                else:
+                    options = pa.ipc.IpcWriteOptions(compression=compression)
+                    writer = pa.ipc.new_file(path, schema, options=options)
+            writer.write_table(table.replace_schema_metadata(schema.metadata))
+        if writer is None:
+            raise ValueError("there is nothing to write")
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _read_table(path, format, rate_column, rate_min, rate_max):
+    # read the file back as a dict of column arrays, skipping chunks entirely
+    # outside the rate range
+    lo = -np.inf if rate_min is None else rate_min
+    hi = np.inf if rate_max is None else rate_max
+
+    if format == "npz":
+        with np.load(path) as archive:
+            metadata = json.loads(archive["metadata"].item())
+            chunks = []
+            for chunk_num in range(metadata["chunks"]):
+                rates = archive[f"{chunk_num}/{rate_column}"]
+                keep = (rates >= lo) & (rates <= hi)
+                if keep.any() or (chunk_num == 0 and not chunks):
+                    chunks.append(
+                        {name: archive[f"{chunk_num}/{name}"][keep] for name in metadata["columns"]}
+                    )
+        # the first chunk is kept even if it's empty, for its dtypes and shapes
+        if len(chunks) > 1 and not len(chunks[0][rate_column]):
+            chunks = chunks[1:]
+        columns = {
+            name: np.concatenate([chunk[name] for chunk in chunks]) for name in metadata["columns"]
+        }
+        return columns, metadata
+
+    pa = _import_pyarrow()
+    if format == "parquet":
+        filters = [(rate_column, ">=", lo), (rate_column, "<=", hi)]
+        table = pa.parquet.read_table(path, filters=filters)
+    else:
+        # read only the record batches whose rates overlap the range
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            batches = []
+            for batch_num in range(reader.num_record_batches):
+                batch = reader.get_batch(batch_num)
+                rates = batch.column(rate_column)
+                bounds = pa.compute.min_max(rates)
+                if not len(rates) or bounds["min"].as_py() > hi or bounds["max"].as_py() < lo:
+                    continue
+                mask = pa.compute.and_(
+                    pa.compute.greater_equal(rates, lo), pa.compute.less_equal(rates, hi)
+                )
+                batches.append(batch.filter(mask))
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+    metadata = json.loads((table.schema.metadata or {}).get(_metadata_key, b"{}"))
+    return _from_arrow(pa, table), metadata
+
+
+def _read_metadata(path, format):
+    # read only the metadata, without reading any columns
+    if format == "npz":
+        with np.load(path) as archive:
+            return json.loads(archive["metadata"].item())
+    pa = _import_pyarrow()
+    if format == "parquet":
+        schema = pa.parquet.read_schema(path)
+    else:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+    return json.loads((schema.metadata or {}).get(_metadata_key, b"{}"))
+
+
+def write_pops(pops, path, format=None, compression="zstd", chunk_rates=100):
+    """
+    Write simulation output to a compressed columnar file, chunk by chunk.
+
+    The file holds one row per growth rate, with a rate column and a pops
+    column of the rate's population in each generation, so the rates keep
+    their float dtype and reading a range of rates skips the rest. Each chunk
+    is written as soon as it arrives, copying only its transpose, so passing
+    iterate_simulation's output never holds the whole sweep in memory. QuantizedPops are written as rate
+    and code columns, in chunks of chunk_rates rates, with their scale and
+    offset in the file's metadata.
+
+    Arguments
+    ---------
+    pops: DataFrame, iterable, or QuantizedPops
+        output of simulate, an iterable of such DataFrames like
+        iterate_simulation's output, or output of quantize_pops
+    path: string
+        path of the file to write
+    format: string
+        "parquet", "feather", or "npz", or None to infer it from the path's
+        extension: .parquet, .feather or .arrow, or .npz
+    compression: string
+        codec for parquet ("zstd", "snappy", "gzip", etc.) or feather ("zstd"
+        or "lz4"), or None for no compression. npz files are deflated unless
+        it's None
+    chunk_rates: int
+        how many growth rates of QuantizedPops to write per chunk
+
+    Returns
+    -------
+    None
+    """
+    format = _get_format(path, format)
+    if isinstance(pops, QuantizedPops):
+        quantization = {"scale": pops.scale, "offset": pops.offset, "num_gens": pops.num_gens}
+        tables = _long_quantized(pops, chunk_rates)
+        _write_tables(tables, path, format, compression, {"quantization": quantization})
+        return
+    if isinstance(pops, pd.DataFrame):
+        pops = [pops]
+    _write_tables((_rate_rows(chunk) for chunk in pops), path, format, compression, {})
+
+
+def read_pops(path, rate_min=None, rate_max=None, format=None):
+    """
+    Read simulation output written by write_pops.
+
+    Only the growth rates between rate_min and rate_max are read. Parquet
+    files skip row groups outside the range using their statistics, feather
+    files skip record batches outside it without reading their populations
+    from the memory-mapped file, and npz files skip chunks outside it without
+    decompressing their populations.
+
+    Arguments
+    ---------
+    path: string
+        path of the file to read
+    rate_min: float
+        the first growth rate to read, or None for no lower limit
+    rate_max: float
+        the last growth rate to read, or None for no upper limit
+    format: string
+        "parquet", "feather", or "npz", or None to infer it from the path
+
+    Returns
+    -------
+    DataFrame or QuantizedPops
+        one column for each growth rate and one row for each generation, like
+        simulate's output, or QuantizedPops if that's what was written
+    """
+    format = _get_format(path, format)
+    columns, metadata = _read_table(path, format, "rate", rate_min, rate_max)
+    if "quantization" in metadata:
+        # each rate's codes are contiguous, so split them where the rate changes
+        rates = columns["rate"].astype(np.float64)
+        starts = np.flatnonzero(np.diff(rates) != 0) + 1
+        offsets = np.concatenate([[0], starts, [len(rates)]]) if len(rates) else [0]
+        quantization = metadata["quantization"]
+        return QuantizedPops(
+            rates[offsets[:-1]],
+            columns["code"],
+            offsets,
+            quantization["scale"],
+            quantization["offset"],
+            quantization["num_gens"],
+        )
+    return pd.DataFrame(columns["pops"].T, columns=columns["rate"])
+
+
+def write_points(points, path, format=None, compression="zstd"):
+    """
+    Write bifurcation or phase diagram points to a compressed columnar file.
+
+    Index levels, like the phase diagram points' name level, are written as
+    columns and restored as the index by read_points.
+
+    Arguments
+    ---------
+    points: DataFrame
+        output of get_bifurcation_plot_points or get_phase_diagram_points
+    path: string
+        path of the file to write
+    format: string
+        "parquet", "feather", or "npz", or None to infer it from the path
+    compression: string
+        codec for parquet or feather, or None for no compression
+
+    Returns
+    -------
+    None
+    """
+    format = _get_format(path, format)
+    index = None
+    if isinstance(points.index, pd.MultiIndex) or points.index.name is not None:
+        # unnamed levels get placeholder column names, restored on reading
+        names = list(points.index.names)
+        columns = [name or f"level_{i}" for i, name in enumerate(names)]
+        index = {"columns": columns, "names": names}
+        points = points.rename_axis(columns).reset_index()
+    else:
+        points = points.reset_index(drop=True)
+    columns = {name: points[name].to_numpy() for name in points.columns}
+    _write_tables([columns], path, format, compression, {"index": index})
+
+
+def read_points(path, rate_min=None, rate_max=None, format=None):
+    """
+    Read bifurcation or phase diagram points written by write_points.
+
+    Arguments
+    ---------
+    path: string
+        path of the file to read
+    rate_min: float
+        the first growth rate to read, or None for no lower limit
+    rate_max: float
+        the last growth rate to read, or None for no upper limit
+    format: string
+        "parquet", "feather", or "npz", or None to infer it from the path
+
+    Returns
+    -------
+    DataFrame
+        the points with the growth rates in range, where the rate is the x
+        column of bifurcation points and the name index level of phase
+        diagram points
+    """
+    format = _get_format(path, format)
+    index = _read_metadata(path, format).get("index")
+
+    # phase diagram points keep the growth rate in the name index level
+    rate_column = "name" if index and "name" in index["columns"] else "x"
+    columns, _ = _read_table(path, format, rate_column, rate_min, rate_max)
+    df = pd.DataFrame(columns)
+    if index:
+        df = df.set_index(index["columns"])
+        df.index.names = index["names"]
+    return df
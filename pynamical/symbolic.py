@@ -0,0 +1,207 @@
+"""Encode orbits as bit-packed symbol sequences and count their words."""
+
+import functools
+
+import numpy as np
+from numba import jit
+from numba import prange
+
+from .pynamical import get_jit_model
+from .pynamical import logistic_map
+
+__all__ = [
+    "make_jit_symbolic_encoder",
+    "encode_orbits",
+    "unpack_symbols",
+    "word_counts",
+    "block_entropy",
+]
+
+# counts of every possible word are kept per rate, so cap the word length to
+# keep them at 512 KB per rate
+_max_word_length = 16
+
+
+@functools.lru_cache(maxsize=None)
+def make_jit_symbolic_encoder(model):
+    """
+    Create a jitted, parallel function that encodes orbits as packed symbols.
+
+    The encoder iterates the model once per growth rate, in parallel across
+    rates, and writes a 1 bit (R) for each kept population value at or above
+    the partition and a 0 bit (L) for each one below it. Bits are packed 8 per
+    byte, most significant bit first like numpy.packbits, so orbits are never
+    stored as floats. Encoders are cached per model.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+
+    Returns
+    -------
+    function
+    """
+    model = get_jit_model(model)
+
+    @jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+    def jit_encoder(rates, num_gens, num_discard, initial_pop, partition, out):
+        for rate_num in prange(len(rates)):
+            rate = rates[rate_num]
+            pop = initial_pop
+
+            # first run it num_discard times and ignore the results
+            for _ in range(num_discard):
+                pop = model(pop, rate)
+
+            # then pack each of the num_gens symbols into the rate's row
+            byte = 0
+            for gen_num in range(num_gens):
+                byte <<= 1
+                if pop >= partition:
+                    byte |= 1
+                if gen_num & 7 == 7:
+                    out[rate_num, gen_num >> 3] = byte
+                    byte = 0
+                pop = model(pop, rate)
+            if num_gens & 7:
+                out[rate_num, num_gens >> 3] = byte << (8 - (num_gens & 7))
+        return out
+
+    return jit_encoder
+
+
+def encode_orbits(
+    model=logistic_map,
+    num_gens=1000,
+    rate_min=3.5,
+    rate_max=4,
+    num_rates=100,
+    num_discard=1000,
+    initial_pop=0.5,
+    partition=0.5,
+):
+    """
+    Encode each rate's orbit as a bit-packed sequence of L and R symbols.
+
+    A million-generation orbit takes 125 KB instead of the 8 MB its
+    population values would. The default partition is the logistic map's
+    critical point. Values exactly at the partition are encoded as R.
+
+    Arguments
+    ---------
+    model: function
+        the function defining an iterated map to simulate
+    num_gens: int
+        number of symbols to encode per growth rate
+    rate_min: float
+        the first growth rate for the model
+    rate_max: float
+        the last growth rate for the model
+    num_rates: int
+        how many growth rates between min and max to run the model on
+    num_discard: int
+        number of generations to discard before encoding population values
+    initial_pop: float
+        starting population when you run the model
+    partition: float
+        population value separating the L and R symbols
+
+    Returns
+    -------
+    numpy.ndarray
+        uint8 array of shape (num_rates, ceil(num_gens / 8))
+    """
+    rates = np.linspace(rate_min, rate_max, num_rates)
+    out = np.empty((num_rates, (num_gens + 7) // 8), dtype=np.uint8)
+    jit_encoder = make_jit_symbolic_encoder(model)
+    return jit_encoder(rates, num_gens, num_discard, float(initial_pop), float(partition), out)
+
+
+def unpack_symbols(packed, num_symbols):
+    """
+    Unpack bit-packed symbol sequences into strings of L and R.
+
+    Arguments
+    ---------
+    packed: numpy.ndarray
+        output of encode_orbits
+    num_symbols: int
+        number of symbols encoded per row
+
+    Returns
+    -------
+    list
+        one string per row of packed
+    """
+    bits = np.unpackbits(np.atleast_2d(packed), axis=1, count=num_symbols)
+    return ["".join("LR"[bit] for bit in row) for row in bits]
+
+
+@jit(cache=True, nopython=True, parallel=True)  # pragma: no cover
+def _count_words(packed, num_symbols, word_length, counts):
+    # slide a word_length bit window along each row in parallel, reading one
+    # bit at a time straight from the packed bytes
+    mask = (1 << word_length) - 1
+    for row in prange(len(packed)):
+        word = 0
+        for symbol_num in range(num_symbols):
+            bit = (packed[row, symbol_num >> 3] >> (7 - (symbol_num & 7))) & 1
+            word = ((word << 1) | bit) & mask
+            if symbol_num >= word_length - 1:
+                counts[row, word] += 1
+    return counts
+
+
+def word_counts(packed, num_symbols, word_length):
+    """
+    Count the overlapping words of each bit-packed symbol sequence.
+
+    Arguments
+    ---------
+    packed: numpy.ndarray
+        output of encode_orbits
+    num_symbols: int
+        number of symbols encoded per row
+    word_length: int
+        number of symbols per word, up to 16
+
+    Returns
+    -------
+    numpy.ndarray
+        array of shape (rows, 2 ** word_length), where column w counts the
+        words whose symbols, read as binary digits with R as 1, equal w
+    """
+    if not 1 <= word_length <= _max_word_length:
+        raise ValueError(f"word_length must be between 1 and {_max_word_length}")
+    packed = np.atleast_2d(packed)
+    counts = np.zeros((len(packed), 2**word_length), dtype=np.int64)
+    return _count_words(packed, num_symbols, word_length, counts)
+
+
+def block_entropy(packed, num_symbols, word_length):
+    """
+    Calculate the Shannon entropy of each sequence's words of a given length.
+
+    Differences between the block entropies of consecutive word lengths
+    estimate the entropy rate of the symbolic dynamics.
+
+    Arguments
+    ---------
+    packed: numpy.ndarray
+        output of encode_orbits
+    num_symbols: int
+        number of symbols encoded per row
+    word_length: int
+        number of symbols per word, up to 16
+
+    Returns
+    -------
+    numpy.ndarray
+        entropy in bits of each row's word frequencies
+    """
+    counts = word_counts(packed, num_symbols, word_length)
+    totals = counts.sum(axis=1, keepdims=True)
+    freqs = counts / np.where(totals > 0, totals, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(freqs > 0, -freqs * np.log2(freqs), 0).sum(axis=1)
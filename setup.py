@@ -63,4 +63,5 @@ setup(
     packages=["pynamical"],
     python_requires=">=3.8",
     install_requires=INSTALL_REQUIRES,
+    entry_points={"console_scripts": ["pynamical=pynamical.cli:main"]},
 )
@@ -2,6 +2,13 @@
 pynamical tests
 """
 
+import asyncio
+import json
+import math
+import os
+import pickle
+import sys
+
 import matplotlib as mpl
 
 mpl.use("Agg")  # use agg backend so you don't need a display on travis
@@ -11,21 +18,90 @@ import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pytest
 from mpl_toolkits.mplot3d import Axes3D
+import numba
 from numba import jit
 
+from pynamical import AsyncRunner
+from pynamical import BifurcationPlot
+from pynamical import CobwebPlot
+from pynamical import PhaseDiagramPlot
+from pynamical import PlotStyle
+from pynamical import QuantizedPops
+from pynamical import asimulate
+from pynamical import attractor_basins
+from pynamical import attractor_quantiles
+from pynamical import attractor_stats
+from pynamical import block_entropy
+from pynamical import cli
+from pynamical import bifurcation_branches
+from pynamical import basin_plot
 from pynamical import bifurcation_plot
+from pynamical import branch_plot
+from pynamical import cobweb_frames
 from pynamical import cobweb_plot
+from pynamical import continue_orbit
 from pynamical import cubic_map
+from pynamical import differentiate_expression
+from pynamical import encode_orbits
+from pynamical import escape_time
+from pynamical import find_period_doublings
+from pynamical import get_bifurcation_plot_points
+from pynamical import get_cobweb_points
+from pynamical import get_double_double_model
+from pynamical import get_function_points
+from pynamical import get_model_derivative
+from pynamical import get_model_ufunc
+from pynamical import get_default_style
+from pynamical import get_gif_bytes
+from pynamical import get_phase_diagram_points
+from pynamical import get_title_font
+from pynamical import invariant_density
+from pynamical import iterate_lattice
+from pynamical import iterate_simulation
+from pynamical import locate_period_doublings
+from pynamical import lyapunov_image
 from pynamical import logistic_map
+from pynamical import model_from_expression
+from pynamical import orbit_divergence
 from pynamical import phase_diagram
 from pynamical import phase_diagram_3d
+from pynamical import phase_diagram_3d_frames
+from pynamical import precision_report
+from pynamical import profile
+from pynamical import quantize_pops
+from pynamical import read_points
+from pynamical import read_pops
+from pynamical import recurrence_matrix
+from pynamical import run_jobs
+from pynamical import recurrence_quantification
+from pynamical import save_animation
 from pynamical import simulate
+from pynamical import simulate_double_double
+from pynamical import simulate_lattice
+from pynamical import simulate_many
+from pynamical import simulate_noisy
+from pynamical import simulate_rates
 from pynamical import singer_map
+from pynamical import stage
+from pynamical import unpack_symbols
+from pynamical import vectorize_model
+from pynamical import word_counts
+from pynamical import write_points
+from pynamical import write_pops
 
 _img_folder = ".temp"
 
 
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
 def test_simulate():
 
     pops = simulate(
@@ -156,3 +232,659 @@ def test_cobweb_plot():
 
     # returns None
     cobweb_plot(r=3.9, save=False, folder=_img_folder, filename="")
+
+    # jitted and uncompiled cobweb vertices match, with discarded vertices removed
+    x_vals, y_vals = get_cobweb_points(model=logistic_map, r=3.9, x=0.5, n=100, num_discard=10)
+    assert isinstance(x_vals, np.ndarray)
+    assert len(x_vals) == len(y_vals) == 1 + 3 * 100 - 10
+    x_vals_nc, y_vals_nc = get_cobweb_points(
+        model=logistic_map, r=3.9, x=0.5, n=100, num_discard=10, jit=False
+    )
+    assert np.allclose(x_vals, x_vals_nc)
+    assert np.allclose(y_vals, y_vals_nc)
+
+    # undecorated models get jit compiled, or fall back to uncompiled code
+    def sine_map(pop, rate):
+        return rate * math.sin(math.pi * pop)
+
+    def dict_map(pop, rate, params={"scale": 1}):
+        return params["scale"] * rate * math.sin(math.pi * pop)
+
+    x_vals, y_vals = get_cobweb_points(model=sine_map, r=0.9, x=0.5, n=20)
+    assert np.allclose(y_vals[1], 0.9)
+    x_vals_nc, y_vals_nc = get_cobweb_points(model=dict_map, r=0.9, x=0.5, n=20)
+    assert np.allclose(y_vals, y_vals_nc)
+    cobweb_plot(model=sine_map, r=0.9, save=False, show=False, folder=_img_folder)
+    cobweb_plot(model=dict_map, r=0.9, save=False, show=False, folder=_img_folder)
+
+    # errors raised by a compiled model aren't mistaken for compile errors
+    def checked_map(pop, rate):
+        if pop > 1:
+            raise ValueError("pop left the unit interval")
+        return rate * pop * (1 - pop)
+
+    with pytest.raises(ValueError):
+        get_cobweb_points(model=checked_map, r=5, x=0.5, n=5)
+    assert len(get_cobweb_points(model=logistic_map, r=3.9, x=0.5, n=5, num_discard=20)[0]) == 0
+
+    with pytest.raises(ValueError):
+        get_cobweb_points(model=logistic_map, r=3.9, x=0.5, n=5, num_discard=-2)
+
+
+def test_vectorize_model():
+
+    # ufunc evaluation matches calling the model once per value
+    x_vals, y_vals = get_function_points(model=cubic_map, r=3.5, n=100, start=-1, end=1)
+    assert np.allclose(y_vals, [cubic_map(x, 3.5) for x in x_vals])
+
+    @vectorize_model(parallel=True)
+    def tent_map(pop, rate):
+        return rate * min(pop, 1 - pop)
+
+    x_vals, y_vals = get_function_points(model=tent_map, r=1.5, n=100, start=0, end=1)
+    assert np.allclose(y_vals, 1.5 * np.minimum(x_vals, 1 - x_vals))
+
+    # a vectorized model still works with the jitted simulator and cobweb plot
+    pops = simulate(model=tent_map, num_gens=50, rate_min=1, rate_max=2, num_rates=10)
+    assert pops.shape == (50, 10)
+    cobweb_plot(model=tent_map, r=1.5, save=False, show=False, folder=_img_folder)
+
+
+def test_animation():
+
+    frames = list(cobweb_frames(rates=np.linspace(3, 4, 4), dpi=20))
+    assert len(frames) == 4
+    assert frames[0].dtype == np.uint8 and frames[0].shape[2] == 3
+
+    # start numba's threads, then check that rendering in a pool of processes
+    # gives the same frames in the same order without hanging
+    @vectorize_model(parallel=True)
+    def tent_map(pop, rate):
+        return rate * min(pop, 1 - pop)
+
+    assert len(get_function_points(model=tent_map, r=1.5, n=10, start=0, end=1)[1]) == 10
+    frames_pool = cobweb_frames(rates=np.linspace(3, 4, 4), dpi=20, processes=2, chunk_size=1)
+    assert all((f1 == f2).all() for f1, f2 in zip(frames, frames_pool))
+
+    # frames stream straight from the generator into the writers
+    assert get_gif_bytes(frames).startswith(b"GIF")
+    save_animation(cobweb_frames(rates=[3, 4], dpi=20), filename="cobweb", folder=_img_folder)
+
+    # an ffmpeg that exits early raises its error message, rather than a broken pipe
+    frames = (np.zeros((200, 200, 3), dtype=np.uint8) for _ in range(10))
+    with mpl.rc_context({"animation.ffmpeg_path": sys.executable}):
+        with pytest.raises(RuntimeError, match="ffmpeg failed"):
+            save_animation(frames, file_format="mp4", folder=_img_folder)
+    with pytest.raises(ValueError):
+        get_gif_bytes(cobweb_frames(rates=[]))
+
+    pops = simulate(model=cubic_map, num_gens=100, rate_min=3.5, num_rates=3, num_discard=100)
+    frames = phase_diagram_3d_frames(pops, azims=[0, 120, 240], elevs=[10, 20, 30], dpi=20)
+    assert len(list(frames)) == 3
+
+
+def test_live_plots():
+
+    pops = simulate(model=logistic_map, num_gens=50, rate_min=3, rate_max=4, num_rates=20)
+    plot = BifurcationPlot(pops)
+    plot.update(simulate(model=logistic_map, num_gens=50, rate_min=3, rate_max=4, num_rates=30))
+    assert plot.points.get_offsets().shape == (50 * 30, 2)
+    plot.save(folder=_img_folder, filename="live-bifurcation")
+
+    plot = PhaseDiagramPlot(pops.iloc[:, :3], color="viridis")
+    plot.update(pops.iloc[:, :5])
+    assert len(plot.points) == 5
+
+    plot = CobwebPlot(r=3.2)
+    plot.update(r=3.9)
+    assert plot.title_text.get_text() == "Cobweb Plot, r=3.9"
+    assert plot.cobweb_line.get_xdata()[2] == logistic_map(0.5, 3.9)
+
+
+def test_plot_style():
+
+    # the default style is cached and fonts resolve to the same font file
+    assert get_default_style() is get_default_style()
+    assert get_title_font().get_file() == get_title_font(size=10).get_file()
+
+    # passed-in fonts and styles are honored
+    title_font = get_title_font(size=11)
+    style = pickle.loads(pickle.dumps(PlotStyle(cobweb_color="g")))
+    pops = simulate(model=logistic_map, num_gens=20, rate_min=3, rate_max=4, num_rates=5)
+    fig, ax = bifurcation_plot(pops, save=False, show=False, title_font=title_font, style=style)
+    assert ax.title.get_fontsize() == 11
+    fig, ax = cobweb_plot(r=3.9, save=False, show=False, style=style)
+    assert ax.lines[1].get_color() == (0, 0.5, 0, 1)
+
+
+def test_reducers():
+
+    kwargs = dict(model=logistic_map, num_gens=5000, rate_min=3.6, rate_max=4, num_rates=10)
+    pops = simulate(num_discard=100, **kwargs)
+
+    # streaming statistics match the statistics of the stored trajectories
+    stats = attractor_stats(num_discard=100, **kwargs)
+    assert np.allclose(stats["mean"], pops.mean())
+    assert np.allclose(stats["std"], pops.std(ddof=0))
+    assert np.allclose(stats["max"], pops.max())
+
+    density = invariant_density(num_discard=100, bins=50, **kwargs)
+    assert density.shape == (10, 50)
+    assert np.allclose(density.sum(axis=1) / 50, 1)
+
+    # quantiles match in the chaotic regime, where the orbits don't repeat
+    kwargs.update(rate_min=3.9, num_rates=3)
+    quantiles = attractor_quantiles(num_discard=100, quantiles=[0.5], **kwargs)
+    pops = simulate(num_discard=100, **kwargs)
+    assert np.allclose(quantiles[0.5], pops.quantile(0.5), atol=1e-3)
+
+
+def test_continuation():
+
+    # the logistic map's fixed point loses stability at r=3
+    branch = continue_orbit(model=logistic_map, rate_min=2.5, rate_max=3.5, num_rates=101)
+    assert np.allclose(branch[0], 1 - 1 / branch.index)
+    assert np.allclose(find_period_doublings(branch), [3])
+
+    # the cascade continues with the period 2 orbit doubling at 1 + sqrt(6)
+    branches = bifurcation_branches(model=logistic_map, max_period=4, num_rates=1000)
+    assert sorted(branches) == [1, 2, 4]
+    assert np.allclose(find_period_doublings(branches[2]), [1 + math.sqrt(6)], atol=1e-5)
+    fig, ax = branch_plot(branches, save=False, show=False)
+
+    # plain python models are compiled, with numerically estimated derivatives
+    def tent_like(pop, rate):
+        return rate * pop * (1 - pop) * (1 + 0 * pop)
+
+    branch = continue_orbit(model=tent_like, rate_min=2.5, rate_max=3.5, num_rates=101)
+    assert np.allclose(find_period_doublings(branch), [3], atol=1e-5)
+
+
+def test_period_doublings():
+
+    # the logistic map's first doublings are known exactly, and the ratios of
+    # the gaps between doublings converge to feigenbaum's delta
+    doublings = locate_period_doublings(model=logistic_map, num_doublings=10)
+    assert list(doublings["period"]) == [2**k for k in range(10)]
+    assert np.allclose(doublings["rate"][:2], [3, 1 + math.sqrt(6)], rtol=0, atol=1e-12)
+    assert abs(doublings["ratio"].iloc[-1] - 4.669201609) < 1e-5
+
+    # the cubic map's period 2 orbit is born at r=2 and never doubles
+    doublings = locate_period_doublings(model=cubic_map, rate_min=1, initial_pop=0.01)
+    assert np.allclose(doublings["rate"], [2])
+
+
+def test_basins():
+
+    # orbits of the logistic map only escape the unit interval when r > 4
+    escapes = escape_time(model=logistic_map, num_gens=100, rate_min=3.5, rate_max=4.5)
+    assert escapes.dtypes.iloc[0] == np.int8
+    assert (escapes.loc[escapes.index <= 4] == -1).all().all()
+    assert (escapes.loc[escapes.index > 4].iloc[:, 50] > 0).all()
+
+    # the cubic map has one attracting 2 cycle at r=2.5 and two at r=3.2,
+    # besides the unstable fixed points at -1, 0, and 1
+    kwargs = dict(model=cubic_map, num_rates=1, num_pops=101)
+    basins = attractor_basins(rate_min=2.5, rate_max=2.5, **kwargs)
+    assert sorted(set(basins.values.ravel())) == [1, 2, 3, 4]
+    basins = attractor_basins(rate_min=3.2, rate_max=3.2, **kwargs)
+    assert sorted(set(basins.values.ravel())) == [1, 2, 3, 4, 5]
+    fig, ax = basin_plot(attractor_basins(model=cubic_map), save=False, show=False)
+
+
+def test_recurrence():
+
+    # the bit-packed matrix matches a dense one computed with numpy
+    series = simulate(model=logistic_map, num_gens=500, rate_min=3.7, rate_max=3.7, num_rates=1)
+    series = series.iloc[:, 0].values
+    dense = np.abs(series[:, None] - series[None, :]) <= 0.05
+    packed = recurrence_matrix(series, threshold=0.05)
+    assert packed.nbytes == 500 * 63
+    assert (np.unpackbits(packed, axis=1, count=500).astype(bool) == dense).all()
+
+    # the streamed recurrence rate excludes the main diagonal
+    rqa = recurrence_quantification(series, threshold=0.05)
+    assert np.isclose(rqa["recurrence_rate"], (dense.sum() - 500) / (500 * 499))
+    assert 0 < rqa["determinism"] < 1
+
+    # periodic orbits are completely deterministic
+    pops = simulate(model=logistic_map, num_gens=200, rate_min=3.2, rate_max=3.5, num_rates=2)
+    rqa = recurrence_quantification(pops.iloc[100:], threshold=0.01)
+    assert list(rqa.index) == list(pops.columns)
+    assert np.allclose(rqa["determinism"], 1)
+    with pytest.raises(ValueError):
+        recurrence_quantification(series, theiler_window=0)
+
+
+def test_orbit_divergence():
+
+    # nearby orbits converge on the stable 2 cycle at r=3.2 and diverge at
+    # r=4, where the lyapunov exponent is ln(2)
+    curves, exponents = orbit_divergence(
+        model=logistic_map, num_gens=1000, rate_min=3.2, num_rates=2
+    )
+    assert curves.shape == (2, 1000)
+    assert exponents.shape == (2, 10)
+    assert (exponents[0] < 0).all()
+    assert np.allclose(exponents[1], math.log(2), atol=0.05)
+    assert curves[1, -1] > curves[1, 0]
+    with pytest.raises(ValueError):
+        orbit_divergence(renorm_every=0)
+
+    # at the superstable r=2 some pairs collapse onto each other, which
+    # leaves them out of the curves rather than making them -inf
+    curves, exponents = orbit_divergence(num_gens=20, rate_min=2, rate_max=2, num_rates=1)
+    assert np.isneginf(exponents).any() and np.isfinite(exponents).any()
+    assert np.isfinite(curves).all() and (curves < 0).all()
+
+
+def test_symbolic():
+
+    # packed symbols match the simulated orbits split at the critical point
+    kwargs = dict(model=logistic_map, num_gens=21, rate_min=3.5, rate_max=3.9, num_rates=3)
+    pops = simulate(num_discard=10, **kwargs)
+    packed = encode_orbits(num_discard=10, **kwargs)
+    assert packed.shape == (3, 3)
+    expected = ["".join("R" if pop >= 0.5 else "L" for pop in pops[rate]) for rate in pops]
+    assert unpack_symbols(packed, 21) == expected
+
+    # words are counted straight from the packed bits
+    counts = word_counts(packed, 21, 3)
+    assert counts.shape == (3, 8)
+    assert (counts.sum(axis=1) == 19).all()
+    assert counts[0, 0b111] == sum(expected[0][i : i + 3] == "RRR" for i in range(19))
+
+    # the period 4 orbit has 4 distinct words of length 4, the chaotic one more
+    packed = encode_orbits(
+        model=logistic_map, num_gens=10000, rate_min=3.5, rate_max=3.9, num_rates=2
+    )
+    entropy = block_entropy(packed, 10000, 4)
+    assert np.isclose(entropy[0], 2)
+    assert entropy[1] > 2
+    with pytest.raises(ValueError):
+        word_counts(packed, 10000, 17)
+
+
+def test_lattice():
+
+    # diffusive coupling with periodic boundaries matches a numpy version
+    initial_pops = np.linspace(0.1, 0.9, 50)
+    kwargs = dict(model=logistic_map, rate=3.9, coupling=0.3, initial_pops=initial_pops)
+    lattice = simulate_lattice(num_gens=10, **kwargs)
+    pops = initial_pops
+    for _ in range(10):
+        mapped = 3.9 * pops * (1 - pops)
+        pops = 0.7 * mapped + 0.15 * (np.roll(mapped, 1) + np.roll(mapped, -1))
+    assert lattice.shape == (11, 50)
+    assert np.allclose(lattice.iloc[-1], pops)
+
+    # snapshots stream out every snapshot_every generations
+    snapshots = iterate_lattice(num_gens=10, snapshot_every=5, coupling_type="global", **kwargs)
+    assert [gen for gen, _ in snapshots] == [0, 5, 10]
+    lattice = simulate_lattice(num_gens=10, num_sites=20, boundary="fixed", seed=0)
+    assert lattice.shape == (11, 20)
+    with pytest.raises(ValueError):
+        iterate_lattice(coupling_type="nearest")
+
+
+def test_simulate_many():
+
+    configs = [
+        {"num_gens": 20, "rate_min": rate, "rate_max": rate + 0.5, "num_rates": 7}
+        for rate in np.linspace(0.5, 3.5, 10)
+    ]
+    configs.append({"model": cubic_map, "num_gens": 10, "num_discard": 5, "jit": False})
+    results = simulate_many(configs, max_workers=4)
+    assert len(results) == len(configs)
+    for config, pops in zip(configs, results):
+        expected = simulate(**config)
+        assert np.allclose(pops.values, expected.values)
+        assert np.allclose(pops.columns, expected.columns)
+
+    with pytest.raises(ValueError):
+        simulate_many([{"num_generations": 10}])
+
+    # profiles record the batch as one stage, not the interleaved workers'
+    with profile() as prof:
+        simulate_many(configs, max_workers=4)
+    df = prof.to_frame()
+    assert list(df["stage"]) == ["simulate_many"]
+    assert df["num_evals"].iloc[0] == 10 * 7 * 20 + 8 * 15
+
+
+def test_plain_python_model():
+
+    # every kernel compiles undecorated user models, and matches the bundled map
+    def model(pop, rate):
+        return rate * pop * (1 - pop)
+
+    kwargs = dict(num_gens=20, rate_min=3.5, rate_max=4, num_rates=5)
+    calls = [
+        lambda m: simulate(model=m, **kwargs).values,
+        lambda m: simulate_lattice(model=m, num_gens=5, num_sites=10, seed=0).values,
+        lambda m: escape_time(model=m, num_rates=5, num_pops=5),
+        lambda m: attractor_basins(model=m, num_gens=20, num_rates=3, num_pops=3).values,
+        lambda m: attractor_stats(model=m, num_discard=10, **kwargs).values,
+        lambda m: invariant_density(model=m, num_discard=10, bins=5, **kwargs),
+        lambda m: orbit_divergence(model=m, num_discard=10, num_pairs=2, **kwargs)[0],
+        lambda m: encode_orbits(model=m, num_discard=10, **kwargs),
+        lambda m: simulate_noisy(model=m, noise=0, **kwargs).values,
+    ]
+    for call in calls:
+        assert np.allclose(call(model), call(logistic_map), equal_nan=True)
+
+
+def test_simulate_noisy():
+
+    # without noise, each member follows simulate's orbit
+    pops = simulate_noisy(model=logistic_map, noise=0, num_gens=20, num_members=2)
+    assert np.allclose(pops.loc[1].values, simulate(model=logistic_map, num_gens=20).values)
+
+    # nothing is clipped unless asked, so maps on [-1, 1] keep their orbits
+    kwargs = dict(model=cubic_map, num_gens=20, rate_min=1, rate_max=3, num_rates=5)
+    pops = simulate_noisy(noise=0, initial_pop=0.25, **kwargs)
+    assert np.allclose(pops.values, simulate(initial_pop=0.25, **kwargs).values)
+    assert pops.values.min() < 0
+
+    # noise streams don't depend on the number of threads, but do on the seed
+    kwargs = dict(model=logistic_map, rate_min=3.5, rate_max=3.9, num_members=3, noise=0.01)
+    kwargs.update(pop_min=0, pop_max=1)
+    pops = simulate_noisy(**kwargs)
+    threads = numba.get_num_threads()
+    numba.set_num_threads(1)
+    try:
+        assert (simulate_noisy(**kwargs).values == pops.values).all()
+    finally:
+        numba.set_num_threads(threads)
+    assert not (simulate_noisy(seed=1, **kwargs).values == pops.values).all()
+    assert not (pops.loc[0].values == pops.loc[1].values).all()
+    assert pops.values.min() >= 0 and pops.values.max() <= 1
+
+    pops = simulate_noisy(noise_type="parametric", **kwargs)
+    fig, ax = bifurcation_plot(pops, save=False, show=False)
+    with pytest.raises(ValueError):
+        simulate_noisy(noise_type="multiplicative")
+
+
+def test_lyapunov_image():
+
+    # the exponent matches a direct python calculation for the AB sequence
+    image = lyapunov_image(model=logistic_map, sequence="AB", num_a=5, num_b=5, num_gens=500)
+    pop, total = 0.5, 0
+    for gen_num in range(600):
+        rate = 2.5 if gen_num % 2 == 0 else 3.5
+        if gen_num >= 100:
+            total += math.log(abs(rate * (1 - 2 * pop)))
+        pop = logistic_map(pop, rate)
+    assert image.shape == (5, 5)
+    assert np.isclose(image.loc[2.5, 3.5], total / 500)
+
+    # a constant sequence is the ordinary lyapunov exponent, with numerically
+    # differentiated user models too
+    image = lyapunov_image(model=lambda pop, rate: rate * pop * (1 - pop), sequence="a", num_a=2)
+    assert np.allclose(image.loc[4.0].values[0], math.log(4), atol=1e-6)
+    fig, ax = basin_plot(image, save=False, show=False)
+    with pytest.raises(ValueError):
+        lyapunov_image(sequence="ABC")
+
+
+def test_profile():
+
+    # stages are no-ops outside of a profile
+    assert stage("simulate") is stage("plot")
+
+    @jit(nopython=True)
+    def model(pop, rate):
+        return rate * pop * (1 - pop)
+
+    with profile(trace_memory=True) as prof:
+        pops = simulate(model=model, num_gens=20, num_rates=5, num_discard=10)
+        phase_diagram(pops, save=True, show=False, folder=_img_folder, filename="profile")
+        with pytest.raises(RuntimeError):
+            with profile():
+                pass
+
+    df = prof.to_frame()
+    assert list(df["stage"]) == [
+        "simulate",
+        "simulate/simulator",
+        "simulate/unstack",
+        "get_phase_diagram_points",
+        "save_and_show",
+        "save_and_show/save_fig",
+    ]
+    assert df["num_evals"].iloc[0] == 5 * 30
+    assert df["compile_events"].iloc[0] >= 1
+    assert (df["wall_time"] > 0).all()
+    assert "simulator" in str(prof)
+
+
+def test_storage(tmp_path):
+
+    chunks = list(iterate_simulation(num_gens=20, num_rates=9, num_discard=10, chunk_rates=4))
+    assert [len(chunk.columns) for chunk in chunks] == [4, 4, 1]
+    pops = simulate(num_gens=20, num_rates=9, num_discard=10)
+    assert np.allclose(pd.concat(chunks, axis=1).values, pops.values)
+
+    formats = ["npz", "parquet", "feather"] if _has_pyarrow() else ["npz"]
+
+    bif_points = get_bifurcation_plot_points(pops)
+    phase_points = get_phase_diagram_points(pops)
+    for fmt in formats:
+        path = str(tmp_path / f"pops.{fmt}")
+        write_pops(
+            iterate_simulation(num_gens=20, num_rates=9, num_discard=10, chunk_rates=4), path
+        )
+        assert np.allclose(read_pops(path).values, pops.values)
+        assert (read_pops(path).columns == pops.columns).all()
+        subset = read_pops(path, rate_min=1, rate_max=3)
+        assert (subset.columns == pops.columns[(pops.columns >= 1) & (pops.columns <= 3)]).all()
+        assert read_pops(path, rate_min=5).shape == (20, 0)
+        write_pops(pops.astype(np.float32), path)
+        assert (read_pops(path).dtypes == np.float32).all()
+
+        path = str(tmp_path / f"bif.{fmt}")
+        write_points(bif_points, path, compression=None)
+        assert np.allclose(read_points(path).values, bif_points.values)
+        assert read_points(path, rate_min=3.5)["x"].min() >= 3.5
+
+        path = str(tmp_path / f"phase.{fmt}")
+        write_points(phase_points, path)
+        points = read_points(path, rate_max=2)
+        assert points.index.names == phase_points.index.names
+        assert (points.index.get_level_values("name") <= 2).all()
+
+    # one row per rate, each holding the rate's populations
+    if _has_pyarrow():
+        import pyarrow.parquet
+
+        assert pyarrow.parquet.read_metadata(str(tmp_path / "pops.parquet")).num_rows == 9
+
+    with pytest.raises(ValueError):
+        write_pops(pops, str(tmp_path / "pops.csv"))
+    with pytest.raises(ValueError):
+        write_pops([], str(tmp_path / "empty.npz"))
+
+
+def test_async():
+
+    async def run():
+        first, second = await asyncio.gather(
+            asimulate(num_gens=20, num_rates=5, num_discard=10),
+            asimulate(num_gens=20, num_rates=5, num_discard=10),
+        )
+        assert first is second
+        assert np.allclose(first.values, simulate(num_gens=20, num_rates=5, num_discard=10).values)
+
+        async with AsyncRunner(max_threads=2, max_processes=1) as runner:
+            images = await asyncio.gather(
+                runner.render_bifurcation(num_rates=50, num_gens=20, figsize=(4, 3)),
+                runner.render_bifurcation(num_rates=50, num_gens=20, figsize=(4, 3)),
+                runner.render_bifurcation(num_rates=50, num_gens=20, figsize=(4, 3), dpi=50),
+            )
+        assert images[0] is images[1]
+        assert all(image.startswith(b"\x89PNG") for image in images)
+        assert len(images[2]) < len(images[0])
+
+    asyncio.run(run())
+
+
+def test_cli(tmp_path):
+
+    spec = {
+        "defaults": {"num_gens": 20, "num_discard": 20},
+        "jobs": [
+            {"name": "logistic", "rate_min": 3, "num_rates": 20, "data": ["npz", "csv"]},
+            {
+                "name": "phase",
+                "model": "rate * pop * (1 - pop)",
+                "rate_min": 3,
+                "num_rates": 20,
+                "plots": [{"type": "phase"}],
+            },
+            {"name": "cubic", "model": "cubic_map", "rate_max": 3, "plots": ["bifurcation"]},
+        ],
+    }
+    spec_path = tmp_path / "spec.json"
+    spec_path.write_text(json.dumps(spec))
+    assert cli.main([str(spec_path), "-o", str(tmp_path / "out"), "-q"]) == 0
+    files = set(os.listdir(tmp_path / "out"))
+    assert {"logistic.npz", "logistic.csv", "phase_phase.png", "cubic_bifurcation.png"} <= files
+    timings = pd.read_csv(tmp_path / "out" / "timings.csv")
+    assert list(timings["stage"]) == [
+        "simulate",
+        "data:npz",
+        "data:csv",
+        "plot:phase",
+        "plot:bifurcation",
+    ]
+
+    spec["jobs"].append({"name": "bad", "num_generations": 10})
+    with pytest.raises(ValueError):
+        run_jobs(spec, output=str(tmp_path / "out"))
+    spec_path.write_text(json.dumps(spec))
+    assert cli.main([str(spec_path), "-o", str(tmp_path / "out"), "-q"]) == 1
+
+
+def test_expressions():
+
+    model = model_from_expression("rate * pop * (1 - pop)")
+    assert model is model_from_expression(" rate * pop * (1 - pop) ")
+    assert np.allclose(
+        simulate(model=model, num_gens=30, num_discard=10).values,
+        simulate(num_gens=30, num_discard=10).values,
+    )
+    assert np.isclose(get_model_derivative(model)(0.3, 3.5), 3.5 * (1 - 2 * 0.3))
+    assert np.allclose(get_model_ufunc(model)(np.array([0.1, 0.2]), 3), [0.27, 0.48])
+    x, y = get_cobweb_points(model=model, r=3.2, x=0.5, n=10)
+    assert np.allclose(y, get_cobweb_points(model=logistic_map, r=3.2, x=0.5, n=10)[1])
+
+    sine = model_from_expression("a * rate * sin(pi * pop)", {"a": 0.25})
+    slope = 0.25 * 3 * np.pi * np.cos(np.pi * 0.3)
+    assert np.isclose(get_model_derivative(sine)(0.3, 3.0), slope)
+    assert differentiate_expression("pop ** 2 + rate") == "((2) * (pop) ** ((2) - 1))"
+    image = lyapunov_image(model=model, num_a=4, num_b=4, num_gens=50)
+    assert np.allclose(image, lyapunov_image(num_a=4, num_b=4, num_gens=50))
+
+    for expression in ["__import__('os')", "pop.real", "x + 1", "pop if rate else 1", "1 +"]:
+        with pytest.raises(ValueError):
+            model_from_expression(expression)
+    with pytest.raises(ValueError):
+        model_from_expression("rate * pop", {"pop": 1})
+
+
+def test_precision():
+
+    reference = simulate(num_gens=100, num_rates=50, num_discard=100)
+    results = {}
+    for precision in ["float32", "fast"]:
+        pops = simulate(num_gens=100, num_rates=50, num_discard=100, precision=precision)
+        assert (pops.dtypes == np.float32).all()
+        assert np.allclose(pops.columns, reference.columns)
+        results[precision] = pops.values
+
+    # float32 only rounds float64 orbits, but fast iterates float32 orbits,
+    # which agree at stable rates and separate in the chaotic ones
+    assert np.allclose(results["float32"], reference.values, atol=1e-7)
+    assert np.allclose(results["fast"][:, :25], reference.values[:, :25], atol=1e-6)
+    assert np.abs(results["fast"] - results["float32"]).max() > 0.1
+    assert (simulate_many([{"num_gens": 10, "precision": "fast"}])[0].dtypes == np.float32).all()
+
+    points = get_bifurcation_plot_points(reference, precision="float32")
+    assert points["y"].dtype == np.float32 and points["x"].dtype == np.float64
+    assert (get_phase_diagram_points(pops).dtypes == np.float32).all()
+    assert (get_phase_diagram_points(pops, precision="float64").dtypes == np.float64).all()
+
+    with pytest.raises(ValueError):
+        simulate(jit=False, precision="float32")
+    with pytest.raises(ValueError):
+        simulate(precision="float16")
+
+    report = precision_report(num_gens=200, num_rates=20, num_discard=100, precision="float32")
+    assert report.index.name == "rate"
+    assert report["safe"].all()
+    assert (report["transient_error"] < 1e-7).all()
+    report = precision_report(num_gens=200, num_rates=20, num_discard=100, precision="fast")
+    assert report["safe"].iloc[:10].all()
+    assert report["transient_error"].max() > 0.1
+
+
+def test_quantization(tmp_path):
+
+    pops = simulate(num_gens=100, rate_min=2.5, num_rates=60, num_discard=200)
+    quantized = quantize_pops(pops)
+    assert quantized.codes.dtype == np.uint16 and quantized.nbytes < pops.values.nbytes / 3
+    assert np.abs(quantized.to_frame().values - pops.values).max() <= quantized.scale / 2 + 1e-7
+    assert np.allclose(quantized.to_frame().columns, pops.columns)
+
+    deduplicated = quantize_pops(pops, bits=8, value_range=(0, 1), deduplicate=True)
+    assert deduplicated.deduplicated and len(deduplicated.codes) < len(quantized.codes)
+    points = get_bifurcation_plot_points(deduplicated)
+    assert len(points) == len(deduplicated.codes) and points["y"].between(0, 1).all()
+    with pytest.raises(ValueError):
+        deduplicated.to_frame()
+    with pytest.raises(ValueError):
+        quantize_pops(pops, bits=12)
+    bifurcation_plot(deduplicated, save=True, show=False, folder=_img_folder, filename="quantized")
+
+    for extension in ["npz", "parquet"] if _has_pyarrow() else ["npz"]:
+        for original in [quantized, deduplicated]:
+            path = str(tmp_path / f"quantized.{extension}")
+            write_pops(original, path, chunk_rates=16)
+            result = read_pops(path)
+            assert isinstance(result, QuantizedPops)
+            assert np.array_equal(result.codes, original.codes)
+            assert np.array_equal(result.offsets, original.offsets)
+            assert result.num_gens == original.num_gens and result.scale == original.scale
+            subset = read_pops(path, rate_min=3, rate_max=3.5)
+            assert np.allclose(
+                subset.rates, original.rates[(original.rates >= 3) & (original.rates <= 3.5)]
+            )
+
+
+def test_double_double():
+    # orbits that settle on a cycle agree with float64
+    for model in [logistic_map, cubic_map]:
+        extended = simulate_double_double(model, 100, 2.5, 3.2, 50, 50)
+        reference = simulate_rates(model, 100, 2.5, 3.2, 50, 50, 0.5)
+        assert np.allclose(extended.to_numpy(), reference.to_numpy(), rtol=0, atol=1e-12)
+    extended = simulate_double_double(singer_map, 50, 0.9, 1, 10, 50)
+    reference = simulate_rates(singer_map, 50, 0.9, 1, 10, 50, 0.5)
+    assert np.allclose(extended.to_numpy(), reference.to_numpy(), rtol=0, atol=1e-12)
+
+    # a window far narrower than float64's spacing still gets distinct rates
+    zoom = simulate_double_double(
+        rate_min="3.5699456718695445",
+        rate_max="3.5699456718695455",
+        num_rates=9,
+        num_discard=100,
+        relative_rates=True,
+    )
+    assert np.allclose(zoom.columns, np.linspace(0, 1e-15, 9), rtol=1e-12, atol=0)
+    assert len(np.unique(np.linspace(3.5699456718695445, 3.5699456718695455, 9))) < 9
+
+    model = model_from_expression("r * pop * (1 - pop) / (1 + pop ** 2)", {"r": 3})
+    extended = simulate_double_double(model, 3, 1, 1, 1)
+    assert np.allclose(extended.iloc[:, 0], [0.5, 0.6, 3 * 0.6 * 0.4 / 1.36])
+    with pytest.raises(ValueError):
+        get_double_double_model(model_from_expression("rate * sin(pop)"))